@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from celery.result import AsyncResult
+import structlog
+import uuid
+
+from app.core.celery_app import celery_app
+from app.core.database import get_db
+from app.core.redis import cache
+from app.middleware.auth import get_current_tenant_admin
+from app.schemas.auth import BulkRevokeRequest, BulkRevokeResponse, UserPrincipal
+from app.services.session_admin_service import SessionAdminService
+from app.tasks.sessions import bulk_revoke_tokens
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+# Who started each background revocation, kept as long as its Celery result
+BULK_REVOKE_OWNER_PREFIX = "bulk_revoke_task:"
+
+
+def _can_read_task(owner: dict, current_user: UserPrincipal) -> bool:
+    return current_user.is_superuser or owner.get("tenant_id") == current_user.tenant_id
+
+
+@router.post("/sessions/revoke", response_model=BulkRevokeResponse)
+async def bulk_revoke_sessions(
+    revoke_data: BulkRevokeRequest,
+    current_user: UserPrincipal = Depends(get_current_tenant_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke refresh tokens by user, tenant, IP address, user agent or time range"""
+    # Tenant admins can only act within their own tenant
+    if not current_user.is_superuser:
+        if revoke_data.tenant_id and revoke_data.tenant_id != current_user.tenant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot revoke sessions of another tenant"
+            )
+        revoke_data.tenant_id = current_user.tenant_id
+
+    if revoke_data.background:
+        task_id = str(uuid.uuid4())
+        requested_by = {"user_id": current_user.id, "tenant_id": current_user.tenant_id}
+        # Recorded before dispatch so every task state can be checked against it
+        await cache.set(
+            f"{BULK_REVOKE_OWNER_PREFIX}{task_id}",
+            requested_by,
+            int(celery_app.conf.result_expires.total_seconds())
+        )
+        bulk_revoke_tokens.apply_async(
+            args=[revoke_data.model_dump(mode="json")],
+            kwargs={"requested_by": requested_by},
+            task_id=task_id
+        )
+        return BulkRevokeResponse(task_id=task_id, status="pending")
+
+    try:
+        service = SessionAdminService(db)
+        result = await service.revoke_tokens(revoke_data)
+
+        return BulkRevokeResponse(
+            revoked_count=result["revoked_count"],
+            users_affected=result["users_affected"]
+        )
+
+    except Exception as e:
+        logger.error("Bulk session revocation failed", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Bulk session revocation failed"
+        )
+
+
+@router.get("/sessions/revoke/{task_id}")
+async def get_bulk_revoke_status(
+    task_id: str,
+    current_user: UserPrincipal = Depends(get_current_tenant_admin)
+):
+    """Get progress of a background bulk revocation"""
+    owner = await cache.get(f"{BULK_REVOKE_OWNER_PREFIX}{task_id}")
+    if owner is None or not _can_read_task(owner, current_user):
+        # Same answer for unknown tasks and other tenants' tasks
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+    result = AsyncResult(task_id, app=celery_app)
+
+    if result.state == "PROGRESS":
+        return {"task_id": task_id, "status": "running", "progress": result.info}
+    if result.successful():
+        return {"task_id": task_id, "status": "completed", "progress": result.result}
+    if result.failed():
+        return {"task_id": task_id, "status": "failed", "error": str(result.result)}
+
+    return {"task_id": task_id, "status": result.state.lower()}
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.core.database import get_db
 from app.core.security import security, audit_logger
-from app.core.exceptions import AuthenticationError, ValidationError
+from app.core.exceptions import AuthenticationError, ValidationError, ServiceUnavailableError
 from app.services.auth_service import AuthService
 from app.services.oauth_service import OAuth2Service
 from app.services.totp_service import TOTPService
@@ -14,9 +15,10 @@ from app.schemas.auth import (
     LoginRequest, TokenResponse, RefreshTokenRequest,
     PasswordResetRequest, PasswordResetConfirm, ChangePasswordRequest,
     TwoFactorSetupResponse, TwoFactorVerifyRequest, TwoFactorLoginRequest,
-    OAuth2AuthRequest, UserProfile
+    OAuth2AuthRequest, UserProfile, UserPrincipal
 )
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_principal
+from app.services.principal_service import principal_cache
 from app.models.user import User
 
 router = APIRouter()
@@ -26,27 +28,27 @@ bearer_scheme = HTTPBearer()
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: Request,
+    response: Response,
     login_data: LoginRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and return tokens"""
     try:
         auth_service = AuthService(db)
-        totp_service = TOTPService(db)
         
         ip_address = request.client.host
         user_agent = request.headers.get("user-agent", "")
         
-        # Authenticate user
-        user = await auth_service.authenticate_user(
+        # Authenticate, check 2FA and issue tokens in one transaction
+        result = await auth_service.login(
             login_data.email,
             login_data.password,
             ip_address,
             user_agent
         )
+        user = result.user
         
-        # Check if 2FA is enabled
-        if await totp_service.is_2fa_enabled(str(user.id)):
+        if result.requires_2fa:
             # Return special response indicating 2FA required
             return JSONResponse(
                 status_code=200,
@@ -54,12 +56,10 @@ async def login(
                     "requires_2fa": True,
                     "user_id": str(user.id),
                     "message": "Two-factor authentication required"
-                }
+                },
+                headers={"Server-Timing": result.server_timing}
             )
         
-        # Create tokens
-        tokens = await auth_service.create_tokens(user, ip_address, user_agent)
-        
         # Create session if remember_me is enabled
         if login_data.remember_me:
             await auth_service.create_session(str(user.id), {
@@ -67,13 +67,17 @@ async def login(
                 "user_agent": user_agent
             })
         
-        return tokens
+        response.headers["Server-Timing"] = result.server_timing
+        return result.tokens
         
     except AuthenticationError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except ServiceUnavailableError:
+        # 503 with Retry-After, from the app-wide handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -145,7 +149,7 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     refresh_data: RefreshTokenRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Logout user and revoke refresh token"""
@@ -174,7 +178,7 @@ async def logout(
 
 @router.post("/logout-all")
 async def logout_all_sessions(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Logout from all sessions"""
@@ -248,15 +252,16 @@ async def change_password(
     """Change user password"""
     try:
         # Verify current password
-        if not current_user.verify_password(password_data.current_password):
+        if not await current_user.verify_password_async(password_data.current_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        current_user.set_password(password_data.new_password)
+        await current_user.set_password_async(password_data.new_password)
         await db.commit()
+        await principal_cache.invalidate(str(current_user.id))
         
         # Revoke all existing tokens for security
         auth_service = AuthService(db)
@@ -270,6 +275,8 @@ async def change_password(
         
         return {"message": "Password changed successfully"}
         
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -279,7 +286,7 @@ async def change_password(
 
 @router.post("/2fa/setup", response_model=TwoFactorSetupResponse)
 async def setup_2fa(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Setup 2FA for user"""
@@ -303,7 +310,7 @@ async def setup_2fa(
 @router.post("/2fa/verify")
 async def verify_2fa_setup(
     verify_data: TwoFactorVerifyRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Verify 2FA setup"""
@@ -334,7 +341,7 @@ async def verify_2fa_setup(
 @router.post("/2fa/disable")
 async def disable_2fa(
     verify_data: TwoFactorVerifyRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Disable 2FA"""
@@ -15,7 +15,9 @@ celery_app = Celery(
         "app.tasks.email",
         "app.tasks.notifications", 
         "app.tasks.reports",
-        "app.tasks.cleanup"
+        "app.tasks.cleanup",
+        "app.tasks.sessions",
+        "app.tasks.tenants"
     ]
 )
 
@@ -39,6 +41,8 @@ celery_app.conf.task_routes = {
     "app.tasks.notifications.*": {"queue": "notifications"},
     "app.tasks.reports.*": {"queue": "reports"},
     "app.tasks.cleanup.*": {"queue": "cleanup"},
+    "app.tasks.sessions.*": {"queue": "sessions"},
+    "app.tasks.tenants.*": {"queue": "tenants"},
 }
 
 # Beat schedule for periodic tasks
@@ -0,0 +1,139 @@
+from typing import Any, Awaitable, Callable, Tuple, Type
+from prometheus_client import Counter, Gauge
+import asyncio
+import time
+import structlog
+
+logger = structlog.get_logger()
+
+# Metrics
+CIRCUIT_STATE = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ['breaker']
+)
+CIRCUIT_TRANSITIONS = Counter(
+    'circuit_breaker_transitions_total',
+    'Circuit breaker state changes',
+    ['breaker', 'state']
+)
+CIRCUIT_FAILURES = Counter('circuit_breaker_failures_total', 'Calls counted as failures', ['breaker'])
+CIRCUIT_REJECTED = Counter('circuit_breaker_rejected_total', 'Calls rejected while open', ['breaker'])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with per-call timeouts
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast with CircuitOpenError. Once `recovery_timeout` has passed a
+    single probe call is let through (half-open); its outcome closes or
+    re-opens the circuit. `ignored_exceptions` are re-raised without
+    counting, for errors on the caller's side such as an exhausted local
+    connection pool.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5.0,
+        call_timeout: float = 0.25,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+        ignored_exceptions: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.call_timeout = call_timeout
+        self.failure_exceptions = failure_exceptions
+        self.ignored_exceptions = ignored_exceptions
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.labels(breaker=name).set(0)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        CIRCUIT_STATE.labels(breaker=self.name).set(self._STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(breaker=self.name, state=state).inc()
+        logger.warning("Circuit breaker state changed", breaker=self.name, state=state)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now, claiming the probe if half-open"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self._transition(self.HALF_OPEN)
+
+        # Half-open: one probe at a time
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        CIRCUIT_FAILURES.labels(breaker=self.name).inc()
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Await `func(*args, **kwargs)` under the breaker and the call timeout"""
+        return await self.call_with_timeout(self.call_timeout, func, *args, **kwargs)
+
+    async def call_with_timeout(
+        self,
+        timeout: float,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs
+    ) -> Any:
+        """Await `func(*args, **kwargs)` under the breaker and `timeout` seconds"""
+        if not self.allow_request():
+            CIRCUIT_REJECTED.labels(breaker=self.name).inc()
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except asyncio.TimeoutError:
+            self.record_failure()
+            raise
+        except self.ignored_exceptions:
+            self._probing = False
+            raise
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            # Errors of the call itself (e.g. a script error) say nothing about health
+            self._probing = False
+            raise
+
+        self.record_success()
+        return result
@@ -0,0 +1,138 @@
+from datetime import date, datetime
+from typing import Any, Dict
+import json
+import structlog
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = structlog.get_logger()
+
+# First byte of every stored value. Values written before codecs existed are
+# untagged JSON text, which never starts with one of these bytes.
+RAW_BYTES = 0x00
+
+# msgpack extension types
+EXT_DATETIME = 1
+EXT_DATE = 2
+
+
+class Codec:
+    """Serializer for one value format, identified by a one-byte id"""
+
+    id: int
+    name: str
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Standard library JSON, unknown types stored as strings"""
+
+    id = 0x01
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """orjson, unknown types stored as strings"""
+
+    id = 0x02
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, data: bytes) -> Any:
+        # orjson output is plain JSON, readable without orjson installed
+        if orjson is None:
+            return json.loads(data)
+        return orjson.loads(data)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(EXT_DATE, value.isoformat().encode())
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec(Codec):
+    """msgpack, with datetimes and dates kept as native types"""
+
+    id = 0x03
+    name = "msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JsonCodec(), OrjsonCodec(), MsgpackCodec())}
+CODECS_BY_ID: Dict[int, Codec] = {codec.id: codec for codec in CODECS.values()}
+
+_AVAILABLE = {"json": True, "orjson": orjson is not None, "msgpack": msgpack is not None}
+
+
+class ValueSerializer:
+    """Frame cached values as a codec id byte followed by the payload
+
+    bytes values are stored as-is behind RAW_BYTES and come back as bytes.
+    Every known codec id can be read regardless of the codec used for
+    writing, so the write codec can be switched with a rolling deploy.
+    """
+
+    def __init__(self, codec: str = "json"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache codec {codec!r}")
+        if not _AVAILABLE[codec]:
+            logger.warning("Cache codec not installed, using json", codec=codec)
+            codec = "json"
+        self.codec = CODECS[codec]
+        self._tag = bytes([self.codec.id])
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value for storage"""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes([RAW_BYTES]) + bytes(value)
+        return self._tag + self.codec.encode(value)
+
+    def loads(self, data: bytes) -> Any:
+        """Decode a stored value"""
+        tag = data[0]
+        if tag == RAW_BYTES:
+            return data[1:]
+        codec = CODECS_BY_ID.get(tag)
+        if codec is not None:
+            return codec.decode(data[1:])
+        # Untagged legacy JSON text, or a plain counter from INCRBY
+        return json.loads(data)
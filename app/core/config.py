@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 
@@ -12,6 +12,54 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Password Hashing
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread, process
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1  # Retry-After seconds sent when the queue is full
+    
+    # Login Lockout
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_FAILURE_WINDOW: int = 900
+    LOGIN_LOCKOUT_DURATION: int = 1800
+    
+    # Verified Token Cache
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 300
+    
+    # User Principal Cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 15
+    PRINCIPAL_CACHE_TTL: int = 300
+    
+    # Tenant Resolution Cache (per worker)
+    TENANT_CACHE_SIZE: int = 10000
+    TENANT_CACHE_TTL: int = 300
+    TENANT_NEGATIVE_CACHE_SIZE: int = 10000
+    TENANT_NEGATIVE_CACHE_TTL: int = 30  # Unknown subdomains/IDs
+    TENANT_ROUTING_ENABLED: bool = True  # Preload tenants, kept current by LISTEN/NOTIFY
+    TENANT_ROUTING_VERIFY_INTERVAL: int = 30  # Seconds between checksum checks
+    TENANT_ROUTING_MAX_STALENESS: int = 120  # Fall back to the tenant cache when not confirmed in sync for longer
+
+    # Tenant Provisioning
+    TENANT_TEMPLATE_SCHEMA: str = "tenant_template"  # Built once from the models, cloned per tenant
+    TENANT_PROVISION_CONCURRENCY: int = 8  # Connections a provisioning batch may hold at once
+    
+    # Refresh Token Store
+    REFRESH_TOKEN_STORE: str = "redis"  # redis, database
+    TOKEN_PERSIST_INTERVAL: float = 2.0
+    TOKEN_PERSIST_BATCH_SIZE: int = 500
+    
+    # Write-behind for bookkeeping timestamps (last_used_at etc.)
+    TOUCH_FLUSH_INTERVAL: float = 5.0
+    TOUCH_FLUSH_BATCH_SIZE: int = 1000
+    TOUCH_BUFFER_MAX_PENDING: int = 10000
+    TOUCH_UNMATCHED_MAX_AGE: float = 300.0  # Keep touches of rows not yet persisted this long
+    TOUCH_FLUSH_MAX_BACKOFF: float = 60.0  # Longest wait between retries of failed flushes
+    TOUCH_BUFFER_HARD_CAP: int = 100000  # Oldest touches are dropped past this
+    
     # Database
     DATABASE_URL: str
     DATABASE_POOL_SIZE: int = 20
@@ -20,6 +68,34 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_POOL_SIZE: int = 20  # Connections per reply format, per worker process
+    REDIS_POOL_TIMEOUT: float = 1.0  # Seconds to wait for a free pooled connection
+    REDIS_CONNECT_TIMEOUT: float = 0.5
+    REDIS_CALL_TIMEOUT: float = 0.25  # Command budget per hot-path call, on top of REDIS_POOL_TIMEOUT
+    REDIS_BULK_CALL_TIMEOUT: float = 2.0  # Command budget for pipelines, multi-key calls and tag invalidation
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5
+    REDIS_BREAKER_RECOVERY_TIMEOUT: float = 5.0
+    REDIS_FALLBACK_CACHE_SIZE: int = 10000
+    REDIS_FALLBACK_CACHE_TTL: int = 60
+    REDIS_AUTO_BATCH: bool = False  # Coalesce concurrent cache calls into pipelines
+    REDIS_AUTO_BATCH_MAX: int = 512
+    CACHE_CODEC: str = "msgpack"  # json, orjson, msgpack
+    CACHE_LOCK_TIMEOUT: int = 10  # get_or_set load lock expiry, above the slowest loader
+    CACHE_LOCK_WAIT: float = 2.0  # How long other workers wait for a locked load
+    CACHE_EARLY_REFRESH_BETA: float = 1.0  # XFetch beta; higher refreshes earlier
+    
+    # Sessions
+    SESSION_TTL: int = 86400
+    SESSION_REFRESH_FRACTION: float = 0.25  # Extend the TTL once this share of it has elapsed
+    
+    # Near Cache (per-worker copy of hot Redis keys)
+    NEAR_CACHE_ENABLED: bool = True
+    NEAR_CACHE_MODE: str = "tracking"  # tracking (Redis 6+ client tracking), pubsub
+    # @cached lookups (tenants by subdomain/id, user contact, 2FA state); not principal:,
+    # which has its own per-worker tier, nor session:, read by scripts that slide the TTL
+    NEAR_CACHE_PREFIXES: List[str] = ["cached:"]
+    NEAR_CACHE_SIZE: int = 10000
+    NEAR_CACHE_TTL: int = 60
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
@@ -53,6 +129,13 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60
+    RATE_LIMIT_MODE: str = "exact"  # exact, approximate
+    RATE_LIMIT_ERROR_BOUND: float = 0.05  # Max share of a limit one worker may lease at once
+    RATE_LIMIT_RETURN_INTERVAL: float = 1.0
+    RATE_LIMIT_ALGORITHM: Optional[str] = None  # fixed_window, sliding_window, gcra; see default_rate_limit_algorithm
+    RATE_LIMIT_DEFAULT_PLAN: str = "basic"
+    RATE_LIMIT_POLICIES: Dict[str, Dict[str, str]] = {}  # plan -> route class -> "algorithm:limit/window"
+    RATE_LIMIT_FALLBACK_WORKERS: int = 1  # Limits are split across this many workers while Redis is down
     
     # File Storage
     STORAGE_TYPE: str = "local"  # local, s3, gcs
@@ -70,6 +153,21 @@ class Settings(BaseSettings):
             return v
         raise ValueError("ALLOWED_HOSTS must be a comma-separated string or list")
     
+    @validator("NEAR_CACHE_PREFIXES", pre=True)
+    def assemble_near_cache_prefixes(cls, v):
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, list):
+            return v
+        raise ValueError("NEAR_CACHE_PREFIXES must be a comma-separated string or list")
+    
+    @validator("RATE_LIMIT_ALGORITHM", always=True)
+    def default_rate_limit_algorithm(cls, v, values):
+        # Only fixed windows can be leased, so approximate mode defaults to them
+        if v:
+            return v
+        return "fixed_window" if values.get("RATE_LIMIT_MODE") == "approximate" else "sliding_window"
+    
     @validator("CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v):
         if isinstance(v, str):
@@ -1,7 +1,9 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import MetaData, text
-from typing import AsyncGenerator
+from sqlalchemy import MetaData, event, text
+from functools import lru_cache
+from typing import AsyncGenerator, Optional
+import re
 import structlog
 
 from app.core.config import settings
@@ -26,6 +28,46 @@ async_session_maker = async_sessionmaker(
 Base = declarative_base()
 
 
+@lru_cache(maxsize=1024)
+def tenant_bind(schema_name: str) -> AsyncEngine:
+    """Engine sharing the main pool whose statements target a tenant schema
+    
+    Schema-less tables are qualified with `schema_name` when statements are
+    compiled, so tenant sessions need no SET search_path round trip and leave
+    no state on pooled connections. Raw text() SQL is not translated.
+    """
+    return engine.execution_options(schema_translate_map={None: schema_name})
+
+
+def tenant_session_maker(schema_name: str) -> AsyncSession:
+    """New session whose ORM and Core statements run in a tenant schema"""
+    return async_session_maker(bind=tenant_bind(schema_name))
+
+
+# Statements that change the session's search_path: a SET [SESSION] at the
+# start of a statement, or set_config() anywhere. SET LOCAL ends with the
+# transaction, and a function's `SET search_path` clause only applies to it.
+SEARCH_PATH_CHANGE = re.compile(
+    r"(?:^|;)\s*SET\s+(?:SESSION\s+)?search_path\b|\bset_config\s*\(\s*'search_path'",
+    re.IGNORECASE
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _track_search_path(conn, cursor, statement, parameters, context, executemany):
+    # Tag connections whose search_path may have been changed by raw SQL
+    if SEARCH_PATH_CHANGE.search(statement):
+        conn.info["search_path_changed"] = True
+
+
+@event.listens_for(engine.sync_engine.pool, "checkin")
+def _discard_search_path(dbapi_connection, connection_record):
+    # A session-level search_path would leak into the next checkout, so the
+    # connection is closed instead of being reused
+    if connection_record.info.pop("search_path_changed", False):
+        connection_record.invalidate()
+
+
 async def init_db():
     """Initialize database and create schemas"""
     try:
@@ -54,32 +96,26 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 class TenantDB:
     """Multi-tenant database manager with schema isolation"""
     
-    def __init__(self, tenant_id: str):
+    def __init__(self, tenant_id: str, schema_name: Optional[str] = None):
         self.tenant_id = tenant_id
-        self.schema_name = f"tenant_{tenant_id}"
+        self.schema_name = schema_name or f"tenant_{tenant_id}"
     
     async def create_tenant_schema(self):
-        """Create tenant-specific schema"""
-        async with engine.begin() as conn:
-            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema_name}"))
-            # Set search path for tenant
-            await conn.execute(text(f"SET search_path TO {self.schema_name}, public"))
-            # Create tenant-specific tables
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info(f"Created schema for tenant: {self.tenant_id}")
+        """Create tenant-specific schema by cloning the tenant template"""
+        from app.core.tenant_provisioning import tenant_provisioner
+        await tenant_provisioner.provision(self.tenant_id, self.schema_name)
     
     async def drop_tenant_schema(self):
         """Drop tenant schema and all data"""
         async with engine.begin() as conn:
-            await conn.execute(text(f"DROP SCHEMA IF EXISTS {self.schema_name} CASCADE"))
+            schema = conn.dialect.identifier_preparer.quote_schema(self.schema_name)
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
             logger.info(f"Dropped schema for tenant: {self.tenant_id}")
     
     async def get_tenant_session(self) -> AsyncGenerator[AsyncSession, None]:
         """Get database session with tenant schema context"""
-        async with async_session_maker() as session:
+        async with tenant_session_maker(self.schema_name) as session:
             try:
-                # Set schema search path for this session
-                await session.execute(text(f"SET search_path TO {self.schema_name}, public"))
                 yield session
                 await session.commit()
             except Exception:
@@ -47,4 +47,8 @@ class TenantError(BaseAPIException):
 
 class ExternalServiceError(BaseAPIException):
     """External service error exception"""
-    pass
\ No newline at end of file
+    pass
+
+class ServiceUnavailableError(BaseAPIException):
+    """Service temporarily overloaded or unavailable exception"""
+    pass
@@ -0,0 +1,106 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+import asyncio
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+
+logger = structlog.get_logger()
+
+# Password hashing context shared by the security manager and the User model
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Metrics
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Password hashing call duration including pool queueing',
+    ['operation']
+)
+PASSWORD_HASH_PENDING = Gauge('password_hash_pending', 'Password hashing calls queued or running')
+PASSWORD_HASH_REJECTED = Counter(
+    'password_hash_rejected_total',
+    'Password hashing calls rejected because the queue was full',
+    ['operation']
+)
+
+
+def _hash(password: str) -> str:
+    """Hash password (module level so it can run in a process pool)"""
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    """Verify password (module level so it can run in a process pool)"""
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """Run bcrypt hashing in a bounded worker pool off the event loop"""
+
+    def __init__(self, executor_type: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unsupported password hash executor: {executor_type}")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args) -> Any:
+        """Submit a hashing call to the pool, rejecting it when the queue is full"""
+        if self._pending >= self.max_queue:
+            PASSWORD_HASH_REJECTED.labels(operation=operation).inc()
+            logger.warning("Password hashing queue full", operation=operation, pending=self._pending)
+            raise ServiceUnavailableError(
+                "Password hashing capacity exceeded",
+                {"retry_after": settings.PASSWORD_HASH_RETRY_AFTER}
+            )
+
+        self._pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+            PASSWORD_HASH_DURATION.labels(operation=operation).observe(time.perf_counter() - start_time)
+
+    async def hash(self, password: str) -> str:
+        """Hash password without blocking the event loop"""
+        return await self._run("hash", _hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify password without blocking the event loop"""
+        return await self._run("verify", _verify, password, hashed_password)
+
+    def shutdown(self):
+        """Shut down the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+import time
+
+# Metrics
+LOCAL_CACHE_HITS = Counter('local_cache_hits_total', 'In-process cache hits', ['cache'])
+LOCAL_CACHE_MISSES = Counter('local_cache_misses_total', 'In-process cache misses', ['cache'])
+LOCAL_CACHE_EVICTIONS = Counter(
+    'local_cache_evictions_total',
+    'In-process cache evictions',
+    ['cache', 'reason']
+)
+LOCAL_CACHE_SIZE = Gauge('local_cache_entries', 'In-process cache entries', ['cache'])
+
+
+class LocalCache:
+    """Bounded per-worker LRU cache with per-entry expiry"""
+
+    def __init__(self, name: str, maxsize: int = 10000, default_ttl: float = 60):
+        self.name = name
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get value, dropping it if it has expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self._record_miss()
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._record_eviction("expired")
+            self._record_miss()
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        LOCAL_CACHE_HITS.labels(cache=self.name).inc()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Set value with expiration in seconds"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            self.delete(key)
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._record_eviction("capacity")
+
+        LOCAL_CACHE_SIZE.labels(cache=self.name).set(len(self._data))
+
+    def delete(self, key: Hashable) -> bool:
+        """Delete key from cache"""
+        removed = self._data.pop(key, None) is not None
+        if removed:
+            LOCAL_CACHE_SIZE.labels(cache=self.name).set(len(self._data))
+        return removed
+
+    def clear(self):
+        """Remove all entries"""
+        self._data.clear()
+        LOCAL_CACHE_SIZE.labels(cache=self.name).set(0)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of unexpired entries, without affecting recency"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def stats(self) -> dict:
+        """Get hit/miss/eviction counters"""
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _record_miss(self):
+        self.misses += 1
+        LOCAL_CACHE_MISSES.labels(cache=self.name).inc()
+
+    def _record_eviction(self, reason: str):
+        self.evictions += 1
+        LOCAL_CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        LOCAL_CACHE_SIZE.labels(cache=self.name).set(len(self._data))
@@ -0,0 +1,182 @@
+from typing import Iterable, List, Optional, Tuple
+from prometheus_client import Counter
+import asyncio
+import structlog
+
+from app.core.local_cache import LocalCache
+
+logger = structlog.get_logger()
+
+# Metrics
+NEAR_CACHE_REQUESTS = Counter(
+    'near_cache_requests_total',
+    'Near cache lookups by key prefix',
+    ['prefix', 'result']
+)
+NEAR_CACHE_INVALIDATIONS = Counter(
+    'near_cache_invalidations_total',
+    'Near cache invalidation messages received',
+    ['source']
+)
+
+TRACKING_CHANNEL = "__redis__:invalidate"
+PUBSUB_CHANNEL = "cache:invalidate"
+
+
+class NearCache:
+    """Per-worker copy of hot Redis values kept coherent by invalidations
+
+    In `tracking` mode Redis itself reports writes to the configured key
+    prefixes (CLIENT TRACKING in broadcast mode, redirected to a pub/sub
+    connection), so writes from any client invalidate the copy. In `pubsub`
+    mode, for servers without client tracking, RedisCache publishes the keys
+    it writes on a channel every worker listens to instead. The mode is not
+    switched automatically, as workers in different modes would miss each
+    other's invalidations.
+
+    Values are only served while the listener is connected; entries also
+    expire after `ttl` in case an invalidation is lost.
+    """
+
+    def __init__(
+        self,
+        get_redis,
+        prefixes: List[str],
+        maxsize: int = 10000,
+        ttl: float = 60,
+        mode: str = "tracking"
+    ):
+        self._get_redis = get_redis
+        self.prefixes = tuple(prefixes)
+        self.mode = mode
+        self.entries = LocalCache("near_cache", maxsize=maxsize, default_ttl=ttl)
+        self.connected = False
+        # Bumped on every invalidation so reads racing a write are not stored
+        self.generation = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def prefix_of(self, key: str) -> Optional[str]:
+        """Configured prefix covering `key`, if any"""
+        for prefix in self.prefixes:
+            if key.startswith(prefix):
+                return prefix
+        return None
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[bytes]]:
+        """Return (hit, raw value) for a key"""
+        prefix = self.prefix_of(key)
+        if prefix is None or not self.connected:
+            return False, None
+        value = self.entries.get(key)
+        NEAR_CACHE_REQUESTS.labels(prefix=prefix, result="hit" if value is not None else "miss").inc()
+        return value is not None, value
+
+    def store(self, key: str, value: Optional[bytes], generation: int):
+        """Keep a value read from Redis unless an invalidation arrived meanwhile"""
+        if value is None or generation != self.generation or not self.connected:
+            return
+        if self.prefix_of(key) is not None:
+            self.entries.set(key, value)
+
+    def invalidate(self, keys: Iterable[str]):
+        """Drop keys from this worker's copy"""
+        self.generation += 1
+        for key in keys:
+            self.entries.delete(key)
+
+    async def publish(self, keys: List[str]):
+        """Tell other workers about written keys when Redis is not tracking them"""
+        self.invalidate(keys)
+        if self.mode != "pubsub":
+            return
+        keys = [key for key in keys if self.prefix_of(key) is not None]
+        if keys:
+            client = await self._get_redis()
+            await client.publish(PUBSUB_CHANNEL, "\n".join(keys))
+
+    def _apply(self, source: str, data):
+        NEAR_CACHE_INVALIDATIONS.labels(source=source).inc()
+        if data is None:
+            # FLUSHDB/FLUSHALL
+            self.generation += 1
+            self.entries.clear()
+        elif isinstance(data, str):
+            self.invalidate(data.split("\n"))
+        else:
+            self.invalidate(data)
+
+    def start(self):
+        """Start invalidation listener"""
+        if self._task is None and self.prefixes:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop invalidation listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _enable_tracking(self, pubsub):
+        """Redirect broadcast tracking of our prefixes to the pub/sub connection"""
+        # The subscriber's client id must be read before it enters subscribe mode
+        await pubsub.execute_command("CLIENT", "ID")
+        client_id = await pubsub.parse_response(block=True)
+
+        # Tracking lives as long as the connection that enabled it
+        client = await self._get_redis()
+        tracker = client.client()
+        try:
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args.extend(("PREFIX", prefix))
+            await tracker.execute_command(*args)
+        except Exception:
+            await tracker.close()
+            raise
+        return tracker
+
+    async def _close_tracker(self, tracker):
+        # The connection goes back to the pool, so switch tracking off first
+        try:
+            await tracker.execute_command("CLIENT", "TRACKING", "OFF")
+        except Exception:
+            pass
+        await tracker.close()
+
+    async def _run(self):
+        while True:
+            tracker = None
+            try:
+                client = await self._get_redis()
+                pubsub = client.pubsub()
+                try:
+                    if self.mode == "tracking":
+                        tracker = await self._enable_tracking(pubsub)
+                        channel = TRACKING_CHANNEL
+                    else:
+                        channel = PUBSUB_CHANNEL
+
+                    await pubsub.subscribe(channel)
+                    # Anything cached before the subscription may be stale
+                    self.entries.clear()
+                    self.connected = True
+
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._apply(self.mode, message["data"])
+                finally:
+                    self.connected = False
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Near cache listener failed", error=str(e))
+                await asyncio.sleep(1)
+            finally:
+                self.connected = False
+                if tracker is not None:
+                    await self._close_tracker(tracker)
@@ -0,0 +1,160 @@
+from typing import Dict, Optional, Tuple
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+ALGORITHMS = ("fixed_window", "sliding_window", "gcra")
+
+# Route classes by path prefix, first match wins
+ROUTE_CLASSES: Tuple[Tuple[str, str], ...] = (
+    ("/api/v1/auth/", "auth"),
+    ("/api/v1/admin/", "admin"),
+)
+
+# Scopes checked next to the client's own (user or IP) limit
+SCOPES = ("ip", "tenant", "endpoint")
+
+
+def _plan_policies(scale: int, auth: str, admin: str) -> Dict[str, str]:
+    algorithm = settings.RATE_LIMIT_ALGORITHM
+    requests = settings.RATE_LIMIT_REQUESTS * scale
+    window = settings.RATE_LIMIT_WINDOW
+    return {
+        "default": f"{algorithm}:{requests}/{window}",
+        "auth": auth,
+        "admin": admin,
+        "ip": f"{algorithm}:{requests * 3}/{window}",
+        "tenant": f"{algorithm}:{requests * 20}/{window}",
+        "endpoint": f"{algorithm}:{max(1, requests // 2)}/{window}",
+    }
+
+
+# Built-in policies per plan as "algorithm:limit/window". Route class keys
+# (default, auth, admin) limit each client; "ip", "tenant" and "endpoint"
+# limit an authenticated user's IP address, the whole tenant, and each client
+# per path. "off" disables a scope. RATE_LIMIT_POLICIES entries override
+# these one key at a time.
+DEFAULT_POLICIES: Dict[str, Dict[str, str]] = {
+    "basic": _plan_policies(1, auth="gcra:20/60", admin="sliding_window:60/60"),
+    "premium": _plan_policies(10, auth="gcra:60/60", admin="sliding_window:300/60"),
+    "enterprise": _plan_policies(50, auth="gcra:120/60", admin="sliding_window:1200/60"),
+}
+
+
+class RateLimitRule:
+    """Algorithm and limit for one scope"""
+
+    __slots__ = ("algorithm", "limit", "window")
+
+    def __init__(self, algorithm: str, limit: int, window: int):
+        self.algorithm = algorithm
+        self.limit = limit
+        self.window = window
+
+    @classmethod
+    def parse(cls, spec: str, where: str) -> Optional["RateLimitRule"]:
+        """Parse an "algorithm:limit/window" spec, or "off" for no limit"""
+        if spec.strip() == "off":
+            return None
+        algorithm, _, rate = spec.partition(":")
+        limit, _, window = rate.partition("/")
+        algorithm = algorithm.strip()
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm {algorithm!r} for {where}")
+        rule = cls(algorithm, int(limit), int(window))
+        if rule.limit <= 0 or rule.window <= 0:
+            raise ValueError(f"Rate limit for {where} must be positive")
+        return rule
+
+
+class RateLimitPolicy:
+    """Rules applied to requests of one plan and route class"""
+
+    __slots__ = ("plan", "route_class", "client", "ip", "tenant", "endpoint")
+
+    def __init__(
+        self,
+        plan: str,
+        route_class: str,
+        client: RateLimitRule,
+        ip: Optional[RateLimitRule] = None,
+        tenant: Optional[RateLimitRule] = None,
+        endpoint: Optional[RateLimitRule] = None
+    ):
+        self.plan = plan
+        self.route_class = route_class
+        self.client = client
+        self.ip = ip
+        self.tenant = tenant
+        self.endpoint = endpoint
+
+
+class PolicyTable:
+    """Rate limit policies compiled into a flat (plan, route class) table
+
+    Every plan gets an entry for every route class at compile time, so
+    resolving a request's policy is a prefix scan and one dict lookup.
+    Unknown plans fall back to the default plan.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, Dict[str, str]],
+        route_classes: Tuple[Tuple[str, str], ...] = ROUTE_CLASSES,
+        default_plan: str = "basic"
+    ):
+        if default_plan not in policies or "default" not in policies[default_plan]:
+            raise ValueError(f"Default plan {default_plan!r} needs a default policy")
+
+        self.route_classes = route_classes
+        self.default_plan = default_plan
+        self._table: Dict[Tuple[str, str], RateLimitPolicy] = {}
+
+        fallback = policies[default_plan]
+        class_names = {"default", *(name for _, name in route_classes)}
+        for plan, specs in policies.items():
+            # Plan's own spec, then the plan's default, then the default plan's
+            def lookup(name: str, *fallback_names: str) -> str:
+                for source in (specs, fallback):
+                    for candidate in (name, *fallback_names):
+                        if source.get(candidate):
+                            return source[candidate]
+                return "off"
+
+            scopes = {
+                scope: RateLimitRule.parse(lookup(scope), f"{plan}/{scope}")
+                for scope in SCOPES
+            }
+            for route_class in class_names:
+                client = RateLimitRule.parse(lookup(route_class, "default"), f"{plan}/{route_class}")
+                if client is None:
+                    raise ValueError(f"Rate limit for {plan}/{route_class} cannot be off")
+                self._table[(plan, route_class)] = RateLimitPolicy(plan, route_class, client, **scopes)
+
+    @classmethod
+    def from_settings(cls) -> "PolicyTable":
+        """Compile the built-in policies with RATE_LIMIT_POLICIES overrides"""
+        policies = {plan: dict(specs) for plan, specs in DEFAULT_POLICIES.items()}
+        for plan, specs in settings.RATE_LIMIT_POLICIES.items():
+            policies.setdefault(plan, {}).update(specs)
+        return cls(policies, default_plan=settings.RATE_LIMIT_DEFAULT_PLAN)
+
+    def route_class(self, path: str) -> str:
+        for prefix, name in self.route_classes:
+            if path.startswith(prefix):
+                return name
+        return "default"
+
+    def resolve(self, plan: Optional[str], path: str) -> RateLimitPolicy:
+        """Policy for a tenant plan and request path"""
+        route_class = self.route_class(path)
+        policy = self._table.get((plan, route_class))
+        if policy is None:
+            policy = self._table[(self.default_plan, route_class)]
+        return policy
+
+
+# Global policy table
+policy_table = PolicyTable.from_settings()
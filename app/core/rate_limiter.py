@@ -0,0 +1,613 @@
+from typing import Any, Dict, List, Optional, Tuple
+from prometheus_client import Counter
+import asyncio
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.local_cache import LocalCache
+from app.core.redis import get_redis, redis_breaker, redis_clients
+
+logger = structlog.get_logger()
+
+# Metrics
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions_total',
+    'Rate limit decisions by where they were made',
+    ['source', 'allowed']
+)
+RATE_LIMIT_REDIS_CALLS = Counter('rate_limit_redis_calls_total', 'Rate limiter Redis calls', ['op'])
+
+# Fixed-window check-and-increment in one round trip.
+# KEYS: counter key; ARGV: limit, window seconds
+# Returns {allowed, remaining, reset seconds}
+FIXED_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    ttl = window
+end
+if current >= limit then
+    return {0, 0, ttl}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], window)
+end
+return {1, limit - current, ttl}
+"""
+
+# Sliding-window counter: the previous window's count weighted by how much of
+# it still overlaps the sliding window, plus the current window's count.
+# KEYS: current window key, previous window key
+# ARGV: limit, window seconds, previous window weight, reset seconds
+# Returns {allowed, remaining, reset seconds}
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local weight = tonumber(ARGV[3])
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local estimated = math.floor(previous * weight) + current
+if estimated >= limit then
+    return {0, 0, tonumber(ARGV[4])}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], window * 2)
+end
+return {1, limit - estimated - 1, tonumber(ARGV[4])}
+"""
+
+# Generic cell rate algorithm: one theoretical arrival time (TAT) per key.
+# Requests are spaced by the emission interval with a burst of up to `limit`.
+# KEYS: TAT key; ARGV: now ms, emission interval ms, burst tolerance ms
+# Returns {allowed, remaining, reset seconds}
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local ahead = new_tat - now
+if ahead > tolerance then
+    return {0, 0, math.ceil((ahead - tolerance) / 1000)}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(ahead))
+return {1, math.floor((tolerance - ahead) / interval), math.ceil(ahead / 1000)}
+"""
+
+ALGORITHM_SCRIPTS = {
+    "fixed_window": FIXED_WINDOW_SCRIPT,
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "gcra": GCRA_SCRIPT,
+}
+
+# Check several scopes at once and count the request against all of them
+# only if every scope allows it, so a denied request uses no quota.
+# KEYS: two per scope (current and previous window, or the TAT key twice)
+# ARGV: now ms, then algorithm, limit, window seconds per scope
+# Returns {tripped scope index or 0, then remaining, reset seconds per scope}
+MULTI_SCOPE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n = (#ARGV - 1) / 3
+local tripped = 0
+local reply = {0}
+local writes = {}
+for i = 1, n do
+    local algorithm = ARGV[3 * i - 1]
+    local limit = tonumber(ARGV[3 * i])
+    local window = tonumber(ARGV[3 * i + 1]) * 1000
+    local key = KEYS[2 * i - 1]
+    local remaining
+    local reset
+    if algorithm == 'gcra' then
+        local interval = window / limit
+        local tat = tonumber(redis.call('GET', key) or ARGV[1])
+        if tat < now then
+            tat = now
+        end
+        local ahead = tat + interval - now
+        if ahead > window then
+            remaining = -1
+            reset = (ahead - window) / 1000
+        else
+            remaining = math.floor((window - ahead) / interval)
+            reset = ahead / 1000
+            writes[i] = {tat + interval, math.ceil(ahead)}
+        end
+    else
+        local elapsed = now % window
+        local current = tonumber(redis.call('GET', key) or '0')
+        local estimated = current
+        if algorithm == 'sliding_window' then
+            local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+            estimated = math.floor(previous * (1 - elapsed / window)) + current
+        end
+        remaining = limit - estimated - 1
+        reset = (window - elapsed) / 1000
+    end
+    if remaining < 0 and tripped == 0 then
+        tripped = i
+    end
+    reply[2 * i] = math.max(remaining, 0)
+    reply[2 * i + 1] = math.max(math.ceil(reset), 1)
+end
+reply[1] = tripped
+if tripped == 0 then
+    for i = 1, n do
+        local algorithm = ARGV[3 * i - 1]
+        local window = tonumber(ARGV[3 * i + 1])
+        local key = KEYS[2 * i - 1]
+        if algorithm == 'gcra' then
+            redis.call('SET', key, writes[i][1], 'PX', writes[i][2])
+        elseif redis.call('INCR', key) == 1 then
+            if algorithm == 'sliding_window' then
+                redis.call('EXPIRE', key, window * 2)
+            else
+                redis.call('EXPIRE', key, window)
+            end
+        end
+    end
+end
+return reply
+"""
+
+# Lease up to ARGV[3] units of quota from the current window.
+# KEYS: counter key; ARGV: limit, window seconds, wanted units
+# Returns {granted, remaining after grant, reset seconds}
+LEASE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    ttl = window
+end
+local grant = math.min(tonumber(ARGV[3]), limit - current)
+if grant <= 0 then
+    return {0, 0, ttl}
+end
+current = redis.call('INCRBY', KEYS[1], grant)
+if current == grant then
+    redis.call('EXPIRE', KEYS[1], window)
+end
+return {grant, limit - current, ttl}
+"""
+
+# Give unused leased quota back to the window.
+# KEYS: counter key; ARGV: units to return
+RETURN_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local give = math.min(tonumber(ARGV[1]), current)
+if give > 0 then
+    redis.call('DECRBY', KEYS[1], give)
+end
+return give
+"""
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+
+    def __init__(
+        self,
+        allowed: bool,
+        limit: int,
+        remaining: int,
+        reset: int,
+        scope: Optional[str] = None,
+        window: Optional[int] = None
+    ):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.scope = scope
+        self.window = window
+
+    def headers(self) -> list:
+        """Rate limit headers in ASGI form"""
+        headers = [
+            [b'x-ratelimit-limit', str(self.limit).encode()],
+            [b'x-ratelimit-remaining', str(max(0, self.remaining)).encode()],
+            [b'x-ratelimit-reset', str(self.reset).encode()],
+        ]
+        if self.scope:
+            headers.append([b'x-ratelimit-scope', self.scope.encode()])
+        if not self.allowed:
+            headers.append([b'retry-after', str(self.reset).encode()])
+        return headers
+
+
+class RateLimitScope:
+    """One key and limit checked by a multi-scope rate limit call"""
+
+    __slots__ = ("name", "key", "limit", "window", "algorithm")
+
+    def __init__(self, name: str, key: str, limit: int, window: int, algorithm: str = "fixed_window"):
+        self.name = name
+        self.key = key
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+
+
+class LocalRateLimiter:
+    """In-process fixed-window limiter used while Redis is unavailable
+
+    Every algorithm is approximated by a fixed window, and each worker
+    enforces `limit / workers` so the fleet stays near the global limit.
+    """
+
+    def __init__(self, workers: int = 1, maxsize: int = 100000):
+        self.workers = max(1, workers)
+        self._counters = LocalCache("rate_limit_fallback", maxsize=maxsize)
+
+    def _check(self, key: str, limit: int, window: int, now: float) -> RateLimitResult:
+        window_index = int(now // window)
+        reset = max(1, int((window_index + 1) * window - now))
+        local_limit = max(1, limit // self.workers)
+        count = self._counters.get(f"{key}:{window_index}", 0)
+        return RateLimitResult(count < local_limit, limit, local_limit - count - 1, reset, window=window)
+
+    def _count(self, key: str, window: int, now: float):
+        window_index = int(now // window)
+        counter_key = f"{key}:{window_index}"
+        ttl = (window_index + 1) * window - now
+        self._counters.set(counter_key, self._counters.get(counter_key, 0) + 1, ttl)
+
+    def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        """Count one request against `key` in this worker only"""
+        now = time.time()
+        result = self._check(key, limit, window, now)
+        if result.allowed:
+            self._count(key, window, now)
+        RATE_LIMIT_DECISIONS.labels(source="fallback", allowed=str(result.allowed).lower()).inc()
+        return result
+
+    def hit_many(self, scopes: List["RateLimitScope"]) -> RateLimitResult:
+        """Count one request against every scope in this worker only"""
+        now = time.time()
+        results = []
+        for scope in scopes:
+            result = self._check(scope.key, scope.limit, scope.window, now)
+            result.scope = scope.name
+            results.append(result)
+
+        denied = next((result for result in results if not result.allowed), None)
+        RATE_LIMIT_DECISIONS.labels(source="fallback", allowed=str(denied is None).lower()).inc()
+        if denied is not None:
+            for result in results:
+                result.allowed = False
+            denied.remaining = 0
+            return denied
+
+        for scope in scopes:
+            self._count(scope.key, scope.window, now)
+        return min(results, key=lambda result: result.remaining)
+
+
+class RedisRateLimiter:
+    """Atomic rate limiter running one server-side script per algorithm
+
+    Supported algorithms are `fixed_window`, `sliding_window` (weighted
+    two-window counter, no 2x burst at window boundaries) and `gcra`
+    (smooth spacing with a burst of up to `limit`). Script calls go through
+    the Redis circuit breaker; failed or short-circuited checks are decided
+    by the in-process fallback limiter.
+    """
+
+    def __init__(self):
+        self.fallback = LocalRateLimiter(workers=settings.RATE_LIMIT_FALLBACK_WORKERS)
+
+    def _log_failure(self, error: Exception):
+        if not isinstance(error, CircuitOpenError):
+            logger.error("Rate limit check failed, using local fallback", error=str(error))
+
+    async def _get_script(self, algorithm: str = "fixed_window"):
+        # Registered per client, so a closed client's scripts are not reused
+        return redis_clients.script(ALGORITHM_SCRIPTS[algorithm])
+
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        algorithm: str = "fixed_window"
+    ) -> RateLimitResult:
+        """Count one request against `key` and report whether it is allowed"""
+        now = time.time()
+
+        if algorithm == "gcra":
+            interval = window * 1000 / limit
+            keys = [f"{key}:gcra"]
+            args = [int(now * 1000), interval, interval * limit]
+        elif algorithm == "sliding_window":
+            window_index = int(now // window)
+            window_end = (window_index + 1) * window
+            keys = [f"{key}:{window_index}", f"{key}:{window_index - 1}"]
+            args = [limit, window, (window_end - now) / window, max(1, int(window_end - now))]
+        else:
+            keys = [f"{key}:{int(now // window)}"]
+            args = [limit, window]
+
+        try:
+            script = await self._get_script(algorithm)
+            allowed, remaining, reset = await redis_breaker.call(script, keys=keys, args=args)
+        except Exception as e:
+            self._log_failure(e)
+            return self.fallback.hit(key, limit, window)
+        RATE_LIMIT_REDIS_CALLS.labels(op="hit").inc()
+        RATE_LIMIT_DECISIONS.labels(source="redis", allowed=str(bool(allowed)).lower()).inc()
+        return RateLimitResult(bool(allowed), limit, int(remaining), int(reset), window=window)
+
+    async def hit_many(self, scopes: List[RateLimitScope]) -> RateLimitResult:
+        """Count one request against every scope in a single script call
+
+        Returns the result of the scope that tripped, or of the scope with
+        the least quota left when the request is allowed.
+        """
+        now_ms = int(time.time() * 1000)
+        keys: List[str] = []
+        args: List[Any] = [now_ms]
+        for scope in scopes:
+            if scope.algorithm == "gcra":
+                keys.extend((f"{scope.key}:gcra", f"{scope.key}:gcra"))
+            else:
+                window_index = now_ms // (scope.window * 1000)
+                keys.extend((f"{scope.key}:{window_index}", f"{scope.key}:{window_index - 1}"))
+            args.extend((scope.algorithm, scope.limit, scope.window))
+
+        try:
+            script = redis_clients.script(MULTI_SCOPE_SCRIPT)
+            reply = await redis_breaker.call(script, keys=keys, args=args)
+        except Exception as e:
+            self._log_failure(e)
+            return self.fallback.hit_many(scopes)
+        RATE_LIMIT_REDIS_CALLS.labels(op="hit_many").inc()
+
+        tripped = int(reply[0])
+        results = [
+            RateLimitResult(
+                tripped == 0, scope.limit, int(reply[2 * i + 1]), int(reply[2 * i + 2]),
+                scope=scope.name, window=scope.window
+            )
+            for i, scope in enumerate(scopes)
+        ]
+        RATE_LIMIT_DECISIONS.labels(source="redis", allowed=str(tripped == 0).lower()).inc()
+
+        if tripped:
+            return results[tripped - 1]
+        return min(results, key=lambda result: result.remaining)
+
+    def start(self):
+        """No background work for the exact limiter"""
+
+    async def stop(self):
+        """No background work for the exact limiter"""
+
+
+class _Lease:
+    """Quota leased by this worker for one key and window"""
+
+    __slots__ = ("redis_key", "window_end", "tokens", "remaining", "last_used", "denied_until")
+
+    def __init__(self, redis_key: str, window_end: float):
+        self.redis_key = redis_key
+        self.window_end = window_end
+        self.tokens = 0
+        self.remaining = 0
+        self.last_used = time.monotonic()
+        self.denied_until = 0.0
+
+
+class LeasedRateLimiter(RedisRateLimiter):
+    """Approximate limiter serving most decisions from locally leased quota
+
+    Each worker leases slices of a window's quota from Redis and spends them
+    locally, so Redis sees roughly one call per slice instead of one per
+    request. Leases are counted in Redis before use, so the global limit is
+    never exceeded; the error is early denial while other workers hold unused
+    slices, bounded by `error_bound` of the limit per worker. Idle leftovers
+    are returned on a timer. Only fixed-window limits are leased; sliding
+    window and GCRA limits are checked in Redis on every request, which is
+    why RATE_LIMIT_ALGORITHM defaults to fixed_window in approximate mode.
+    Multi-scope checks lease their fixed-window scopes and check the rest
+    in one Redis call.
+    """
+
+    def __init__(self, error_bound: float = 0.05, return_interval: float = 1.0):
+        super().__init__()
+        self.error_bound = error_bound
+        self.return_interval = return_interval
+        self._leases: Dict[str, _Lease] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _get_lease_scripts(self):
+        return redis_clients.script(LEASE_SCRIPT), redis_clients.script(RETURN_SCRIPT)
+
+    def slice_size(self, limit: int) -> int:
+        return max(1, int(limit * self.error_bound))
+
+    async def _reserve(self, key: str, limit: int, window: int, now: float) -> Tuple[_Lease, str, int]:
+        """Lease of `key` holding a unit of quota, unless none is left
+
+        Returns the lease, where that was decided and the reset seconds.
+        Nothing is spent; raises if Redis could not be asked.
+        """
+        window_index = int(now // window)
+        window_end = (window_index + 1) * window
+        redis_key = f"{key}:{window_index}"
+
+        lease = self._leases.get(key)
+        if lease is None or lease.redis_key != redis_key:
+            lease = _Lease(redis_key, window_end)
+            self._leases[key] = lease
+        lease.last_used = time.monotonic()
+        reset = max(1, int(window_end - now))
+
+        if lease.tokens > 0 or lease.denied_until > now:
+            return lease, "local", reset
+
+        lease_script, _ = await self._get_lease_scripts()
+        granted, remaining, reset = await redis_breaker.call(
+            lease_script,
+            keys=[redis_key],
+            args=[limit, window, self.slice_size(limit)]
+        )
+        RATE_LIMIT_REDIS_CALLS.labels(op="lease").inc()
+
+        lease.tokens += int(granted)
+        lease.remaining = int(remaining)
+        if lease.tokens <= 0:
+            # Quota may come back from other workers; re-check shortly
+            lease.denied_until = now + min(int(reset), self.return_interval)
+        return lease, "redis", int(reset)
+
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        algorithm: str = "fixed_window"
+    ) -> RateLimitResult:
+        """Count one request against `key`, leasing quota from Redis when needed"""
+        if algorithm != "fixed_window":
+            # Leases are slices of a fixed window; other algorithms stay exact
+            return await super().hit(key, limit, window, algorithm)
+
+        try:
+            lease, source, reset = await self._reserve(key, limit, window, time.time())
+        except Exception as e:
+            self._log_failure(e)
+            return self.fallback.hit(key, limit, window)
+
+        allowed = lease.tokens > 0
+        RATE_LIMIT_DECISIONS.labels(source=source, allowed=str(allowed).lower()).inc()
+        if not allowed:
+            return RateLimitResult(False, limit, 0, reset, window=window)
+        lease.tokens -= 1
+        return RateLimitResult(True, limit, lease.remaining + lease.tokens, reset, window=window)
+
+    async def hit_many(self, scopes: List[RateLimitScope]) -> RateLimitResult:
+        """Count one request against every scope, spending leased quota where possible
+
+        Fixed-window scopes are served from leases; the other scopes go to
+        Redis in one multi-scope call, made only once every leased scope has
+        quota. Leased units are spent only if the whole request is allowed,
+        so as in exact mode a denied request uses no quota.
+        """
+        leased = [scope for scope in scopes if scope.algorithm == "fixed_window"]
+        if not leased:
+            return await super().hit_many(scopes)
+        exact = [scope for scope in scopes if scope.algorithm != "fixed_window"]
+
+        now = time.time()
+        reserved = []
+        decided_by = "local"
+        try:
+            for scope in leased:
+                lease, source, reset = await self._reserve(scope.key, scope.limit, scope.window, now)
+                if lease.tokens <= 0:
+                    RATE_LIMIT_DECISIONS.labels(source=source, allowed="false").inc()
+                    return RateLimitResult(False, scope.limit, 0, reset, scope=scope.name, window=scope.window)
+                reserved.append((scope, lease, reset))
+                if source == "redis":
+                    decided_by = source
+        except Exception as e:
+            self._log_failure(e)
+            return self.fallback.hit_many(scopes)
+
+        if exact:
+            # Counts the decision itself
+            exact_result = await super().hit_many(exact)
+            if not exact_result.allowed:
+                return exact_result
+        else:
+            RATE_LIMIT_DECISIONS.labels(source=decided_by, allowed="true").inc()
+
+        results = []
+        for scope, lease, reset in reserved:
+            lease.tokens -= 1
+            results.append(RateLimitResult(
+                True, scope.limit, lease.remaining + lease.tokens, reset,
+                scope=scope.name, window=scope.window
+            ))
+        if exact:
+            results.append(exact_result)
+        return min(results, key=lambda result: result.remaining)
+
+    def start(self):
+        """Start the leftover-return loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop and hand all leftovers back"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.return_leftovers(idle_for=0)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.return_interval)
+            try:
+                await self.return_leftovers(idle_for=self.return_interval)
+            except Exception as e:
+                logger.error("Rate limit lease return failed", error=str(e))
+
+    async def return_leftovers(self, idle_for: float):
+        """Return quota of idle leases and drop leases of past windows"""
+        now = time.time()
+        idle_before = time.monotonic() - idle_for
+        to_return = []
+
+        for key, lease in list(self._leases.items()):
+            if lease.window_end <= now:
+                del self._leases[key]
+            elif lease.last_used <= idle_before:
+                del self._leases[key]
+                if lease.tokens > 0:
+                    to_return.append(lease)
+
+        if not to_return:
+            return
+
+        _, return_script = await self._get_lease_scripts()
+        client = await get_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            for lease in to_return:
+                await return_script(keys=[lease.redis_key], args=[lease.tokens], client=pipe)
+            await pipe.execute()
+        RATE_LIMIT_REDIS_CALLS.labels(op="return").inc()
+
+
+def create_rate_limiter() -> RedisRateLimiter:
+    """Create the limiter configured by RATE_LIMIT_MODE"""
+    if settings.RATE_LIMIT_MODE == "approximate":
+        if settings.RATE_LIMIT_ALGORITHM != "fixed_window":
+            logger.warning(
+                "Only fixed_window limits are leased; other algorithms stay exact",
+                algorithm=settings.RATE_LIMIT_ALGORITHM
+            )
+        return LeasedRateLimiter(
+            error_bound=settings.RATE_LIMIT_ERROR_BOUND,
+            return_interval=settings.RATE_LIMIT_RETURN_INTERVAL
+        )
+    return RedisRateLimiter()
+
+
+# Global rate limiter instance
+rate_limiter = create_rate_limiter()
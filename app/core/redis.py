@@ -1,165 +1,902 @@
 import redis.asyncio as redis
 from redis.asyncio import Redis
-from typing import Optional, Any
-import json
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Any, Tuple, Union
+from prometheus_client import Counter, Gauge, Histogram
+import asyncio
+import math
+import random
+import time
 import structlog
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.codecs import ValueSerializer
+from app.core.local_cache import LocalCache
+from app.core.near_cache import NearCache
 
 logger = structlog.get_logger()
 
-# Redis connection pool
-redis_pool: Optional[Redis] = None
+# Tags for a cached key, or a function of the loaded value returning them
+CacheTags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+# Metrics
+REDIS_BATCH_SIZE = Histogram(
+    'redis_auto_batch_size',
+    'Commands sent per auto-batched pipeline',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+REDIS_POOL_IN_USE = Gauge('redis_pool_connections_in_use', 'Connections checked out of the pool', ['pool'])
+REDIS_POOL_WAITING = Gauge('redis_pool_waiting', 'Callers waiting for a pooled connection', ['pool'])
+REDIS_POOL_MAX = Gauge('redis_pool_max_connections', 'Pool size limit', ['pool'])
+REDIS_POOL_TIMEOUTS = Counter('redis_pool_timeouts_total', 'Checkouts that gave up waiting', ['pool'])
+REDIS_POOL_WAIT = Histogram(
+    'redis_pool_wait_seconds',
+    'Time spent waiting to check out a connection',
+    ['pool'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+REDIS_COMMAND_LATENCY = Histogram(
+    'redis_command_duration_seconds',
+    'Time a connection was held per command, including the round trip',
+    ['pool', 'command'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+)
+CACHE_GET_OR_SET = Counter(
+    'cache_get_or_set_total',
+    'get_or_set outcomes (hit, miss, early_refresh, coalesced, waited)',
+    ['result']
+)
+CACHE_LOAD_DURATION = Histogram(
+    'cache_load_duration_seconds',
+    'Time spent in get_or_set loaders',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class PoolTimeoutError(redis.ConnectionError):
+    """No pooled connection became free within REDIS_POOL_TIMEOUT"""
+
+
+# Call budgets include the pool checkout wait, so a saturated pool fails with
+# PoolTimeoutError (not counted by the breaker) before the call times out
+CALL_TIMEOUT = settings.REDIS_POOL_TIMEOUT + settings.REDIS_CALL_TIMEOUT
+BULK_CALL_TIMEOUT = settings.REDIS_POOL_TIMEOUT + settings.REDIS_BULK_CALL_TIMEOUT
+
+# Trips on connection errors and timeouts, not on command errors
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.REDIS_BREAKER_RECOVERY_TIMEOUT,
+    call_timeout=CALL_TIMEOUT,
+    failure_exceptions=(redis.ConnectionError, redis.TimeoutError, OSError),
+    ignored_exceptions=(PoolTimeoutError,)
+)
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool exporting saturation, checkout wait and command latency
+    
+    Latency is the time between checkout and release, labelled by the command
+    the connection was checked out for; pipelines (and transactions) are
+    labelled PIPELINE. Pub/sub and dedicated single-connection clients hold
+    their connection for its lifetime and are only counted as in use.
+    """
+    
+    LONG_LIVED = frozenset({"pubsub", "_"})
+    
+    def __init__(self, name: str = "default", **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.in_use = 0
+        self.waiting = 0
+        self._checkouts: Dict[int, Tuple[str, float]] = {}
+        REDIS_POOL_MAX.labels(pool=name).set(self.max_connections)
+    
+    async def get_connection(self, command_name, *keys, **options):
+        self.waiting += 1
+        REDIS_POOL_WAITING.labels(pool=self.name).set(self.waiting)
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+        except redis.ConnectionError as e:
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                REDIS_POOL_TIMEOUTS.labels(pool=self.name).inc()
+                raise PoolTimeoutError(str(e)) from e
+            raise
+        finally:
+            self.waiting -= 1
+            REDIS_POOL_WAITING.labels(pool=self.name).set(self.waiting)
+        
+        checked_out = time.perf_counter()
+        REDIS_POOL_WAIT.labels(pool=self.name).observe(checked_out - started)
+        self.in_use += 1
+        REDIS_POOL_IN_USE.labels(pool=self.name).set(self.in_use)
+        self._checkouts[id(connection)] = (command_name, checked_out)
+        return connection
+    
+    async def release(self, connection):
+        checkout = self._checkouts.pop(id(connection), None)
+        if checkout is not None:
+            command, started = checkout
+            if command not in self.LONG_LIVED:
+                label = "PIPELINE" if command == "MULTI" else str(command).upper()
+                REDIS_COMMAND_LATENCY.labels(pool=self.name, command=label).observe(
+                    time.perf_counter() - started
+                )
+            self.in_use -= 1
+            REDIS_POOL_IN_USE.labels(pool=self.name).set(self.in_use)
+        await super().release(connection)
+
+
+class RedisRegistry:
+    """Process-wide Redis clients, one per reply format, each on its own pool
+    
+    `text` decodes replies to str for general use; `binary` returns raw bytes
+    for the cache. Clients are created on first use and shared by every
+    caller. Like their pools they are bound to the event loop that first used
+    them, so code running its own loop (Celery tasks) calls `close()` before
+    that loop ends. Lua scripts are registered per client through `script()`
+    and dropped with it.
+    """
+    
+    FORMATS = {
+        "text": {"encoding": "utf-8", "decode_responses": True},
+        "binary": {"decode_responses": False},
+    }
+    
+    def __init__(self):
+        self.clients: Dict[str, Redis] = {}
+        self.scripts: Dict[Tuple[str, str], AsyncScript] = {}
+    
+    def client(self, name: str = "text") -> Redis:
+        """Shared client for a reply format"""
+        client = self.clients.get(name)
+        if client is None:
+            pool = InstrumentedConnectionPool.from_url(
+                settings.REDIS_URL,
+                name=name,
+                password=settings.REDIS_PASSWORD,
+                max_connections=settings.REDIS_POOL_SIZE,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+                **self.FORMATS[name]
+            )
+            client = self.clients[name] = Redis(connection_pool=pool)
+        return client
+    
+    def script(self, source: str, name: str = "text") -> AsyncScript:
+        """Script registered on the shared client for a reply format"""
+        script = self.scripts.get((name, source))
+        if script is None:
+            # Script objects call EVALSHA and fall back to EVAL on NOSCRIPT
+            script = self.scripts[(name, source)] = self.client(name).register_script(source)
+        return script
+    
+    async def close(self):
+        """Close every client and disconnect its pool"""
+        # Scripts keep a reference to the client they were registered on
+        self.scripts = {}
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose(close_connection_pool=True)
+
+
+redis_clients = RedisRegistry()
 
 
 async def init_redis():
     """Initialize Redis connection"""
-    global redis_pool
     try:
-        redis_pool = redis.ConnectionPool.from_url(
-            settings.REDIS_URL,
-            password=settings.REDIS_PASSWORD,
-            encoding="utf-8",
-            decode_responses=True,
-            max_connections=20
-        )
-        # Create Redis client
-        client = Redis(connection_pool=redis_pool)
-        # Test connection
-        await client.ping()
+        await redis_clients.client("text").ping()
         logger.info("Redis connection established")
     except Exception as e:
         logger.error("Redis connection failed", error=str(e))
         raise
 
 
+async def close_redis():
+    """Close Redis connections"""
+    await redis_clients.close()
+
+
 async def get_redis() -> Redis:
     """Get Redis client"""
-    if redis_pool is None:
-        await init_redis()
-    return Redis(connection_pool=redis_pool)
+    return redis_clients.client("text")
+
+
+async def get_binary_redis() -> Redis:
+    """Get Redis client returning raw bytes"""
+    return redis_clients.client("binary")
+
+
+class AutoBatcher:
+    """Coalesce single-key commands issued in the same event-loop tick
+    
+    Commands are queued and a flush is scheduled with `call_soon`, so every
+    coroutine that runs before the loop gets back to it adds to the same
+    pipeline. Each caller awaits a future for its own reply.
+    """
+    
+    def __init__(self, get_client, max_batch: int = 512):
+        self._get_client = get_client
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, tuple, asyncio.Future]] = []
+        self._flushing: set = set()
+    
+    def execute(self, command: str, *args) -> "asyncio.Future":
+        """Queue a command and return a future for its reply"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._schedule_flush)
+        self._pending.append((command, args, future))
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+        return future
+    
+    def _schedule_flush(self):
+        if self._pending:
+            batch, self._pending = self._pending, []
+            task = asyncio.ensure_future(self._flush(batch))
+            # Keep a reference so the flush is not garbage collected mid-flight
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+    
+    async def _flush(self, batch: List[Tuple[str, tuple, asyncio.Future]]):
+        REDIS_BATCH_SIZE.observe(len(batch))
+        try:
+            client = await self._get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for command, args, _ in batch:
+                    getattr(pipe, command)(*args)
+                results = await redis_breaker.call_with_timeout(
+                    BULK_CALL_TIMEOUT, pipe.execute, raise_on_error=False
+                )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Read a value with what get_or_set needs to decide on an early refresh.
+# KEYS: value key, load time key
+# Returns {value} or {value, remaining ms, load time ms}
+CACHE_READ_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return {false}
+end
+return {value, redis.call('PTTL', KEYS[1]), redis.call('GET', KEYS[2])}
+"""
+
+# Add a key to tag sets, keeping each set alive as long as its longest-lived key.
+# KEYS: cache key, tag set keys...; ARGV: ttl seconds
+CACHE_TAG_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if redis.call('TTL', KEYS[i]) < ttl then
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+end
+return #KEYS - 1
+"""
+
+# Delete every key in the given tag sets, and the sets.
+# KEYS: tag set keys
+# Returns the deleted cache keys
+CACHE_INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for i = 1, #KEYS do
+    for _, key in ipairs(redis.call('SMEMBERS', KEYS[i])) do
+        redis.call('UNLINK', key, key .. ':load_ms')
+        table.insert(deleted, key)
+    end
+    redis.call('UNLINK', KEYS[i])
+end
+return deleted
+"""
 
 
 class RedisCache:
-    """Redis cache manager"""
+    """Redis cache manager
     
-    def __init__(self):
-        self.redis = None
+    Calls go through the Redis circuit breaker. When a call fails or the
+    circuit is open, reads and writes fall back to a short-lived in-process
+    cache, so a worker keeps serving what it wrote during an outage instead of
+    waiting on Redis for every request. Fallback entries are never written
+    back to Redis.
+    
+    Values are framed by the configured codec (see app.core.codecs) and read
+    over a bytes connection, so they are encoded once and bytes values pass
+    through untouched.
+    
+    With `auto_batch`, concurrent single-key calls share one pipeline per
+    event-loop tick. With a `near_cache`, reads of its key prefixes are served
+    from a per-worker copy; writes made through `pipeline()` are not seen by
+    it unless Redis tracks them (tracking mode).
+    
+    `get_or_set` guards loaders against stampedes: one load per key per
+    worker, one worker at a time via a Redis lock, and hot keys refreshed
+    shortly before they expire.
+    """
+    
+    def __init__(self, auto_batch: bool = False, near_cache: Optional[NearCache] = None):
+        self.near = near_cache
+        self.serializer = ValueSerializer(settings.CACHE_CODEC)
+        self.fallback = LocalCache(
+            "redis_fallback",
+            maxsize=settings.REDIS_FALLBACK_CACHE_SIZE,
+            default_ttl=settings.REDIS_FALLBACK_CACHE_TTL
+        )
+        self.batcher = (
+            AutoBatcher(self._get_client, max_batch=settings.REDIS_AUTO_BATCH_MAX)
+            if auto_batch else None
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     async def _get_client(self) -> Redis:
-        if self.redis is None:
-            self.redis = await get_redis()
-        return self.redis
+        return await get_binary_redis()
+    
+    async def _script(self, source: str) -> AsyncScript:
+        return redis_clients.script(source, "binary")
+    
+    def _decode(self, key: str, value: Optional[bytes]) -> Optional[Any]:
+        if not value:
+            return None
+        try:
+            return self.serializer.loads(value)
+        except Exception as e:
+            logger.error("Cached value could not be decoded", key=key, error=str(e))
+            return None
+    
+    async def _call(self, command: str, *args, timeout: float = CALL_TIMEOUT) -> Any:
+        if self.batcher is not None:
+            return await self.batcher.execute(command, *args)
+        client = await self._get_client()
+        return await redis_breaker.call_with_timeout(timeout, getattr(client, command), *args)
+    
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Pipeline]:
+        """Queue commands on a pipeline and send them in one round trip
+        
+        Commands still queued when the block exits are executed then; call
+        `await pipe.execute()` inside the block to read replies.
+        """
+        client = await self._get_client()
+        async with client.pipeline(transaction=transaction) as pipe:
+            yield pipe
+            if len(pipe):
+                await redis_breaker.call_with_timeout(BULK_CALL_TIMEOUT, pipe.execute)
+    
+    def _log_failure(self, operation: str, key: str, error: Exception):
+        # Open-circuit rejections are expected and counted by the breaker
+        if not isinstance(error, CircuitOpenError):
+            logger.error(f"Redis {operation} failed", key=key, error=str(error))
+    
+    async def _written(self, keys: List[str]):
+        """Invalidate near-cached copies of written keys"""
+        if self.near is None:
+            return
+        try:
+            await self.near.publish(keys)
+        except Exception as e:
+            self._log_failure("invalidation publish", keys[0], e)
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
+        if self.near is not None:
+            hit, value = self.near.lookup(key)
+            if hit:
+                return self._decode(key, value)
+            generation = self.near.generation
         try:
-            client = await self._get_client()
-            value = await client.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            value = await self._call("get", key)
+            if self.near is not None:
+                self.near.store(key, value, generation)
         except Exception as e:
-            logger.error("Redis get failed", key=key, error=str(e))
-            return None
+            self._log_failure("get", key, e)
+            value = self.fallback.get(key)
+        return self._decode(key, value)
     
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         """Set value in cache with expiration"""
+        data = self.serializer.dumps(value)
         try:
-            client = await self._get_client()
-            await client.setex(key, expire, json.dumps(value, default=str))
+            await self._call("setex", key, expire, data)
+            self.fallback.delete(key)
             return True
         except Exception as e:
-            logger.error("Redis set failed", key=key, error=str(e))
+            self._log_failure("set", key, e)
+            self.fallback.set(key, data, min(expire, self.fallback.default_ttl))
             return False
+        finally:
+            await self._written([key])
     
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
+        self.fallback.delete(key)
         try:
-            client = await self._get_client()
-            await client.delete(key)
+            await self._call("delete", key)
             return True
         except Exception as e:
-            logger.error("Redis delete failed", key=key, error=str(e))
+            self._log_failure("delete", key, e)
             return False
+        finally:
+            await self._written([key])
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values in one round trip, omitting missing keys"""
+        keys = list(keys)
+        found = {}
+        if self.near is not None:
+            for key in keys:
+                hit, value = self.near.lookup(key)
+                if hit:
+                    found[key] = value
+            keys = [key for key in keys if key not in found]
+            generation = self.near.generation
+        if keys:
+            try:
+                values = await self._call("mget", keys, timeout=BULK_CALL_TIMEOUT)
+                if self.near is not None:
+                    for key, value in zip(keys, values):
+                        self.near.store(key, value, generation)
+            except Exception as e:
+                self._log_failure("get_many", keys[0], e)
+                values = [self.fallback.get(key) for key in keys]
+            found.update(zip(keys, values))
+        values = {key: self._decode(key, value) for key, value in found.items()}
+        return {key: value for key, value in values.items() if value is not None}
+    
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """Set several values with the same expiration in one round trip"""
+        if not mapping:
+            return True
+        data = {key: self.serializer.dumps(value) for key, value in mapping.items()}
+        try:
+            async with self.pipeline() as pipe:
+                for key, value in data.items():
+                    pipe.setex(key, expire, value)
+            for key in data:
+                self.fallback.delete(key)
+            return True
+        except Exception as e:
+            self._log_failure("set_many", next(iter(data)), e)
+            for key, value in data.items():
+                self.fallback.set(key, value, min(expire, self.fallback.default_ttl))
+            return False
+        finally:
+            await self._written(list(data))
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys in one round trip, returning how many existed"""
+        keys = list(keys)
+        if not keys:
+            return 0
+        for key in keys:
+            self.fallback.delete(key)
+        try:
+            return await self._call("delete", *keys, timeout=BULK_CALL_TIMEOUT)
+        except Exception as e:
+            self._log_failure("delete_many", keys[0], e)
+            return 0
+        finally:
+            await self._written(keys)
+    
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 3600,
+        beta: float = settings.CACHE_EARLY_REFRESH_BETA,
+        tags: CacheTags = ()
+    ) -> Any:
+        """Get a cached value, computing and storing it with `loader` when missing
+        
+        Concurrent misses in this worker share one `loader` call, and a Redis
+        lock lets one worker at a time load a key while the others wait for
+        its result. Before a key expires, reads refresh it early with a
+        probability that grows as expiry nears and with how long `loader`
+        took last time (XFetch); `beta` above 1 refreshes earlier. A `loader`
+        result of None is returned but not cached.
+        
+        `tags` (or a function of the loaded value returning them) registers
+        the key for `invalidate_tags`.
+        """
+        value, _ = await self.get_or_load(key, loader, ttl, beta, tags)
+        return value
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 3600,
+        beta: float = settings.CACHE_EARLY_REFRESH_BETA,
+        tags: CacheTags = ()
+    ) -> Tuple[Any, str]:
+        """`get_or_set`, also returning how this call got the value
+        
+        The outcome is `hit` (cached, possibly stale while another worker
+        refreshes it), `loaded` (this call ran `loader`), `coalesced` (shared
+        another caller's load in this worker) or `waited` (polled for another
+        worker's load).
+        """
+        if self.near is not None:
+            hit, value = self.near.lookup(key)
+            if hit:
+                value = self._decode(key, value)
+                if value is not None:
+                    CACHE_GET_OR_SET.labels(result="hit").inc()
+                    return value, "hit"
+        
+        value, remaining, load_time = await self._read_for_refresh(key)
+        if value is not None:
+            # XFetch: refresh when -load_time * beta * ln(U) reaches the remaining TTL
+            if remaining is None or -load_time * beta * math.log(1.0 - random.random()) < remaining:
+                CACHE_GET_OR_SET.labels(result="hit").inc()
+                return value, "hit"
+            CACHE_GET_OR_SET.labels(result="early_refresh").inc()
+        
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, loader, ttl, tags, stale=value))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            coalesced = False
+        else:
+            CACHE_GET_OR_SET.labels(result="coalesced").inc()
+            coalesced = True
+        # A cancelled caller must not cancel the load others are waiting on
+        value, outcome = await asyncio.shield(future)
+        return value, "coalesced" if coalesced else outcome
+    
+    async def _read_for_refresh(self, key: str) -> Tuple[Any, Optional[float], float]:
+        """Return (value, remaining ms, last load ms) for a key"""
+        try:
+            script = await self._script(CACHE_READ_SCRIPT)
+            if self.near is not None:
+                generation = self.near.generation
+            reply = await redis_breaker.call(script, keys=[key, f"{key}:load_ms"])
+            if self.near is not None:
+                self.near.store(key, reply[0], generation)
+        except Exception as e:
+            self._log_failure("get_or_set", key, e)
+            return self._decode(key, self.fallback.get(key)), None, 0.0
+        
+        value = self._decode(key, reply[0])
+        if value is None or reply[1] < 0:
+            return value, None, 0.0
+        return value, reply[1], float(reply[2] or 0)
+    
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: CacheTags,
+        stale: Any
+    ) -> Tuple[Any, str]:
+        lock = None
+        try:
+            client = await self._get_client()
+            lock = client.lock(f"lock:{key}", timeout=settings.CACHE_LOCK_TIMEOUT, blocking=False)
+            if not await redis_breaker.call(lock.acquire):
+                lock = None
+                # Another worker is loading: serve the current value, or wait for theirs
+                if stale is not None:
+                    return stale, "hit"
+                value = await self._wait_for(key)
+                if value is not None:
+                    CACHE_GET_OR_SET.labels(result="waited").inc()
+                    return value, "waited"
+        except Exception as e:
+            # Without Redis the in-process single-flight still applies
+            lock = None
+            self._log_failure("lock", key, e)
+        
+        try:
+            if stale is None:
+                CACHE_GET_OR_SET.labels(result="miss").inc()
+            started = time.perf_counter()
+            value = await loader()
+            load_time = time.perf_counter() - started
+            CACHE_LOAD_DURATION.observe(load_time)
+            if value is not None:
+                if callable(tags):
+                    tags = tags(value)
+                await self._store_loaded(key, value, ttl, load_time, tags)
+            return value, "loaded"
+        finally:
+            if lock is not None:
+                try:
+                    await lock.release()
+                except Exception as e:
+                    # Expired or unreachable; the lock times out on its own
+                    self._log_failure("unlock", key, e)
+    
+    async def _wait_for(self, key: str) -> Any:
+        """Poll for a value another worker is loading, up to CACHE_LOCK_WAIT"""
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            value = await self.get(key)
+            if value is not None:
+                return value
+        return None
+    
+    async def _store_loaded(self, key: str, value: Any, ttl: int, load_time: float, tags: Iterable[str]):
+        data = self.serializer.dumps(value)
+        tag_keys = [f"tag:{tag}" for tag in tags]
+        try:
+            tag_script = await self._script(CACHE_TAG_SCRIPT) if tag_keys else None
+            async with self.pipeline() as pipe:
+                pipe.setex(key, ttl, data)
+                pipe.setex(f"{key}:load_ms", ttl, round(load_time * 1000, 3))
+                if tag_script is not None:
+                    await tag_script(keys=[key, *tag_keys], args=[ttl], client=pipe)
+            self.fallback.delete(key)
+        except Exception as e:
+            self._log_failure("get_or_set", key, e)
+            self.fallback.set(key, data, min(ttl, self.fallback.default_ttl))
+        finally:
+            await self._written([key])
+    
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Delete every key stored under any of the tags, returning how many"""
+        tag_keys = [f"tag:{tag}" for tag in tags]
+        if not tag_keys:
+            return 0
+        try:
+            script = await self._script(CACHE_INVALIDATE_TAGS_SCRIPT)
+            deleted = await redis_breaker.call_with_timeout(BULK_CALL_TIMEOUT, script, keys=tag_keys)
+        except Exception as e:
+            self._log_failure("invalidate_tags", tag_keys[0], e)
+            return 0
+        
+        keys = [key.decode() for key in deleted]
+        for key in keys:
+            self.fallback.delete(key)
+        if keys:
+            await self._written(keys)
+        return len(keys)
     
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         try:
-            client = await self._get_client()
-            return await client.exists(key) > 0
+            return await self._call("exists", key) > 0
         except Exception as e:
-            logger.error("Redis exists failed", key=key, error=str(e))
-            return False
+            self._log_failure("exists", key, e)
+            return key in self.fallback
     
     async def increment(self, key: str, amount: int = 1) -> int:
         """Increment counter"""
         try:
-            client = await self._get_client()
-            return await client.incrby(key, amount)
+            return await self._call("incrby", key, amount)
         except Exception as e:
-            logger.error("Redis increment failed", key=key, error=str(e))
-            return 0
+            self._log_failure("increment", key, e)
+            value = int(self.fallback.get(key) or 0) + amount
+            self.fallback.set(key, str(value).encode())
+            return value
+        finally:
+            await self._written([key])
     
     async def expire(self, key: str, seconds: int) -> bool:
         """Set expiration for key"""
         try:
-            client = await self._get_client()
-            return await client.expire(key, seconds)
+            return await self._call("expire", key, seconds)
         except Exception as e:
-            logger.error("Redis expire failed", key=key, error=str(e))
-            return False
+            self._log_failure("expire", key, e)
+            value = self.fallback.get(key)
+            if value is None:
+                return False
+            self.fallback.set(key, value, min(seconds, self.fallback.default_ttl))
+            return True
+
+
+# Read a session, extending its TTL once enough of it has elapsed.
+# KEYS: session key; ARGV: ttl ms, refresh below remaining ms, [field]
+# Returns {0} if missing, {2, blob} for a legacy string session, else {1, field value or HGETALL list}
+SESSION_READ_SCRIPT = """
+local kind = redis.call('TYPE', KEYS[1])['ok']
+if kind == 'none' then
+    return {0}
+end
+if kind == 'string' then
+    return {2, redis.call('GET', KEYS[1])}
+end
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+if ARGV[3] then
+    return {1, redis.call('HGET', KEYS[1], ARGV[3])}
+end
+return {1, redis.call('HGETALL', KEYS[1])}
+"""
+
+# Set session fields, extending the TTL once enough of it has elapsed.
+# KEYS: session key; ARGV: ttl ms, refresh below remaining ms, field, value, ...
+# Returns -1 for a legacy string session, else 1
+SESSION_WRITE_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] == 'string' then
+    return -1
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+# Move a session to a new id with a fresh TTL.
+# KEYS: old key, new key; ARGV: ttl ms
+# Returns 1 on success, 0 if the session is missing, -1 if the new id is taken
+SESSION_REGENERATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if redis.call('RENAMENX', KEYS[1], KEYS[2]) == 0 then
+    return -1
+end
+redis.call('PEXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
 
 
 class RedisSession:
-    """Redis session manager"""
+    """Redis session manager
+    
+    Sessions are hashes with one encoded value per field, so single fields
+    are read and written without touching the rest. Reads and writes extend
+    the TTL only once `SESSION_REFRESH_FRACTION` of it has elapsed.
+    """
     
-    def __init__(self, session_id: str, prefix: str = "session"):
+    def __init__(
+        self,
+        session_id: str,
+        prefix: str = "session",
+        ttl: int = settings.SESSION_TTL,
+        redis_cache: Optional[RedisCache] = None
+    ):
         self.session_id = session_id
+        self.prefix = prefix
         self.key = f"{prefix}:{session_id}"
-        self.cache = RedisCache()
+        self.ttl = ttl
+        # Sessions share the global cache's client, codec and breaker
+        self.cache = redis_cache or cache
+    
+    def _ttl_args(self, ttl: Optional[int] = None) -> List[int]:
+        ttl_ms = (ttl or self.ttl) * 1000
+        return [ttl_ms, int(ttl_ms * (1 - settings.SESSION_REFRESH_FRACTION))]
+    
+    async def _script(self, source: str, keys: List[str], args: List[Any]) -> Any:
+        script = await self.cache._script(source)
+        return await redis_breaker.call(script, keys=keys, args=args)
+    
+    def _decode_fields(self, items: List[bytes]) -> dict:
+        data = {}
+        for i in range(0, len(items), 2):
+            field = items[i].decode()
+            data[field] = self.cache._decode(self.key, items[i + 1])
+        return data
+    
+    async def _migrate_legacy(self, blob: bytes) -> dict:
+        """Rewrite a pre-hash JSON session as a hash, keeping its TTL"""
+        data = self.cache._decode(self.key, blob) or {}
+        client = await self.cache._get_client()
+        remaining = await client.ttl(self.key)
+        await self.set_data(data, remaining if remaining > 0 else None)
+        return data
     
     async def get_data(self) -> dict:
         """Get all session data"""
-        data = await self.cache.get(self.key)
-        return data or {}
+        try:
+            reply = await self._script(SESSION_READ_SCRIPT, [self.key], self._ttl_args())
+            if reply[0] == 2:
+                return await self._migrate_legacy(reply[1])
+            if reply[0] == 1:
+                return self._decode_fields(reply[1])
+        except Exception as e:
+            self.cache._log_failure("session read", self.key, e)
+        return {}
     
-    async def set_data(self, data: dict, expire: int = 86400) -> bool:
-        """Set session data with expiration (default 24 hours)"""
-        return await self.cache.set(self.key, data, expire)
+    async def set_data(self, data: dict, expire: Optional[int] = None) -> bool:
+        """Replace session data with expiration (default SESSION_TTL)"""
+        try:
+            async with self.cache.pipeline(transaction=True) as pipe:
+                pipe.delete(self.key)
+                if data:
+                    pipe.hset(self.key, mapping={
+                        field: self.cache.serializer.dumps(value) for field, value in data.items()
+                    })
+                    pipe.expire(self.key, expire or self.ttl)
+            return True
+        except Exception as e:
+            self.cache._log_failure("session write", self.key, e)
+            return False
     
     async def get(self, key: str, default: Any = None) -> Any:
         """Get specific session value"""
-        data = await self.get_data()
-        return data.get(key, default)
+        try:
+            reply = await self._script(SESSION_READ_SCRIPT, [self.key], [*self._ttl_args(), key])
+            if reply[0] == 2:
+                return (await self._migrate_legacy(reply[1])).get(key, default)
+            if reply[0] == 1 and reply[1] is not None:
+                return self.cache._decode(self.key, reply[1])
+        except Exception as e:
+            self.cache._log_failure("session read", self.key, e)
+        return default
     
     async def set(self, key: str, value: Any) -> bool:
         """Set specific session value"""
-        data = await self.get_data()
-        data[key] = value
-        return await self.set_data(data)
+        args = [*self._ttl_args(), key, self.cache.serializer.dumps(value)]
+        try:
+            if await self._script(SESSION_WRITE_SCRIPT, [self.key], args) == -1:
+                data = await self.get_data()
+                data[key] = value
+                return await self.set_data(data)
+            return True
+        except Exception as e:
+            self.cache._log_failure("session write", self.key, e)
+            return False
     
     async def delete(self, key: str) -> bool:
         """Delete specific session key"""
-        data = await self.get_data()
-        if key in data:
-            del data[key]
+        try:
+            client = await self.cache._get_client()
+            await redis_breaker.call(client.hdel, self.key, key)
+            return True
+        except redis.ResponseError:
+            # Legacy string session
+            data = await self.get_data()
+            data.pop(key, None)
             return await self.set_data(data)
-        return True
+        except Exception as e:
+            self.cache._log_failure("session write", self.key, e)
+            return False
     
     async def destroy(self) -> bool:
         """Destroy entire session"""
         return await self.cache.delete(self.key)
     
     async def regenerate(self, new_session_id: str) -> bool:
-        """Regenerate session ID"""
-        data = await self.get_data()
-        await self.destroy()
+        """Atomically move the session to a new ID"""
+        new_key = f"{self.prefix}:{new_session_id}"
+        try:
+            result = await self._script(
+                SESSION_REGENERATE_SCRIPT, [self.key, new_key], self._ttl_args()[:1]
+            )
+        except Exception as e:
+            self.cache._log_failure("session regenerate", self.key, e)
+            return False
+        if result != 1:
+            return False
         self.session_id = new_session_id
-        self.key = f"session:{new_session_id}"
-        return await self.set_data(data)
+        self.key = new_key
+        return True
+
 
+# Global near cache, started with the app
+near_cache = NearCache(
+    get_redis,
+    prefixes=settings.NEAR_CACHE_PREFIXES,
+    maxsize=settings.NEAR_CACHE_SIZE,
+    ttl=settings.NEAR_CACHE_TTL,
+    mode=settings.NEAR_CACHE_MODE
+) if settings.NEAR_CACHE_ENABLED else None
 
 # Global cache instance
-cache = RedisCache()
\ No newline at end of file
+cache = RedisCache(auto_batch=settings.REDIS_AUTO_BATCH, near_cache=near_cache)
\ No newline at end of file
@@ -1,20 +1,20 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-import jwt
-from passlib.context import CryptContext
+from jose import jwt
+import base64
 import secrets
 import hashlib
+import time
 from cryptography.fernet import Fernet
 import structlog
 
 from app.core.config import settings
 from app.core.exceptions import AuthenticationError
+from app.core.hashing import pwd_context, password_hasher
+from app.core.local_cache import LocalCache
 
 logger = structlog.get_logger()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT settings
 ALGORITHM = "HS256"
 
@@ -27,6 +27,11 @@ class SecurityManager:
         self.algorithm = ALGORITHM
         self.access_token_expire = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_expire = settings.REFRESH_TOKEN_EXPIRE_DAYS
+        self.token_cache = LocalCache(
+            "verified_tokens",
+            maxsize=settings.TOKEN_CACHE_SIZE,
+            default_ttl=settings.TOKEN_CACHE_TTL
+        )
     
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
@@ -36,6 +41,14 @@ class SecurityManager:
         """Verify password against hash"""
         return pwd_context.verify(plain_password, hashed_password)
     
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password in the worker pool"""
+        return await password_hasher.hash(password)
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password against hash in the worker pool"""
+        return await password_hasher.verify(plain_password, hashed_password)
+    
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT access token"""
         to_encode = data.copy()
@@ -45,7 +58,7 @@ class SecurityManager:
         else:
             expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire)
         
-        to_encode.update({"exp": expire, "type": "access"})
+        to_encode.update({"exp": expire, "iat": time.time(), "type": "access"})
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
     
@@ -58,7 +71,7 @@ class SecurityManager:
         else:
             expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire)
         
-        to_encode.update({"exp": expire, "type": "refresh"})
+        to_encode.update({"exp": expire, "iat": time.time(), "type": "refresh"})
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
     
@@ -78,6 +91,23 @@ class SecurityManager:
         except jwt.JWTError:
             raise AuthenticationError("Invalid token")
     
+    def verify_token_cached(self, token: str, token_type: str = "access") -> Dict[str, Any]:
+        """Verify token, reusing payloads verified earlier by this worker"""
+        if not settings.TOKEN_CACHE_ENABLED:
+            return self.verify_token(token, token_type)
+        
+        cache_key = (token_type, hashlib.sha256(token.encode()).digest())
+        payload = self.token_cache.get(cache_key)
+        if payload is not None:
+            return payload
+        
+        payload = self.verify_token(token, token_type)
+        
+        # Never keep a payload past the token's own expiry
+        ttl = min(self.token_cache.default_ttl, payload.get("exp", 0) - time.time())
+        self.token_cache.set(cache_key, payload, ttl)
+        return payload
+    
     def generate_secure_token(self, length: int = 32) -> str:
         """Generate cryptographically secure random token"""
         return secrets.token_urlsafe(length)
@@ -97,7 +127,7 @@ class EncryptionManager:
     def __init__(self):
         # Use SECRET_KEY to derive encryption key
         key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-        self.fernet = Fernet(key[:32])  # Fernet needs 32 bytes
+        self.fernet = Fernet(base64.urlsafe_b64encode(key))  # Fernet needs 32 url-safe base64 bytes
     
     def encrypt(self, data: str) -> str:
         """Encrypt sensitive data"""
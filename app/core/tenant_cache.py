@@ -0,0 +1,127 @@
+from typing import Awaitable, Callable, Optional, Tuple
+import asyncio
+import structlog
+
+from app.core.cached import invalidate_tags
+from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.redis import get_redis
+from app.schemas.tenant import TenantSnapshot
+
+logger = structlog.get_logger()
+
+TENANTS_CHANNEL = "tenants:invalidate"
+
+
+class TenantCache:
+    """Per-worker cache of resolved tenants, including unknown identifiers
+
+    Lookups are keyed by (kind, identifier), e.g. ("subdomain", "acme"), and
+    fall through to a loader (the Redis-cached database lookup) on a miss.
+    Identifiers that resolve to no active tenant are remembered in a separate,
+    shorter-lived cache, so floods of unknown hosts neither reach the database
+    nor evict real tenants. Changes are broadcast on a Redis channel; every
+    worker drops the tenant's entries and all negative entries.
+    """
+
+    def __init__(self):
+        self.entries = LocalCache(
+            "tenants",
+            maxsize=settings.TENANT_CACHE_SIZE,
+            default_ttl=settings.TENANT_CACHE_TTL
+        )
+        self.negative = LocalCache(
+            "tenants_negative",
+            maxsize=settings.TENANT_NEGATIVE_CACHE_SIZE,
+            default_ttl=settings.TENANT_NEGATIVE_CACHE_TTL
+        )
+        # Bumped on every invalidation so loads racing a change are not stored
+        self.generation = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def resolve(
+        self,
+        kind: str,
+        identifier: str,
+        loader: Callable[[str], Awaitable[Optional[dict]]]
+    ) -> Optional[TenantSnapshot]:
+        """Get a tenant by identifier, loading its snapshot fields on a miss
+
+        Loader errors propagate and are not cached.
+        """
+        key: Tuple[str, str] = (kind, identifier)
+        tenant = self.entries.get(key)
+        if tenant is not None:
+            return tenant
+        if key in self.negative:
+            return None
+
+        generation = self.generation
+        data = await loader(identifier)
+        tenant = TenantSnapshot(**data) if data else None
+        if generation == self.generation:
+            if tenant is None:
+                self.negative.set(key, True)
+            else:
+                self.entries.set(key, tenant)
+        return tenant
+
+    async def invalidate(self, tenant_id: str):
+        """Drop a changed tenant (suspended, deactivated, renamed, created) everywhere"""
+        tenant_id = str(tenant_id)
+        await invalidate_tags(f"tenant:{tenant_id}")
+        self._apply(tenant_id)
+
+        client = await get_redis()
+        await client.publish(TENANTS_CHANNEL, tenant_id)
+        logger.info("Tenant cache invalidated", tenant_id=tenant_id)
+
+    def _apply(self, tenant_id: str):
+        self.generation += 1
+        for key in [key for key, tenant in self.entries.items() if tenant.id == tenant_id]:
+            self.entries.delete(key)
+        # The change may make a previously unknown identifier resolvable
+        self.negative.clear()
+
+    def start(self):
+        """Start invalidation listener"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop invalidation listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                client = await get_redis()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(TENANTS_CHANNEL)
+                try:
+                    # Changes may have been missed while disconnected
+                    self.generation += 1
+                    self.entries.clear()
+                    self.negative.clear()
+
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._apply(message["data"])
+                finally:
+                    await pubsub.unsubscribe(TENANTS_CHANNEL)
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Tenant cache listener failed", error=str(e))
+                await asyncio.sleep(1)
+
+
+# Global tenant cache
+tenant_cache = TenantCache()
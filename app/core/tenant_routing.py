@@ -0,0 +1,256 @@
+from typing import Dict, Iterable, Optional
+from prometheus_client import Counter, Gauge
+from sqlalchemy.engine import make_url
+import asyncio
+import asyncpg
+import hashlib
+import json
+import time
+import structlog
+
+from app.core.config import settings
+from app.schemas.tenant import TenantRoute
+
+logger = structlog.get_logger()
+
+# Metrics
+TENANT_ROUTES = Gauge('tenant_routing_table_entries', 'Tenants in the routing table')
+TENANT_ROUTING_STALENESS = Gauge(
+    'tenant_routing_table_staleness_seconds',
+    'Seconds since the routing table was last confirmed in sync with Postgres'
+)
+TENANT_ROUTING_RELOADS = Counter('tenant_routing_table_reloads_total', 'Full table loads', ['reason'])
+TENANT_ROUTING_EVENTS = Counter('tenant_routing_table_events_total', 'Tenant change notifications applied', ['op'])
+
+TENANTS_CHANNEL = "tenants_changed"
+
+# Notify listeners of every tenant row change with the fields the table keeps
+TENANTS_TRIGGER_DDL = """
+SELECT pg_advisory_xact_lock(hashtext('tenants_notify'));
+
+CREATE OR REPLACE FUNCTION notify_tenant_change() RETURNS trigger AS $$
+DECLARE
+    rec tenants%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := OLD;
+    ELSE
+        rec := NEW;
+    END IF;
+    PERFORM pg_notify('tenants_changed', json_build_object(
+        'op', TG_OP,
+        'id', rec.id,
+        'subdomain', rec.subdomain,
+        'domain', rec.domain,
+        'plan', rec.plan,
+        'schema_name', rec.schema_name,
+        'routable', TG_OP <> 'DELETE' AND rec.is_active AND NOT coalesce(rec.is_suspended, false)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'tenants_notify' AND tgrelid = 'tenants'::regclass
+    ) THEN
+        CREATE TRIGGER tenants_notify
+            AFTER INSERT OR UPDATE OR DELETE ON tenants
+            FOR EACH ROW EXECUTE FUNCTION notify_tenant_change();
+    END IF;
+END $$;
+"""
+
+ROUTABLE_TENANTS_QUERY = """
+SELECT id::text, subdomain, domain, plan, schema_name
+FROM tenants
+WHERE is_active AND NOT coalesce(is_suspended, false)
+"""
+
+# Count and md5 of the routable rows as the table holds them, ordered by id;
+# TenantRoutingTable.checksum() builds the same string
+ROUTABLE_TENANTS_CHECKSUM = """
+SELECT count(*), md5(coalesce(string_agg(
+    concat_ws('|', id::text, subdomain, coalesce(domain, ''), coalesce(nullif(plan, ''), 'basic'), schema_name),
+    ',' ORDER BY id
+), ''))
+FROM tenants
+WHERE is_active AND NOT coalesce(is_suspended, false)
+"""
+
+
+class TenantRoutingTable:
+    """In-memory map of subdomains, custom domains and IDs to routable tenants
+
+    The table is loaded in full once a dedicated connection is listening on
+    `tenants_changed`, then kept current by notifications from a trigger on
+    the tenants table. Every `verify_interval` seconds a checksum of the
+    routable rows is compared with Postgres, reloading on drift. Lookups are
+    dict reads and `ready` turns true after the first load; the table keeps
+    serving while the listener reconnects, until it has not been confirmed
+    in sync for `max_staleness` seconds (`usable()`).
+    """
+
+    def __init__(self, verify_interval: float = 30, max_staleness: float = 120):
+        self.verify_interval = verify_interval
+        self.max_staleness = max_staleness
+        self.by_id: Dict[str, TenantRoute] = {}
+        self.by_subdomain: Dict[str, TenantRoute] = {}
+        self.by_domain: Dict[str, TenantRoute] = {}
+        self._indexes = {"id": self.by_id, "subdomain": self.by_subdomain, "domain": self.by_domain}
+        self.ready = False
+        self.synced_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def lookup(self, kind: str, identifier: str) -> Optional[TenantRoute]:
+        """Get a routable tenant by "id", "subdomain" or "domain\""""
+        return self._indexes[kind].get(identifier.lower())
+
+    def staleness(self) -> float:
+        """Seconds since the table was last known to match Postgres"""
+        if self.synced_at is None:
+            return float("inf")
+        return time.time() - self.synced_at
+
+    def usable(self) -> bool:
+        """Whether lookups may be served from the table"""
+        return self.ready and self.staleness() <= self.max_staleness
+
+    def checksum(self) -> str:
+        """md5 of the table in the form ROUTABLE_TENANTS_CHECKSUM computes"""
+        rows = (
+            "|".join((route.id, route.subdomain, route.domain or "", route.plan, route.schema_name))
+            for route in (self.by_id[tenant_id] for tenant_id in sorted(self.by_id))
+        )
+        return hashlib.md5(",".join(rows).encode()).hexdigest()
+
+    def _index(self, route: TenantRoute):
+        self.by_id[route.id] = route
+        self.by_subdomain[route.subdomain.lower()] = route
+        if route.domain:
+            self.by_domain[route.domain.lower()] = route
+
+    def _unindex(self, route: TenantRoute):
+        self.by_id.pop(route.id, None)
+        # Only drop names still pointing at this tenant
+        if self.by_subdomain.get(route.subdomain.lower()) is route:
+            del self.by_subdomain[route.subdomain.lower()]
+        if route.domain and self.by_domain.get(route.domain.lower()) is route:
+            del self.by_domain[route.domain.lower()]
+
+    def replace(self, rows: Iterable[tuple]):
+        """Rebuild the table from (id, subdomain, domain, plan, schema_name) rows"""
+        self.by_id.clear()
+        self.by_subdomain.clear()
+        self.by_domain.clear()
+        for tenant_id, subdomain, domain, plan, schema_name in rows:
+            self._index(TenantRoute(tenant_id, subdomain, domain, plan or "basic", schema_name))
+        TENANT_ROUTES.set(len(self.by_id))
+
+    def apply(self, event: dict):
+        """Apply one tenants_changed notification"""
+        old = self.by_id.get(event["id"])
+        if old is not None:
+            self._unindex(old)
+        if event["routable"]:
+            self._index(TenantRoute(
+                event["id"],
+                event["subdomain"],
+                event["domain"],
+                event["plan"] or "basic",
+                event["schema_name"]
+            ))
+        TENANT_ROUTES.set(len(self.by_id))
+        TENANT_ROUTING_EVENTS.labels(op=event["op"].lower()).inc()
+
+    async def load(self, conn: asyncpg.Connection, reason: str):
+        """Load every routable tenant"""
+        started = time.perf_counter()
+        rows = await conn.fetch(ROUTABLE_TENANTS_QUERY)
+        # The whole table is rebuilt between awaits, so lookups never see it half-built
+        self.replace(rows)
+        self.synced_at = time.time()
+        self.ready = True
+        TENANT_ROUTING_RELOADS.labels(reason=reason).inc()
+        logger.info(
+            "Tenant routing table loaded",
+            tenants=len(self.by_id),
+            reason=reason,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+
+    async def _verify(self, conn: asyncpg.Connection):
+        count, checksum = await conn.fetchrow(ROUTABLE_TENANTS_CHECKSUM)
+        if checksum != self.checksum():
+            # Also catches changed rows when the count still matches
+            logger.warning("Tenant routing table drifted", expected=count, actual=len(self.by_id))
+            await self.load(conn, "drift")
+        else:
+            self.synced_at = time.time()
+
+    async def _listen(self, conn: asyncpg.Connection, events: asyncio.Queue):
+        """Apply notifications, verifying the table every `verify_interval` seconds"""
+        last_verified = time.monotonic()
+        while True:
+            timeout = max(0.0, last_verified + self.verify_interval - time.monotonic())
+            try:
+                self.apply(json.loads(await asyncio.wait_for(events.get(), timeout)))
+            except asyncio.TimeoutError:
+                pass
+            # Scheduled by elapsed time, so a steady stream of notifications
+            # cannot put it off; only a verify or load confirms the sync
+            if time.monotonic() - last_verified >= self.verify_interval:
+                await self._verify(conn)
+                last_verified = time.monotonic()
+
+    def start(self):
+        """Start change listener"""
+        if self._task is None:
+            TENANT_ROUTING_STALENESS.set_function(self.staleness)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop change listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        reason = "startup"
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+                try:
+                    async with conn.transaction():
+                        await conn.execute(TENANTS_TRIGGER_DDL)
+
+                    events: asyncio.Queue = asyncio.Queue()
+                    await conn.add_listener(
+                        TENANTS_CHANNEL,
+                        lambda _conn, _pid, _channel, payload: events.put_nowait(payload)
+                    )
+                    # Listen before loading so no change falls in between
+                    await self.load(conn, reason)
+                    reason = "reconnect"
+                    await self._listen(conn, events)
+                finally:
+                    await conn.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Tenant routing listener failed", error=str(e))
+                await asyncio.sleep(1)
+
+
+# Global tenant routing table
+tenant_routes = TenantRoutingTable(
+    verify_interval=settings.TENANT_ROUTING_VERIFY_INTERVAL,
+    max_staleness=settings.TENANT_ROUTING_MAX_STALENESS
+)
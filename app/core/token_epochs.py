@@ -0,0 +1,152 @@
+from typing import Dict, Iterable, Optional, Union
+import asyncio
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+EPOCHS_KEY = "token_epochs"
+EPOCHS_CHANNEL = "token_epochs:updates"
+
+
+class TokenEpochRegistry:
+    """Per-user "tokens valid after" epochs for O(1) access-token revocation
+
+    Every worker holds the full map in memory and keeps it fresh through a
+    Redis pub/sub channel, so request-time checks need no network I/O.
+    Epochs older than the access-token lifetime can no longer reject
+    anything and are pruned.
+    """
+
+    def __init__(self, max_token_age: int):
+        self.max_token_age = max_token_age
+        self._epochs: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, user_id: str, issued_at: Optional[Union[int, float]]) -> bool:
+        """Check whether a token issued at `issued_at` predates the user's epoch"""
+        epoch = self._epochs.get(str(user_id))
+        if epoch is None:
+            return False
+        if issued_at is None:
+            return True
+        return float(issued_at) < epoch
+
+    async def bump(self, user_id: str) -> float:
+        """Invalidate every access token issued to the user so far"""
+        user_id = str(user_id)
+        epoch = time.time()
+        self._epochs[user_id] = epoch
+
+        client = await get_redis()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(EPOCHS_KEY, user_id, repr(epoch))
+            pipe.publish(EPOCHS_CHANNEL, f"{user_id}:{epoch!r}")
+            await pipe.execute()
+
+        logger.info("Token epoch bumped", user_id=user_id)
+        return epoch
+
+    async def bump_many(self, user_ids: Iterable[str]) -> float:
+        """Invalidate every access token issued to the given users so far"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        if not user_ids:
+            return 0
+
+        epoch = time.time()
+        for user_id in user_ids:
+            self._epochs[user_id] = epoch
+
+        client = await get_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(EPOCHS_KEY, mapping={user_id: repr(epoch) for user_id in user_ids})
+            for user_id in user_ids:
+                pipe.publish(EPOCHS_CHANNEL, f"{user_id}:{epoch!r}")
+            await pipe.execute()
+
+        logger.info("Token epochs bumped", count=len(user_ids))
+        return epoch
+
+    async def load(self):
+        """Load all live epochs from Redis and prune stale ones"""
+        client = await get_redis()
+        data = await client.hgetall(EPOCHS_KEY)
+        cutoff = time.time() - self.max_token_age
+
+        epochs = {}
+        stale = []
+        for user_id, value in data.items():
+            epoch = float(value)
+            if epoch < cutoff:
+                stale.append(user_id)
+            else:
+                epochs[user_id] = epoch
+
+        if stale:
+            await client.hdel(EPOCHS_KEY, *stale)
+
+        # Keep updates received while loading if they are newer
+        for user_id, epoch in self._epochs.items():
+            if epoch > epochs.get(user_id, 0):
+                epochs[user_id] = epoch
+        self._epochs = epochs
+        logger.info("Token epochs loaded", count=len(epochs), pruned=len(stale))
+
+    def _prune(self):
+        cutoff = time.time() - self.max_token_age
+        self._epochs = {user_id: epoch for user_id, epoch in self._epochs.items() if epoch >= cutoff}
+
+    def _apply_message(self, data: str):
+        user_id, _, value = data.rpartition(":")
+        epoch = float(value)
+        if epoch > self._epochs.get(user_id, 0):
+            self._epochs[user_id] = epoch
+
+    def start(self):
+        """Start pub/sub listener"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop pub/sub listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                client = await get_redis()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(EPOCHS_CHANNEL)
+                try:
+                    # Subscribe before loading so no update falls in between
+                    await self.load()
+                    last_prune = time.monotonic()
+
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._apply_message(message["data"])
+
+                        if time.monotonic() - last_prune > 60:
+                            self._prune()
+                            last_prune = time.monotonic()
+                finally:
+                    await pubsub.unsubscribe(EPOCHS_CHANNEL)
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Token epoch listener failed", error=str(e))
+                await asyncio.sleep(1)
+
+
+# Global token epoch registry
+token_epochs = TokenEpochRegistry(max_token_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
@@ -0,0 +1,254 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import cast, column, update, values
+from sqlalchemy.orm import InstrumentedAttribute
+import asyncio
+import heapq
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+
+logger = structlog.get_logger()
+
+# Metrics
+TOUCH_PENDING = Gauge('touch_buffer_pending_rows', 'Rows with buffered touch updates')
+TOUCH_FLUSH_BATCH = Histogram(
+    'touch_buffer_flush_batch_size',
+    'Rows written per touch flush statement',
+    ['table'],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+TOUCH_FLUSH_LAG = Histogram(
+    'touch_buffer_flush_lag_seconds',
+    'Age of the oldest buffered touch when it was flushed',
+    ['table']
+)
+TOUCH_UNMATCHED = Counter(
+    'touch_buffer_unmatched_rows_total',
+    'Touches whose row did not exist yet, kept for the next flush or dropped',
+    ['table', 'result']
+)
+TOUCH_DROPPED = Counter(
+    'touch_buffer_dropped_rows_total',
+    'Oldest buffered touches dropped because the buffer hit its hard cap',
+    ['table']
+)
+
+# (table name, key column name, touched column name)
+TouchTarget = Tuple[str, str, str]
+
+
+class TouchBuffer:
+    """Coalesce bookkeeping timestamp updates and flush them in bulk
+
+    Each row keeps only its latest timestamp; a flush writes one
+    UPDATE ... FROM (VALUES ...) statement per table and chunk. Touches of
+    rows that do not exist yet (refresh tokens still in the Redis persist
+    queue) are kept for later flushes for up to `unmatched_max_age` seconds.
+    Failed flushes are retried with exponential backoff up to `max_backoff`
+    seconds, and past `max_buffered` rows the oldest touches are dropped.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        max_pending: int,
+        unmatched_max_age: float = 300,
+        max_backoff: float = 60,
+        max_buffered: Optional[int] = None
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.unmatched_max_age = unmatched_max_age
+        self.max_backoff = max_backoff
+        self.max_buffered = max_buffered or max_pending * 10
+        self._pending: Dict[TouchTarget, Dict[Any, datetime]] = {}
+        self._unmatched_since: Dict[Tuple[TouchTarget, Any], float] = {}
+        self._columns: Dict[TouchTarget, Tuple[InstrumentedAttribute, InstrumentedAttribute]] = {}
+        self._first_touch: Dict[TouchTarget, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def touch(
+        self,
+        key_column: InstrumentedAttribute,
+        key: Any,
+        touched_column: InstrumentedAttribute,
+        at: Optional[datetime] = None
+    ):
+        """Buffer `touched_column = at` for the row where `key_column == key`"""
+        target = (key_column.class_.__table__.name, key_column.key, touched_column.key)
+        self._columns.setdefault(target, (key_column, touched_column))
+        self._buffer(target, key, at or datetime.utcnow())
+
+        pending = self._trim()
+        TOUCH_PENDING.set(pending)
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    def _buffer(self, target: TouchTarget, key: Any, at: datetime):
+        rows = self._pending.setdefault(target, {})
+        self._first_touch.setdefault(target, time.monotonic())
+        if key not in rows or rows[key] < at:
+            rows[key] = at
+
+    def _trim(self) -> int:
+        """Drop the oldest touches past `max_buffered`, returning the pending count"""
+        pending = self.pending_count()
+        if pending <= self.max_buffered:
+            return pending
+
+        # Trim a tenth below the cap so a failing database costs one pass per
+        # burst of touches rather than one per touch
+        excess = pending - self.max_buffered * 9 // 10
+        oldest = heapq.nsmallest(
+            excess,
+            ((at, target, key) for target, rows in self._pending.items() for key, at in rows.items()),
+            key=lambda item: item[0]
+        )
+        for _, target, key in oldest:
+            del self._pending[target][key]
+            self._unmatched_since.pop((target, key), None)
+            TOUCH_DROPPED.labels(table=target[0]).inc()
+        for target in [target for target, rows in self._pending.items() if not rows]:
+            del self._pending[target]
+            self._first_touch.pop(target, None)
+
+        logger.warning("Touch buffer full, dropped oldest touches", dropped=len(oldest))
+        return pending - len(oldest)
+
+    def start(self):
+        """Start background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Touch buffer started", interval=self.interval)
+
+    async def stop(self):
+        """Stop background loop and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        failures = 0
+        while True:
+            if failures:
+                # Back off while flushes fail; a full buffer must not retry sooner
+                await asyncio.sleep(min(self.interval * 2 ** (failures - 1), self.max_backoff))
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.error("Touch buffer flush failed", error=str(e), failures=failures)
+
+    async def flush(self) -> int:
+        """Write all buffered touches, returning the number of rows written"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        first_touch, self._first_touch = self._first_touch, {}
+        TOUCH_PENDING.set(0)
+
+        written = 0
+        unmatched = []
+        try:
+            async with async_session_maker() as session:
+                for target, rows in pending.items():
+                    key_column, touched_column = self._columns[target]
+                    table = key_column.class_.__table__
+                    items = list(rows.items())
+
+                    for start in range(0, len(items), self.batch_size):
+                        chunk = items[start:start + self.batch_size]
+                        data = values(
+                            column("row_key", key_column.type),
+                            column("touched_at", touched_column.type),
+                            name="touched"
+                        ).data(chunk)
+
+                        result = await session.execute(
+                            update(table)
+                            .where(table.c[key_column.key] == cast(data.c.row_key, key_column.type))
+                            .values({touched_column.key: cast(data.c.touched_at, touched_column.type)})
+                            .returning(table.c[key_column.key])
+                        )
+                        matched = set(result.scalars().all())
+                        unmatched.extend((target, key, at) for key, at in chunk if key not in matched)
+                        TOUCH_FLUSH_BATCH.labels(table=table.name).observe(len(chunk))
+                        written += len(matched)
+
+                    TOUCH_FLUSH_LAG.labels(table=table.name).observe(
+                        time.monotonic() - first_touch.get(target, time.monotonic())
+                    )
+
+                await session.commit()
+        except Exception:
+            # Merge the batch back so the next flush retries it, without
+            # waking the loop out of its backoff
+            for target, rows in pending.items():
+                for key, at in rows.items():
+                    self._buffer(target, key, at)
+                self._first_touch[target] = min(
+                    self._first_touch.get(target, time.monotonic()),
+                    first_touch.get(target, time.monotonic())
+                )
+            TOUCH_PENDING.set(self._trim())
+            raise
+
+        self._retain_unmatched(pending, unmatched)
+        logger.debug("Touch buffer flushed", rows=written, unmatched=len(unmatched))
+        return written
+
+    def _retain_unmatched(self, flushed: Dict[TouchTarget, Dict[Any, datetime]], unmatched: list):
+        now = time.monotonic()
+        unmatched_keys = set()
+        for target, key, at in unmatched:
+            unmatched_keys.add((target, key))
+            since = self._unmatched_since.setdefault((target, key), now)
+            if now - since < self.unmatched_max_age:
+                self._buffer(target, key, at)
+                TOUCH_UNMATCHED.labels(table=target[0], result="retained").inc()
+            else:
+                del self._unmatched_since[(target, key)]
+                TOUCH_UNMATCHED.labels(table=target[0], result="dropped").inc()
+
+        # Rows that turned up no longer need tracking
+        if self._unmatched_since:
+            for target, rows in flushed.items():
+                for key in rows:
+                    if (target, key) not in unmatched_keys:
+                        self._unmatched_since.pop((target, key), None)
+        TOUCH_PENDING.set(self._trim())
+
+
+# Global touch buffer instance
+touch_buffer = TouchBuffer(
+    interval=settings.TOUCH_FLUSH_INTERVAL,
+    batch_size=settings.TOUCH_FLUSH_BATCH_SIZE,
+    max_pending=settings.TOUCH_BUFFER_MAX_PENDING,
+    unmatched_max_age=settings.TOUCH_UNMATCHED_MAX_AGE,
+    max_backoff=settings.TOUCH_FLUSH_MAX_BACKOFF,
+    max_buffered=settings.TOUCH_BUFFER_HARD_CAP
+)
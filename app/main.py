@@ -9,8 +9,15 @@ from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_
 
 from app.core.config import settings
 from app.core.database import init_db
-from app.core.redis import init_redis
-from app.core.exceptions import ValidationError, NotFoundError, PermissionError
+from app.core.redis import init_redis, close_redis, near_cache
+from app.core.hashing import password_hasher
+from app.core.write_behind import touch_buffer
+from app.core.token_epochs import token_epochs
+from app.core.rate_limiter import rate_limiter
+from app.core.tenant_cache import tenant_cache
+from app.core.tenant_routing import tenant_routes
+from app.services.token_store import token_persister
+from app.core.exceptions import ValidationError, NotFoundError, AuthorizationError, ServiceUnavailableError
 from app.api.v1.router import api_router
 from app.middleware.tenant import TenantMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
@@ -30,9 +37,30 @@ async def lifespan(app: FastAPI):
     logger.info("Starting FinaiFlow 2.0")
     await init_db()
     await init_redis()
+    touch_buffer.start()
+    token_epochs.start()
+    rate_limiter.start()
+    tenant_cache.start()
+    if settings.TENANT_ROUTING_ENABLED:
+        tenant_routes.start()
+    if near_cache is not None:
+        near_cache.start()
+    if settings.REFRESH_TOKEN_STORE == "redis":
+        token_persister.start()
     yield
     # Shutdown
     logger.info("Shutting down FinaiFlow 2.0")
+    if settings.REFRESH_TOKEN_STORE == "redis":
+        await token_persister.stop()
+    await touch_buffer.stop()
+    await token_epochs.stop()
+    await rate_limiter.stop()
+    await tenant_cache.stop()
+    await tenant_routes.stop()
+    if near_cache is not None:
+        await near_cache.stop()
+    await close_redis()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -93,14 +121,23 @@ async def not_found_exception_handler(request: Request, exc: NotFoundError):
     )
 
 
-@app.exception_handler(PermissionError)
-async def permission_exception_handler(request: Request, exc: PermissionError):
+@app.exception_handler(AuthorizationError)
+async def permission_exception_handler(request: Request, exc: AuthorizationError):
     return JSONResponse(
         status_code=403,
         content={"error": "Permission Denied", "message": str(exc)}
     )
 
 
+@app.exception_handler(ServiceUnavailableError)
+async def service_unavailable_exception_handler(request: Request, exc: ServiceUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service Unavailable", "message": str(exc)},
+        headers={"Retry-After": str(exc.details.get("retry_after", 1))}
+    )
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "FinaiFlow 2.0"}
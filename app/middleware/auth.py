@@ -7,19 +7,22 @@ import structlog
 
 from app.core.database import get_db
 from app.core.security import security
+from app.core.token_epochs import token_epochs
 from app.core.exceptions import AuthenticationError
 from app.models.user import User
+from app.schemas.auth import UserPrincipal
+from app.services.principal_service import principal_cache
 
 logger = structlog.get_logger()
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
+async def get_current_principal(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+) -> UserPrincipal:
+    """Get cached principal snapshot of the current authenticated user"""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,23 +32,26 @@ async def get_current_user(
     
     try:
         # Verify token
-        payload = security.verify_token(credentials.credentials, "access")
+        payload = security.verify_token_cached(credentials.credentials, "access")
         user_id = payload.get("sub")
         
         if not user_id:
             raise AuthenticationError("Invalid token payload")
         
-        # Get user from database
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        # Reject tokens issued before the user's last revocation
+        if token_epochs.is_revoked(user_id, payload.get("iat")):
+            raise AuthenticationError("Token has been revoked")
+        
+        # Get principal from cache, falling back to the database
+        principal = await principal_cache.get(db, user_id)
         
-        if not user or not user.is_active:
+        if not principal or not principal.is_active:
             raise AuthenticationError("User not found or inactive")
         
         # Add user to request state for logging
-        request.state.current_user = user
+        request.state.current_user = principal
         
-        return user
+        return principal
         
     except AuthenticationError:
         raise HTTPException(
@@ -62,6 +68,27 @@ async def get_current_user(
         )
 
 
+async def get_current_user(
+    request: Request,
+    principal: UserPrincipal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get current authenticated user with the full users row"""
+    result = await db.execute(select(User).where(User.id == principal.id))
+    user = result.scalar_one_or_none()
+    
+    if not user or not user.is_active:
+        await principal_cache.invalidate(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    request.state.current_user = user
+    return user
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -75,8 +102,8 @@ async def get_current_active_user(
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_principal)
+) -> UserPrincipal:
     """Get current superuser"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -87,8 +114,8 @@ async def get_current_superuser(
 
 
 async def get_current_tenant_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_principal)
+) -> UserPrincipal:
     """Get current tenant admin"""
     if not (current_user.is_superuser or current_user.is_tenant_admin):
         raise HTTPException(
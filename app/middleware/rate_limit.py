@@ -1,10 +1,11 @@
 from fastapi import Request, HTTPException, status
-import time
 import structlog
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from app.core.redis import cache
 from app.core.config import settings
+from app.core.security import security
+from app.core.rate_limiter import rate_limiter, RateLimitResult, RateLimitScope
+from app.core.rate_limit_policies import policy_table, RateLimitPolicy
 
 logger = structlog.get_logger()
 
@@ -15,8 +16,7 @@ class RateLimitMiddleware:
     def __init__(self, app):
         self.app = app
         self.enabled = settings.RATE_LIMIT_ENABLED
-        self.requests_per_window = settings.RATE_LIMIT_REQUESTS
-        self.window_seconds = settings.RATE_LIMIT_WINDOW
+        self.policies = policy_table
     
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http" and self.enabled:
@@ -28,74 +28,124 @@ class RateLimitMiddleware:
                 return
             
             # Check rate limit
-            if not await self.check_rate_limit(request):
-                response = HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Rate limit exceeded. Please try again later."
-                )
-                
+            policy = self.policies.resolve(self.get_plan(request), request.url.path)
+            claims = self.get_token_claims(request)
+            result = await self.check_rate_limit(request, policy, claims)
+            if result is not None and not result.allowed:
                 # Send rate limit response
                 await send({
                     'type': 'http.response.start',
-                    'status': response.status_code,
+                    'status': status.HTTP_429_TOO_MANY_REQUESTS,
                     'headers': [
                         [b'content-type', b'application/json'],
-                        [b'x-ratelimit-limit', str(self.requests_per_window).encode()],
-                        [b'x-ratelimit-window', str(self.window_seconds).encode()],
+                        [b'x-ratelimit-window', str(result.window).encode()],
+                        *result.headers(),
                     ]
                 })
                 await send({
                     'type': 'http.response.body',
-                    'body': f'{{"detail": "{response.detail}"}}'.encode()
+                    'body': b'{"detail": "Rate limit exceeded. Please try again later."}'
                 })
                 return
         
         await self.app(scope, receive, send)
     
-    async def check_rate_limit(self, request: Request) -> bool:
-        """Check if request is within rate limit"""
+    async def check_rate_limit(
+        self,
+        request: Request,
+        policy: RateLimitPolicy,
+        claims: Optional[Dict[str, Any]] = None
+    ) -> Optional[RateLimitResult]:
+        """Check the request against every applicable scope in one call"""
         try:
             # Get client identifier
-            client_id = self.get_client_identifier(request)
-            
-            # Create rate limit key
-            rate_key = f"rate_limit:{client_id}:{int(time.time() // self.window_seconds)}"
+            client_id = self.get_client_identifier(request, claims)
+            scopes = self.get_scopes(request, policy, client_id, claims)
             
-            # Get current count
-            current_count = await cache.get(rate_key) or 0
+            result = await rate_limiter.hit_many(scopes)
             
-            if current_count >= self.requests_per_window:
+            if not result.allowed:
                 logger.warning(
                     "Rate limit exceeded",
                     client_id=client_id,
-                    current_count=current_count,
-                    limit=self.requests_per_window
+                    scope=result.scope,
+                    plan=policy.plan,
+                    route_class=policy.route_class,
+                    limit=result.limit
                 )
-                return False
-            
-            # Increment counter
-            await cache.increment(rate_key)
-            await cache.expire(rate_key, self.window_seconds)
+                return result
             
             # Add rate limit headers to response (this is a simplified approach)
-            request.state.rate_limit_remaining = self.requests_per_window - current_count - 1
-            request.state.rate_limit_limit = self.requests_per_window
+            request.state.rate_limit_remaining = result.remaining
+            request.state.rate_limit_limit = result.limit
             
-            return True
+            return result
             
         except Exception as e:
             logger.error("Rate limit check failed", error=str(e))
             # Allow request on error to avoid blocking legitimate traffic
-            return True
+            return None
     
-    def get_client_identifier(self, request: Request) -> str:
-        """Get client identifier for rate limiting"""
-        # Priority order: authenticated user > forwarded IP > client IP
+    def get_scopes(
+        self,
+        request: Request,
+        policy: RateLimitPolicy,
+        client_id: str,
+        claims: Optional[Dict[str, Any]]
+    ) -> List[RateLimitScope]:
+        """Build the user/IP, IP, tenant and endpoint scopes for a request"""
+        client = policy.client
+        scopes = [RateLimitScope(
+            client_id.split(":", 1)[0],
+            f"rate_limit:{client_id}:{policy.route_class}",
+            client.limit, client.window, client.algorithm
+        )]
         
-        # Check if user is authenticated
-        if hasattr(request.state, "current_user") and request.state.current_user:
-            return f"user:{request.state.current_user.id}"
+        # Authenticated users are also held to a per-IP ceiling
+        if policy.ip and client_id.startswith("user:"):
+            scopes.append(RateLimitScope(
+                "ip", f"rate_limit:{self.get_client_ip(request)}",
+                policy.ip.limit, policy.ip.window, policy.ip.algorithm
+            ))
+        
+        tenant_id = (claims or {}).get("tenant_id") or getattr(request.state, "tenant_id", None)
+        if policy.tenant and tenant_id:
+            scopes.append(RateLimitScope(
+                "tenant", f"rate_limit:tenant:{tenant_id}",
+                policy.tenant.limit, policy.tenant.window, policy.tenant.algorithm
+            ))
+        
+        if policy.endpoint:
+            scopes.append(RateLimitScope(
+                "endpoint", f"endpoint_rate:{client_id}:{request.url.path}",
+                policy.endpoint.limit, policy.endpoint.window, policy.endpoint.algorithm
+            ))
         
+        return scopes
+    
+    def get_plan(self, request: Request) -> Optional[str]:
+        """Plan of the tenant resolved by TenantMiddleware, if any"""
+        tenant = getattr(request.state, "tenant", None)
+        return tenant.plan if tenant is not None else None
+    
+    def get_token_claims(self, request: Request) -> Optional[Dict[str, Any]]:
+        """Claims of a valid bearer access token, if any
+        
+        The limiter runs before route dependencies, so it verifies the token
+        itself. Verified payloads are cached per worker, making repeat
+        requests a hash and a dict lookup.
+        """
+        authorization = request.headers.get("Authorization")
+        if not authorization or not authorization.startswith("Bearer "):
+            return None
+        try:
+            return security.verify_token_cached(authorization[7:], "access")
+        except Exception:
+            # Invalid tokens are limited by IP; auth rejects them later
+            return None
+    
+    def get_client_ip(self, request: Request) -> str:
+        """Get client IP identifier"""
         # Check for forwarded IP (behind proxy/load balancer)
         forwarded_for = request.headers.get("X-Forwarded-For")
         if forwarded_for:
@@ -104,14 +154,27 @@ class RateLimitMiddleware:
         # Use client IP
         client_ip = request.client.host if request.client else "unknown"
         return f"ip:{client_ip}"
+    
+    def get_client_identifier(self, request: Request, claims: Optional[Dict[str, Any]] = None) -> str:
+        """Get client identifier for rate limiting"""
+        # Priority order: authenticated user > forwarded IP > client IP
+        
+        # Check if user is authenticated
+        if hasattr(request.state, "current_user") and request.state.current_user:
+            return f"user:{request.state.current_user.id}"
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+        
+        return self.get_client_ip(request)
 
 
 class EndpointRateLimiter:
     """Decorator for endpoint-specific rate limiting"""
     
-    def __init__(self, requests: int, window: int):
+    def __init__(self, requests: int, window: int, algorithm: str = settings.RATE_LIMIT_ALGORITHM):
         self.requests = requests
         self.window = window
+        self.algorithm = algorithm
     
     def __call__(self, func):
         async def wrapper(request: Request, *args, **kwargs):
@@ -131,26 +194,22 @@ class EndpointRateLimiter:
             client_id = self.get_client_identifier(request)
             endpoint = request.url.path
             
-            # Create endpoint-specific rate limit key
-            rate_key = f"endpoint_rate:{client_id}:{endpoint}:{int(time.time() // self.window)}"
-            
-            # Get current count
-            current_count = await cache.get(rate_key) or 0
+            result = await rate_limiter.hit(
+                f"endpoint_rate:{client_id}:{endpoint}",
+                self.requests,
+                self.window,
+                self.algorithm
+            )
             
-            if current_count >= self.requests:
+            if not result.allowed:
                 logger.warning(
                     "Endpoint rate limit exceeded",
                     client_id=client_id,
                     endpoint=endpoint,
-                    current_count=current_count,
                     limit=self.requests
                 )
                 return False
             
-            # Increment counter
-            await cache.increment(rate_key)
-            await cache.expire(rate_key, self.window)
-            
             return True
             
         except Exception as e:
@@ -4,8 +4,12 @@ from sqlalchemy import select
 import structlog
 from typing import Optional
 
+from app.core.cached import cached
 from app.core.database import get_db, TenantDB
+from app.core.tenant_cache import tenant_cache
 from app.models.tenant import Tenant
+from app.core.tenant_routing import tenant_routes
+from app.schemas.tenant import TenantDescriptor, TenantSnapshot
 
 logger = structlog.get_logger()
 
@@ -39,8 +43,19 @@ class TenantMiddleware:
     async def resolve_tenant(self, request: Request) -> Optional[dict]:
         """Resolve tenant from request"""
         try:
-            # Method 1: Subdomain-based tenant resolution
             host = request.headers.get("host", "")
+            
+            # Method 0: Custom domain (Tenant.domain), served by the routing table
+            if tenant_routes.usable():
+                tenant = tenant_routes.lookup("domain", host.split(":")[0])
+                if tenant:
+                    return {
+                        "tenant_id": tenant.id,
+                        "tenant": tenant,
+                        "schema_name": tenant.schema_name
+                    }
+            
+            # Method 1: Subdomain-based tenant resolution
             if "." in host:
                 subdomain = host.split(".")[0]
                 if subdomain and subdomain != "www":
@@ -90,48 +105,74 @@ class TenantMiddleware:
             logger.error("Tenant resolution failed", error=str(e))
             return None
     
-    async def get_tenant_by_subdomain(self, subdomain: str) -> Optional[Tenant]:
+    async def get_tenant_by_subdomain(self, subdomain: str) -> Optional[TenantDescriptor]:
         """Get tenant by subdomain"""
+        if tenant_routes.usable():
+            return tenant_routes.lookup("subdomain", subdomain)
         try:
-            # This would typically use dependency injection, but for middleware
-            # we need to create our own session
-            from app.core.database import async_session_maker
-            
-            async with async_session_maker() as session:
-                result = await session.execute(
-                    select(Tenant).where(
-                        Tenant.subdomain == subdomain,
-                        Tenant.is_active == True,
-                        Tenant.is_suspended == False
-                    )
-                )
-                return result.scalar_one_or_none()
-                
+            return await tenant_cache.resolve("subdomain", subdomain, self._load_tenant_by_subdomain)
         except Exception as e:
             logger.error("Failed to get tenant by subdomain", subdomain=subdomain, error=str(e))
             return None
     
-    async def get_tenant_by_id(self, tenant_id: str) -> Optional[Tenant]:
+    async def get_tenant_by_id(self, tenant_id: str) -> Optional[TenantDescriptor]:
         """Get tenant by ID"""
+        if tenant_routes.usable():
+            return tenant_routes.lookup("id", tenant_id)
         try:
-            from app.core.database import async_session_maker
-            
-            async with async_session_maker() as session:
-                result = await session.execute(
-                    select(Tenant).where(
-                        Tenant.id == tenant_id,
-                        Tenant.is_active == True,
-                        Tenant.is_suspended == False
-                    )
-                )
-                return result.scalar_one_or_none()
-                
+            return await tenant_cache.resolve("id", tenant_id, self._load_tenant_by_id)
         except Exception as e:
             logger.error("Failed to get tenant by ID", tenant_id=tenant_id, error=str(e))
             return None
+    
+    @cached(ttl=300, key="tenant_by_subdomain:{subdomain}", tags=["tenant:{result[id]}"])
+    async def _load_tenant_by_subdomain(self, subdomain: str) -> Optional[dict]:
+        # This would typically use dependency injection, but for middleware
+        # we need to create our own session
+        from app.core.database import async_session_maker
+        
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Tenant).where(
+                    Tenant.subdomain == subdomain,
+                    Tenant.is_active == True,
+                    Tenant.is_suspended == False
+                )
+            )
+            return self._snapshot(result.scalar_one_or_none())
+    
+    @cached(ttl=300, key="tenant_by_id:{tenant_id}", tags=["tenant:{result[id]}"])
+    async def _load_tenant_by_id(self, tenant_id: str) -> Optional[dict]:
+        from app.core.database import async_session_maker
+        
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Tenant).where(
+                    Tenant.id == tenant_id,
+                    Tenant.is_active == True,
+                    Tenant.is_suspended == False
+                )
+            )
+            return self._snapshot(result.scalar_one_or_none())
+    
+    @staticmethod
+    def _snapshot(tenant: Optional[Tenant]) -> Optional[dict]:
+        if tenant is None:
+            return None
+        return TenantSnapshot(
+            id=str(tenant.id),
+            name=tenant.name,
+            subdomain=tenant.subdomain,
+            domain=tenant.domain,
+            plan=tenant.plan or "basic",
+            schema_name=tenant.schema_name,
+            settings=tenant.settings or {},
+            max_users=tenant.max_users,
+            max_storage_mb=tenant.max_storage_mb
+        ).model_dump()
 
 
-async def get_current_tenant(request: Request) -> Optional[Tenant]:
+async def get_current_tenant(request: Request) -> Optional[TenantDescriptor]:
     """Get current tenant from request state"""
     return getattr(request.state, "tenant", None)
 
@@ -139,4 +180,4 @@ async def get_current_tenant(request: Request) -> Optional[Tenant]:
 async def get_tenant_db(request: Request) -> TenantDB:
     """Get tenant-specific database connection"""
     tenant_id = getattr(request.state, "tenant_id", "default")
-    return TenantDB(tenant_id)
\ No newline at end of file
+    return TenantDB(tenant_id, getattr(request.state, "schema_name", None))
\ No newline at end of file
@@ -15,8 +15,14 @@ class BaseModel(Base):
         return cls.__name__.lower()
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    created_at = Column(DateTime, default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    # Naive UTC, like the datetime.utcnow() values the app writes
+    created_at = Column(DateTime, default=func.timezone("utc", func.now()), nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=func.timezone("utc", func.now()),
+        onupdate=func.timezone("utc", func.now()),
+        nullable=False
+    )
     is_active = Column(Boolean, default=True, nullable=False)
     
     def to_dict(self):
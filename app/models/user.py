@@ -1,12 +1,10 @@
 from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
-from passlib.context import CryptContext
 
+from app.core.hashing import pwd_context, password_hasher
 from .base import BaseModel
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class User(BaseModel):
     __tablename__ = "users"
@@ -57,6 +55,16 @@ class User(BaseModel):
         """Set user password hash"""
         self.hashed_password = pwd_context.hash(password)
     
+    async def verify_password_async(self, password: str) -> bool:
+        """Verify user password without blocking the event loop"""
+        if not self.hashed_password:
+            return False
+        return await password_hasher.verify(password, self.hashed_password)
+    
+    async def set_password_async(self, password: str):
+        """Set user password hash without blocking the event loop"""
+        self.hashed_password = await password_hasher.hash(password)
+    
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
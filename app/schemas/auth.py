@@ -96,6 +96,25 @@ class UserProfile(BaseModel):
         from_attributes = True
 
 
+class UserPrincipal(BaseModel):
+    """Cached snapshot of the user fields needed to authorize a request"""
+    id: str
+    tenant_id: str
+    email: str
+    is_active: bool
+    is_superuser: bool = False
+    is_tenant_admin: bool = False
+    is_email_verified: bool = False
+
+
+class UserContact(BaseModel):
+    """Cached user fields needed to email a sign-in link"""
+    id: str
+    email: str
+    first_name: str
+    is_active: bool
+
+
 class SessionInfo(BaseModel):
     session_id: str
     user_id: str
@@ -103,4 +122,29 @@ class SessionInfo(BaseModel):
     user_agent: Optional[str] = None
     created_at: datetime
     last_activity: datetime
-    is_current: bool = False
\ No newline at end of file
+    is_current: bool = False
+
+
+class BulkRevokeRequest(BaseModel):
+    user_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None  # substring match
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    revoke_access_tokens: bool = True
+    background: bool = False
+    
+    @validator('created_before', always=True)
+    def validate_filters(cls, v, values):
+        filters = ('user_id', 'tenant_id', 'ip_address', 'user_agent', 'created_after')
+        if v is None and not any(values.get(f) for f in filters):
+            raise ValueError('At least one filter is required')
+        return v
+
+
+class BulkRevokeResponse(BaseModel):
+    revoked_count: int = 0
+    users_affected: int = 0
+    task_id: Optional[str] = None
+    status: str = "completed"
@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+
+class TenantSnapshot(BaseModel):
+    """Cached tenant fields needed to route, scope and rate limit a request"""
+    id: str
+    name: str
+    subdomain: str
+    domain: Optional[str] = None
+    plan: str = "basic"
+    schema_name: str
+    settings: Dict[str, Any] = {}
+    max_users: int = 10
+    max_storage_mb: int = 1000
+
+
+class TenantRoute(NamedTuple):
+    """Compact tenant descriptor held by the in-memory routing table"""
+    id: str
+    subdomain: str
+    domain: Optional[str]
+    plan: str
+    schema_name: str
+
+
+class TenantProvisionResult(BaseModel):
+    """Outcome and timings of provisioning one tenant schema"""
+    tenant_id: str
+    schema_name: str
+    status: str  # created, exists, failed
+    wait_ms: float = 0.0  # Queued for a connection slot
+    duration_ms: float = 0.0  # Cloning the template
+    error: Optional[str] = None
+
+
+# What TenantMiddleware puts on request.state.tenant; both expose
+# id, subdomain, domain, plan and schema_name
+TenantDescriptor = Union[TenantSnapshot, TenantRoute]
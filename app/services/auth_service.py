@@ -1,33 +1,143 @@
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Dict, Any
+from contextlib import contextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from prometheus_client import Histogram
 import secrets
+import time
 import structlog
 
 from app.core.security import security, audit_logger
 from app.core.redis import cache, RedisSession
+from app.core.token_epochs import token_epochs
 from app.core.exceptions import AuthenticationError, ValidationError
 from app.models.user import User
-from app.models.auth import AuthToken, AuditLog
+from app.models.auth import AuditLog
 from app.schemas.auth import TokenResponse, LoginRequest
+from app.services.login_attempts import login_attempts
+from app.services.principal_service import principal_cache
+from app.services.token_store import RefreshTokenRecord, get_token_store
 
 logger = structlog.get_logger()
 
+# Metrics
+LOGIN_STAGE_DURATION = Histogram('login_stage_duration_seconds', 'Login pipeline stage duration', ['stage'])
+
+
+class StageTimer:
+    """Collect per-stage wall-clock timings"""
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            self.timings[name] = duration
+            LOGIN_STAGE_DURATION.labels(stage=name).observe(duration)
+
+
+class LoginResult:
+    """Outcome of the consolidated login pipeline"""
+    
+    def __init__(
+        self,
+        user: User,
+        tokens: Optional[TokenResponse],
+        requires_2fa: bool,
+        timings: Dict[str, float]
+    ):
+        self.user = user
+        self.tokens = tokens
+        self.requires_2fa = requires_2fa
+        self.timings = timings
+    
+    @property
+    def server_timing(self) -> str:
+        """Timings formatted as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in self.timings.items())
+
 
 class AuthService:
     """Authentication service with enterprise features"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.token_store = get_token_store(db)
     
     async def authenticate_user(self, email: str, password: str, ip_address: str, user_agent: str) -> User:
         """Authenticate user with security checks"""
-        # Get user
-        result = await self.db.execute(select(User).where(User.email == email))
-        user = result.scalar_one_or_none()
+        await self._check_lockout(email, ip_address, user_agent)
+        user = await self._load_user(email)
+        await self._check_credentials(user, email, password, ip_address, user_agent)
+        await self.db.commit()
+        return user
+    
+    async def login(self, email: str, password: str, ip_address: str, user_agent: str) -> "LoginResult":
+        """Authenticate and issue tokens with one user query and a single commit"""
+        timer = StageTimer()
         
+        with timer.stage("check_lockout"):
+            await self._check_lockout(email, ip_address, user_agent)
+        
+        with timer.stage("load_user"):
+            user = await self._load_user(email, with_two_factor=True)
+        
+        with timer.stage("verify_credentials"):
+            await self._check_credentials(user, email, password, ip_address, user_agent)
+        
+        # 2FA state comes from the eagerly loaded relationship
+        requires_2fa = bool(user.two_factor_auth and user.two_factor_auth.is_enabled)
+        
+        tokens = None
+        if not requires_2fa:
+            with timer.stage("issue_tokens"):
+                tokens = await self.create_tokens(user, ip_address, user_agent, commit=False)
+        
+        with timer.stage("commit"):
+            await self.db.commit()
+        
+        return LoginResult(user=user, tokens=tokens, requires_2fa=requires_2fa, timings=timer.timings)
+    
+    async def _load_user(self, email: str, with_two_factor: bool = False) -> Optional[User]:
+        """Load user by email, optionally with its 2FA settings in the same query"""
+        query = select(User).where(User.email == email)
+        if with_two_factor:
+            query = query.options(joinedload(User.two_factor_auth))
+        result = await self.db.execute(query)
+        return result.unique().scalar_one_or_none()
+    
+    async def _check_lockout(self, email: str, ip_address: str, user_agent: str):
+        """Reject locked accounts and IPs before touching the users table"""
+        lockout = await login_attempts.get_lockout(email, ip_address)
+        if lockout:
+            scope, retry_after = lockout
+            audit_logger.log_auth_event(
+                "login_blocked",
+                ip_address=ip_address,
+                user_agent=user_agent,
+                success=False,
+                details={"reason": f"{scope}_locked", "email": email, "retry_after": retry_after}
+            )
+            raise AuthenticationError("Account is temporarily locked")
+    
+    async def _check_credentials(
+        self,
+        user: Optional[User],
+        email: str,
+        password: str,
+        ip_address: str,
+        user_agent: str
+    ):
+        """Run lockout and password checks; successful resets are left for the caller to commit"""
         if not user:
+            await login_attempts.record_failure(email, ip_address)
             audit_logger.log_auth_event(
                 "login_failed", 
                 ip_address=ip_address,
@@ -50,31 +160,32 @@ class AuthService:
             raise AuthenticationError("Account is temporarily locked")
         
         # Verify password
-        if not user.verify_password(password):
-            # Increment failed attempts
-            user.failed_login_attempts += 1
+        if not await user.verify_password_async(password):
+            # Count failures in Redis; persist only when a lock triggers
+            failed_attempts, account_locked, _ = await login_attempts.record_failure(email, ip_address)
             
-            # Lock account after 5 failed attempts
-            if user.failed_login_attempts >= 5:
-                user.locked_until = datetime.utcnow() + timedelta(minutes=30)
+            if account_locked:
+                user.failed_login_attempts = failed_attempts
+                user.locked_until = datetime.utcnow() + timedelta(seconds=login_attempts.lockout_seconds)
+                await self.db.commit()
                 logger.warning("Account locked due to failed attempts", user_id=str(user.id))
             
-            await self.db.commit()
-            
             audit_logger.log_auth_event(
                 "login_failed",
                 user_id=str(user.id),
                 ip_address=ip_address,
                 user_agent=user_agent,
                 success=False,
-                details={"reason": "invalid_password", "failed_attempts": user.failed_login_attempts}
+                details={"reason": "invalid_password", "failed_attempts": failed_attempts}
             )
             raise AuthenticationError("Invalid credentials")
         
-        # Reset failed attempts on successful login
-        user.failed_login_attempts = 0
-        user.locked_until = None
-        await self.db.commit()
+        await login_attempts.record_success(email)
+        
+        # Clear a persisted lock once it has run out, writing only when needed
+        if user.failed_login_attempts or user.locked_until:
+            user.failed_login_attempts = 0
+            user.locked_until = None
         
         audit_logger.log_auth_event(
             "login_success",
@@ -83,10 +194,8 @@ class AuthService:
             user_agent=user_agent,
             success=True
         )
-        
-        return user
     
-    async def create_tokens(self, user: User, ip_address: str, user_agent: str) -> TokenResponse:
+    async def create_tokens(self, user: User, ip_address: str, user_agent: str, commit: bool = True) -> TokenResponse:
         """Create access and refresh tokens"""
         # Token payload
         token_data = {
@@ -101,19 +210,14 @@ class AuthService:
         access_token = security.create_access_token(token_data)
         refresh_token = security.create_refresh_token({"sub": str(user.id)})
         
-        # Store refresh token in database
-        refresh_token_hash = security.hash_token(refresh_token)
-        db_token = AuthToken(
-            token_type="refresh",
-            token_hash=refresh_token_hash,
+        # Store refresh token
+        await self.token_store.save(RefreshTokenRecord(
+            token_hash=security.hash_token(refresh_token),
+            user_id=str(user.id),
             expires_at=datetime.utcnow() + timedelta(days=security.refresh_token_expire),
-            user_id=user.id,
             ip_address=ip_address,
             user_agent=user_agent
-        )
-        
-        self.db.add(db_token)
-        await self.db.commit()
+        ), commit=commit)
         
         return TokenResponse(
             access_token=access_token,
@@ -134,28 +238,19 @@ class AuthService:
             
             # Check if refresh token exists and is valid
             refresh_token_hash = security.hash_token(refresh_token)
-            result = await self.db.execute(
-                select(AuthToken).where(
-                    AuthToken.token_hash == refresh_token_hash,
-                    AuthToken.token_type == "refresh",
-                    AuthToken.is_revoked == False
-                )
-            )
-            db_token = result.scalar_one_or_none()
+            record = await self.token_store.get(refresh_token_hash)
             
-            if not db_token or db_token.is_expired:
+            if not record or not record.is_valid or record.user_id != str(user_id):
                 raise AuthenticationError("Invalid or expired refresh token")
             
             # Get user
-            result = await self.db.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
+            user = await principal_cache.get(self.db, user_id)
             
             if not user or not user.is_active:
                 raise AuthenticationError("User not found or inactive")
             
             # Update token last used
-            db_token.last_used_at = datetime.utcnow()
-            await self.db.commit()
+            await self.token_store.touch(record)
             
             # Create new access token
             token_data = {
@@ -195,19 +290,9 @@ class AuthService:
         """Revoke refresh token"""
         try:
             refresh_token_hash = security.hash_token(refresh_token)
-            result = await self.db.execute(
-                select(AuthToken).where(
-                    AuthToken.token_hash == refresh_token_hash,
-                    AuthToken.user_id == user_id,
-                    AuthToken.token_type == "refresh"
-                )
-            )
-            db_token = result.scalar_one_or_none()
+            revoked = await self.token_store.revoke(refresh_token_hash, user_id)
             
-            if db_token:
-                db_token.is_revoked = True
-                await self.db.commit()
-                
+            if revoked:
                 audit_logger.log_auth_event(
                     "token_revoked",
                     user_id=user_id,
@@ -224,21 +309,10 @@ class AuthService:
     async def revoke_all_user_tokens(self, user_id: str) -> int:
         """Revoke all refresh tokens for a user"""
         try:
-            result = await self.db.execute(
-                select(AuthToken).where(
-                    AuthToken.user_id == user_id,
-                    AuthToken.token_type == "refresh",
-                    AuthToken.is_revoked == False
-                )
-            )
-            tokens = result.scalars().all()
-            
-            count = 0
-            for token in tokens:
-                token.is_revoked = True
-                count += 1
+            count = await self.token_store.revoke_all(user_id)
             
-            await self.db.commit()
+            # Invalidate outstanding access tokens as well
+            await token_epochs.bump(user_id)
             
             audit_logger.log_auth_event(
                 "all_tokens_revoked",
@@ -0,0 +1,137 @@
+from typing import Optional, Tuple
+import secrets
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import RateLimiter
+
+logger = structlog.get_logger()
+
+# Record one failure in the account and IP sliding windows and lock any scope over its limit.
+# KEYS: account window, IP window, account lock, IP lock
+# ARGV: now_ms, window_ms, account_limit, ip_limit, lockout_ms, member
+RECORD_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local lockout = tonumber(ARGV[5])
+local result = {}
+for i = 1, 2 do
+    local key = KEYS[i]
+    redis.call('ZADD', key, now, ARGV[6])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    redis.call('PEXPIRE', key, window)
+    local count = redis.call('ZCARD', key)
+    local newly_locked = 0
+    if count >= tonumber(ARGV[2 + i]) then
+        if redis.call('SET', KEYS[2 + i], now, 'PX', lockout, 'NX') then
+            newly_locked = 1
+        end
+    end
+    result[#result + 1] = count
+    result[#result + 1] = newly_locked
+end
+return result
+"""
+
+
+class LoginAttemptTracker:
+    """Sliding-window failed-login counters and lockouts held in Redis
+
+    Failures are counted per account (normalized email, so unknown accounts
+    are covered too) and per client IP. The users table is only written when
+    an account lock actually triggers.
+    """
+
+    def __init__(
+        self,
+        account_limit: int,
+        ip_limit: int,
+        window_seconds: int,
+        lockout_seconds: int
+    ):
+        self.account_limit = account_limit
+        self.ip_limit = ip_limit
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+
+    @staticmethod
+    def _account(email: str) -> str:
+        return f"account:{email.strip().lower()}"
+
+    @staticmethod
+    def _ip(ip_address: str) -> str:
+        return f"ip:{ip_address}"
+
+    @staticmethod
+    def _failures_key(identifier: str) -> str:
+        return f"login_failures:{identifier}"
+
+    async def get_lockout(self, email: str, ip_address: str) -> Optional[Tuple[str, int]]:
+        """Return (scope, seconds remaining) if the account or IP is locked"""
+        try:
+            client = await get_redis()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.pttl(RateLimiter.get_lockout_key(self._account(email)))
+                pipe.pttl(RateLimiter.get_lockout_key(self._ip(ip_address)))
+                account_ttl, ip_ttl = await pipe.execute()
+        except Exception as e:
+            logger.error("Lockout check failed", error=str(e))
+            return None
+
+        if account_ttl > 0:
+            return "account", max(1, account_ttl // 1000)
+        if ip_ttl > 0:
+            return "ip", max(1, ip_ttl // 1000)
+        return None
+
+    async def record_failure(self, email: str, ip_address: str) -> Tuple[int, bool, bool]:
+        """Record failed attempt, returning (account failures, account locked now, IP locked now)"""
+        account = self._account(email)
+        ip = self._ip(ip_address)
+        now_ms = int(time.time() * 1000)
+
+        try:
+            client = await get_redis()
+            script = client.register_script(RECORD_FAILURE_SCRIPT)
+            account_count, account_locked, ip_count, ip_locked = await script(
+                keys=[
+                    self._failures_key(account),
+                    self._failures_key(ip),
+                    RateLimiter.get_lockout_key(account),
+                    RateLimiter.get_lockout_key(ip)
+                ],
+                args=[
+                    now_ms,
+                    self.window_seconds * 1000,
+                    self.account_limit,
+                    self.ip_limit,
+                    self.lockout_seconds * 1000,
+                    f"{now_ms}:{secrets.token_hex(4)}"
+                ]
+            )
+        except Exception as e:
+            logger.error("Failed login tracking failed", error=str(e))
+            return 0, False, False
+
+        if ip_locked:
+            logger.warning("IP locked due to failed attempts", ip_address=ip_address, failures=ip_count)
+        return int(account_count), bool(account_locked), bool(ip_locked)
+
+    async def record_success(self, email: str):
+        """Clear the account failure window after a successful login"""
+        try:
+            client = await get_redis()
+            await client.delete(self._failures_key(self._account(email)))
+        except Exception as e:
+            logger.error("Failed login reset failed", error=str(e))
+
+
+# Global login attempt tracker
+login_attempts = LoginAttemptTracker(
+    account_limit=settings.LOGIN_MAX_FAILURES_PER_ACCOUNT,
+    ip_limit=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window_seconds=settings.LOGIN_FAILURE_WINDOW,
+    lockout_seconds=settings.LOGIN_LOCKOUT_DURATION
+)
@@ -5,10 +5,16 @@ from sqlalchemy import select, update
 import secrets
 import structlog
 
+from app.core.cached import cached
+from app.core.database import async_session_maker
 from app.core.security import security
 from app.core.redis import cache
-from app.core.exceptions import ValidationError, AuthenticationError
+from app.core.token_epochs import token_epochs
+from app.core.exceptions import ValidationError, AuthenticationError, ServiceUnavailableError
 from app.models.user import User
+from app.schemas.auth import UserContact
+from app.services.principal_service import principal_cache
+from app.services.token_store import get_token_store
 from app.tasks.email import send_email
 
 logger = structlog.get_logger()
@@ -37,8 +43,7 @@ class PasswordlessService:
             await cache.set(rate_key, current_requests + 1, self.rate_limit_window)
             
             # Check if user exists
-            result = await self.db.execute(select(User).where(User.email == email))
-            user = result.scalar_one_or_none()
+            user = await self.get_user_contact(email)
             
             if not user:
                 # For security, don't reveal if user exists
@@ -110,6 +115,28 @@ class PasswordlessService:
             logger.error("Magic link request failed", email=email, error=str(e))
             raise ValidationError("Failed to send magic link")
     
+    async def get_user_contact(self, email: str) -> Optional[UserContact]:
+        """Get contact fields of the user with this email"""
+        data = await self._load_user_contact(email)
+        return UserContact(**data) if data else None
+    
+    @cached(ttl=300, key="user_contact:{email}", tags=["user:{result[id]}"])
+    async def _load_user_contact(self, email: str) -> Optional[dict]:
+        # Shared by concurrent callers, so not run on any one request's session
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(User.id, User.email, User.first_name, User.is_active).where(User.email == email)
+            )
+            row = result.one_or_none()
+        if row is None:
+            return None
+        return {
+            "id": str(row.id),
+            "email": row.email,
+            "first_name": row.first_name,
+            "is_active": bool(row.is_active)
+        }
+    
     async def verify_magic_link(self, token: str, ip_address: str) -> Optional[User]:
         """Verify magic link token and return user"""
         try:
@@ -339,11 +366,17 @@ class PasswordlessService:
                 raise ValidationError("User not found")
             
             # Update password
-            user.set_password(new_password)
+            await user.set_password_async(new_password)
             user.password_reset_token = None
             user.password_reset_expires = None
             
             await self.db.commit()
+            await principal_cache.invalidate(str(user.id))
+            
+            # Revoke refresh tokens before bumping the epoch, so none can mint
+            # an access token that postdates it
+            await get_token_store(self.db).revoke_all(str(user.id))
+            await token_epochs.bump(str(user.id))
             
             # Delete token
             await cache.delete(token_key)
@@ -351,6 +384,8 @@ class PasswordlessService:
             logger.info("Password reset completed", user_id=str(user.id))
             return True
             
+        except ServiceUnavailableError:
+            raise
         except Exception as e:
             logger.error("Password reset verification failed", error=str(e))
             raise ValidationError("Password reset failed")
\ No newline at end of file
@@ -0,0 +1,112 @@
+from typing import Optional
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import structlog
+
+from app.core.cached import invalidate_tags
+from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.redis import cache
+from app.models.user import User
+from app.schemas.auth import UserPrincipal
+
+logger = structlog.get_logger()
+
+
+class PrincipalCache:
+    """Two-tier (worker-local + Redis) cache of user principal snapshots
+
+    Invalidation bumps a per-user version in Redis (and a per-worker
+    generation); a snapshot loaded across an invalidation is returned but
+    not stored, so it cannot outlive the change it missed.
+    """
+
+    def __init__(self, prefix: str = "principal"):
+        self.prefix = prefix
+        self.local = LocalCache(
+            "user_principals",
+            maxsize=settings.PRINCIPAL_CACHE_SIZE,
+            default_ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL
+        )
+        self.ttl = settings.PRINCIPAL_CACHE_TTL
+        self.generation = 0
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.prefix}_version:{user_id}"
+
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[UserPrincipal]:
+        """Get principal snapshot, loading it from the database on a miss"""
+        user_id = str(user_id)
+
+        principal = self.local.get(user_id)
+        if principal is not None:
+            return principal
+
+        data = await cache.get(self._key(user_id))
+        if data:
+            principal = UserPrincipal.model_validate(data)
+            self.local.set(user_id, principal)
+            return principal
+
+        generation = self.generation
+        version = await cache.get(self._version_key(user_id))
+        principal = await self.load(db, user_id)
+        if (
+            principal is not None
+            and generation == self.generation
+            and await cache.get(self._version_key(user_id)) == version
+        ):
+            await self.set(principal)
+        return principal
+
+    async def load(self, db: AsyncSession, user_id: str) -> Optional[UserPrincipal]:
+        """Load principal fields from the users table"""
+        result = await db.execute(
+            select(
+                User.id,
+                User.tenant_id,
+                User.email,
+                User.is_active,
+                User.is_superuser,
+                User.is_tenant_admin,
+                User.is_email_verified
+            ).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        return UserPrincipal(
+            id=str(row.id),
+            tenant_id=str(row.tenant_id),
+            email=row.email,
+            is_active=bool(row.is_active),
+            is_superuser=bool(row.is_superuser),
+            is_tenant_admin=bool(row.is_tenant_admin),
+            is_email_verified=bool(row.is_email_verified)
+        )
+
+    async def set(self, principal: UserPrincipal):
+        """Store principal snapshot in both tiers"""
+        self.local.set(principal.id, principal)
+        await cache.set(self._key(principal.id), principal.model_dump(), self.ttl)
+
+    async def invalidate(self, user_id: str):
+        """Drop principal snapshot after deactivation, password or role changes"""
+        user_id = str(user_id)
+        self.generation += 1
+        self.local.delete(user_id)
+        # Loads already under way on any worker see the new version and skip storing
+        await cache.set(self._version_key(user_id), uuid.uuid4().hex, self.ttl)
+        await cache.delete(self._key(user_id))
+        # Other cached lookups about the user (2FA state, contact details)
+        await invalidate_tags(f"user:{user_id}")
+        logger.debug("Principal cache invalidated", user_id=user_id)
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
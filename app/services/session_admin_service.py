@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+import structlog
+
+from app.core.config import settings
+from app.core.security import audit_logger
+from app.core.token_epochs import token_epochs
+from app.models.auth import AuthToken
+from app.models.user import User
+from app.schemas.auth import BulkRevokeRequest
+from app.services.token_store import mark_tokens_revoked, token_persister
+
+logger = structlog.get_logger()
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Slack for clock skew between the workers that stamp created_at
+ISSUED_BEFORE_MARGIN = timedelta(seconds=5)
+
+
+class SessionAdminService:
+    """Set-based bulk administration of refresh-token sessions"""
+
+    def __init__(self, db: AsyncSession, chunk_size: int = 5000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def _criteria(self, filters: BulkRevokeRequest, issued_before: Optional[datetime] = None) -> List[Any]:
+        """Build WHERE clauses for live refresh tokens matching the filters"""
+        criteria = [
+            AuthToken.token_type == "refresh",
+            AuthToken.is_revoked == False
+        ]
+        if issued_before:
+            criteria.append(AuthToken.created_at <= issued_before)
+
+        if filters.user_id:
+            criteria.append(AuthToken.user_id == filters.user_id)
+        if filters.tenant_id:
+            criteria.append(AuthToken.user_id.in_(
+                select(User.id).where(User.tenant_id == filters.tenant_id)
+            ))
+        if filters.ip_address:
+            criteria.append(AuthToken.ip_address == filters.ip_address)
+        if filters.user_agent:
+            criteria.append(AuthToken.user_agent.contains(filters.user_agent, autoescape=True))
+        if filters.created_after:
+            criteria.append(AuthToken.created_at >= filters.created_after)
+        if filters.created_before:
+            criteria.append(AuthToken.created_at < filters.created_before)
+
+        return criteria
+
+    async def count_tokens(self, filters: BulkRevokeRequest, issued_before: Optional[datetime] = None) -> int:
+        """Count live refresh tokens matching the filters"""
+        result = await self.db.execute(
+            select(func.count()).select_from(AuthToken).where(*self._criteria(filters, issued_before))
+        )
+        return result.scalar_one()
+
+    async def revoke_tokens(
+        self,
+        filters: BulkRevokeRequest,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, int]:
+        """Revoke matching refresh tokens in chunked single-statement UPDATEs
+
+        Covers every matching token issued before the call; rows held by a
+        concurrent transaction are waited for, and the call only returns once
+        none are left.
+        """
+        # Tokens issued from here on are new sessions, which keeps the loop
+        # finite; created_at is naive UTC, whether stamped by the write-behind
+        # store or by the column default
+        issued_before = datetime.utcnow() + ISSUED_BEFORE_MARGIN
+
+        # Make sure tokens still queued for write-behind are in Postgres
+        if settings.REFRESH_TOKEN_STORE == "redis":
+            await token_persister.drain()
+
+        criteria = self._criteria(filters, issued_before)
+        revoked_count = 0
+        users_affected = set()
+        chunks = 0
+
+        while True:
+            chunk_ids = (
+                select(AuthToken.id)
+                .where(*criteria)
+                .order_by(AuthToken.id)
+                .limit(self.chunk_size)
+                .with_for_update()
+                .scalar_subquery()
+            )
+            result = await self.db.execute(
+                update(AuthToken)
+                .where(AuthToken.id.in_(chunk_ids))
+                .values(is_revoked=True)
+                .returning(AuthToken.user_id, AuthToken.token_hash)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await self.db.commit()
+
+            if len(rows) < self.chunk_size:
+                # A short chunk can still leave rows behind, e.g. ones a
+                # concurrent transaction changed while we waited for them
+                done = await self.count_tokens(filters, issued_before) == 0
+            else:
+                done = False
+
+            if not rows:
+                if done:
+                    break
+                continue
+
+            chunks += 1
+            revoked_count += len(rows)
+            chunk_users = {str(row.user_id) for row in rows} - users_affected
+            users_affected.update(chunk_users)
+
+            if settings.REFRESH_TOKEN_STORE == "redis":
+                await mark_tokens_revoked([row.token_hash for row in rows])
+            if filters.revoke_access_tokens:
+                await token_epochs.bump_many(chunk_users)
+
+            if progress:
+                await progress({
+                    "revoked_count": revoked_count,
+                    "users_affected": len(users_affected),
+                    "chunks": chunks
+                })
+
+            if done:
+                break
+
+        audit_logger.log_auth_event(
+            "bulk_tokens_revoked",
+            success=True,
+            details={
+                "filters": filters.model_dump(mode="json", exclude={"background"}, exclude_none=True),
+                "revoked_count": revoked_count,
+                "users_affected": len(users_affected)
+            }
+        )
+
+        return {
+            "revoked_count": revoked_count,
+            "users_affected": len(users_affected),
+            "chunks": chunks
+        }
@@ -0,0 +1,473 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import DataError, IntegrityError
+import asyncio
+import json
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.redis import get_redis
+from app.core.write_behind import touch_buffer
+from app.models.auth import AuthToken
+
+logger = structlog.get_logger()
+
+# Metrics
+TOKEN_PERSIST_DEAD_LETTERS = Counter(
+    'token_persist_dead_letters_total',
+    'Queued token operations Postgres rejected, moved to the dead-letter list'
+)
+
+TOKEN_KEY_PREFIX = "refresh_token:"
+USER_TOKENS_KEY_PREFIX = "user_refresh_tokens:"
+PERSIST_QUEUE_KEY = "auth_tokens:persist_queue"
+PERSIST_LOCK_KEY = "auth_tokens:persist_lock"
+PERSIST_DEAD_LETTER_KEY = "auth_tokens:persist_dead_letter"
+
+# Errors that will recur however often the operation is retried
+PERMANENT_PERSIST_ERRORS = (ValueError, KeyError, TypeError, IntegrityError, DataError)
+
+# Mark a single token revoked if it belongs to the user and queue the change for Postgres
+REVOKE_SCRIPT = """
+local owner = redis.call('HGET', KEYS[1], 'user_id')
+if not owner or owner ~= ARGV[1] then
+    return -1
+end
+if redis.call('HGET', KEYS[1], 'is_revoked') == '1' then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'is_revoked', '1')
+redis.call('RPUSH', KEYS[2], ARGV[2])
+return 1
+"""
+
+# Mark every live token of a user revoked and queue the change for Postgres
+REVOKE_ALL_SCRIPT = """
+local hashes = redis.call('SMEMBERS', KEYS[1])
+local count = 0
+for _, token_hash in ipairs(hashes) do
+    local key = ARGV[1] .. token_hash
+    local revoked = redis.call('HGET', key, 'is_revoked')
+    if revoked and revoked ~= '1' then
+        redis.call('HSET', key, 'is_revoked', '1')
+        count = count + 1
+    end
+end
+redis.call('DEL', KEYS[1])
+redis.call('RPUSH', KEYS[2], ARGV[2])
+return count
+"""
+
+# Mark the given token keys revoked where Redis still holds them
+MARK_REVOKED_SCRIPT = """
+local count = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('HSET', key, 'is_revoked', '1')
+        count = count + 1
+    end
+end
+return count
+"""
+
+
+class RefreshTokenRecord(BaseModel):
+    """Refresh token metadata held by a token store"""
+    token_hash: str
+    user_id: str
+    expires_at: datetime
+    is_revoked: bool = False
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    last_used_at: Optional[datetime] = None
+
+    @property
+    def is_expired(self) -> bool:
+        return datetime.utcnow() > self.expires_at
+
+    @property
+    def is_valid(self) -> bool:
+        return not (self.is_revoked or self.is_expired)
+
+    @classmethod
+    def from_model(cls, token: AuthToken) -> "RefreshTokenRecord":
+        return cls(
+            token_hash=token.token_hash,
+            user_id=str(token.user_id),
+            expires_at=token.expires_at,
+            is_revoked=bool(token.is_revoked),
+            ip_address=token.ip_address,
+            user_agent=token.user_agent,
+            last_used_at=token.last_used_at
+        )
+
+
+class RefreshTokenStore:
+    """Base refresh token store"""
+
+    async def save(self, record: RefreshTokenRecord, commit: bool = True):
+        """Store a newly issued refresh token"""
+        raise NotImplementedError
+
+    async def get(self, token_hash: str) -> Optional[RefreshTokenRecord]:
+        """Look up refresh token by hash"""
+        raise NotImplementedError
+
+    async def touch(self, record: RefreshTokenRecord):
+        """Record that the refresh token was used"""
+        raise NotImplementedError
+
+    async def revoke(self, token_hash: str, user_id: str) -> bool:
+        """Revoke a single refresh token owned by the user"""
+        raise NotImplementedError
+
+    async def revoke_all(self, user_id: str) -> int:
+        """Revoke all refresh tokens of the user"""
+        raise NotImplementedError
+
+
+class DatabaseTokenStore(RefreshTokenStore):
+    """Refresh token store writing directly to the auth_tokens table"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _get_model(self, token_hash: str, user_id: Optional[str] = None) -> Optional[AuthToken]:
+        query = select(AuthToken).where(
+            AuthToken.token_hash == token_hash,
+            AuthToken.token_type == "refresh"
+        )
+        if user_id:
+            query = query.where(AuthToken.user_id == user_id)
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def save(self, record: RefreshTokenRecord, commit: bool = True):
+        self.db.add(AuthToken(
+            token_type="refresh",
+            token_hash=record.token_hash,
+            expires_at=record.expires_at,
+            user_id=record.user_id,
+            ip_address=record.ip_address,
+            user_agent=record.user_agent
+        ))
+        if commit:
+            await self.db.commit()
+
+    async def get(self, token_hash: str) -> Optional[RefreshTokenRecord]:
+        db_token = await self._get_model(token_hash)
+        return RefreshTokenRecord.from_model(db_token) if db_token else None
+
+    async def touch(self, record: RefreshTokenRecord):
+        touch_buffer.touch(AuthToken.token_hash, record.token_hash, AuthToken.last_used_at)
+
+    async def revoke(self, token_hash: str, user_id: str) -> bool:
+        db_token = await self._get_model(token_hash, user_id)
+        if not db_token:
+            return False
+
+        db_token.is_revoked = True
+        await self.db.commit()
+        return True
+
+    async def revoke_all(self, user_id: str) -> int:
+        result = await self.db.execute(
+            update(AuthToken)
+            .where(
+                AuthToken.user_id == user_id,
+                AuthToken.token_type == "refresh",
+                AuthToken.is_revoked == False
+            )
+            .values(is_revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+
+class RedisTokenStore(RefreshTokenStore):
+    """Redis-primary refresh token store with batched write-behind to Postgres
+
+    Tokens issued before the store was enabled are still found through a
+    fallback lookup in auth_tokens and rehydrated into Redis.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.fallback = DatabaseTokenStore(db)
+
+    @staticmethod
+    def _token_key(token_hash: str) -> str:
+        return f"{TOKEN_KEY_PREFIX}{token_hash}"
+
+    @staticmethod
+    def _user_key(user_id: str) -> str:
+        return f"{USER_TOKENS_KEY_PREFIX}{user_id}"
+
+    @staticmethod
+    def _op(op: str, **fields) -> str:
+        return json.dumps({"op": op, **fields}, default=str)
+
+    async def _cache_record(self, record: RefreshTokenRecord, persist: bool):
+        client = await get_redis()
+        token_key = self._token_key(record.token_hash)
+        user_key = self._user_key(record.user_id)
+        expire_at = int(record.expires_at.replace(tzinfo=timezone.utc).timestamp())
+
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(token_key, mapping={
+                "user_id": record.user_id,
+                "expires_at": record.expires_at.isoformat(),
+                "is_revoked": "1" if record.is_revoked else "0",
+                "ip_address": record.ip_address or "",
+                "user_agent": record.user_agent or ""
+            })
+            pipe.expireat(token_key, expire_at)
+            if not record.is_revoked:
+                pipe.sadd(user_key, record.token_hash)
+                pipe.expire(user_key, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+            if persist:
+                pipe.rpush(PERSIST_QUEUE_KEY, self._op(
+                    "insert",
+                    token_hash=record.token_hash,
+                    user_id=record.user_id,
+                    expires_at=record.expires_at.isoformat(),
+                    ip_address=record.ip_address,
+                    user_agent=record.user_agent,
+                    created_at=datetime.utcnow().isoformat()
+                ))
+            await pipe.execute()
+
+    async def save(self, record: RefreshTokenRecord, commit: bool = True):
+        await self._cache_record(record, persist=True)
+
+    async def get(self, token_hash: str) -> Optional[RefreshTokenRecord]:
+        client = await get_redis()
+        data = await client.hgetall(self._token_key(token_hash))
+        if data:
+            return RefreshTokenRecord(
+                token_hash=token_hash,
+                user_id=data["user_id"],
+                expires_at=datetime.fromisoformat(data["expires_at"]),
+                is_revoked=data.get("is_revoked") == "1",
+                ip_address=data.get("ip_address") or None,
+                user_agent=data.get("user_agent") or None
+            )
+
+        # Recovery path: token persisted before Redis held it
+        record = await self.fallback.get(token_hash)
+        if record and not record.is_expired:
+            await self._cache_record(record, persist=False)
+        return record
+
+    async def touch(self, record: RefreshTokenRecord):
+        await self.fallback.touch(record)
+
+    async def revoke(self, token_hash: str, user_id: str) -> bool:
+        client = await get_redis()
+        script = client.register_script(REVOKE_SCRIPT)
+        result = await script(
+            keys=[self._token_key(token_hash), PERSIST_QUEUE_KEY],
+            args=[str(user_id), self._op("revoke", token_hash=token_hash, user_id=str(user_id))]
+        )
+        if int(result) == -1:
+            # Not held in Redis; revoke directly in Postgres
+            return await self.fallback.revoke(token_hash, user_id)
+        return int(result) == 1
+
+    async def revoke_all(self, user_id: str) -> int:
+        # Tokens only in Postgres (issued before this store) are revoked there
+        # synchronously, so get() rehydrates them as revoked; tokens still in
+        # the persist queue are covered by the queued revoke_all below
+        persisted = await self.fallback.revoke_all(user_id)
+
+        client = await get_redis()
+        script = client.register_script(REVOKE_ALL_SCRIPT)
+        result = await script(
+            keys=[self._user_key(str(user_id)), PERSIST_QUEUE_KEY],
+            args=[TOKEN_KEY_PREFIX, self._op("revoke_all", user_id=str(user_id))]
+        )
+        # Tokens already persisted are counted by both
+        return max(int(result), persisted)
+
+
+async def mark_tokens_revoked(token_hashes: List[str]) -> int:
+    """Mirror revocations made directly in Postgres into the Redis token store"""
+    if not token_hashes:
+        return 0
+
+    client = await get_redis()
+    script = client.register_script(MARK_REVOKED_SCRIPT)
+    return int(await script(keys=[RedisTokenStore._token_key(token_hash) for token_hash in token_hashes]))
+
+
+def get_token_store(db: AsyncSession) -> RefreshTokenStore:
+    """Get the configured refresh token store"""
+    if settings.REFRESH_TOKEN_STORE == "redis":
+        return RedisTokenStore(db)
+    return DatabaseTokenStore(db)
+
+
+class TokenPersister:
+    """Background flusher applying queued token inserts and revocations to Postgres
+
+    Operations Postgres rejects (constraint violations, malformed entries) are
+    moved to `auth_tokens:persist_dead_letter` so they cannot block the queue.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Token persister started", interval=self.interval)
+
+    async def stop(self):
+        """Stop background loop and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                while await self.flush() >= self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error("Token persist flush failed", error=str(e))
+
+    async def flush(self, wait: Optional[float] = None) -> int:
+        """Apply one batch of queued operations, returning how many were taken
+
+        Returns 0 without waiting if another flusher holds the lock, unless
+        `wait` gives the seconds to wait for it.
+        """
+        client = await get_redis()
+
+        # A single flusher at a time keeps operations in queue order
+        lock = client.lock(
+            PERSIST_LOCK_KEY,
+            timeout=max(30, self.interval * 10),
+            blocking=wait is not None,
+            blocking_timeout=wait
+        )
+        if not await lock.acquire():
+            return 0
+
+        try:
+            raw_ops = await client.lpop(PERSIST_QUEUE_KEY, self.batch_size)
+            if not raw_ops:
+                return 0
+
+            try:
+                ops = [json.loads(raw) for raw in raw_ops]
+                async with async_session_maker() as session:
+                    await self._apply(session, ops)
+                    await session.commit()
+            except Exception as e:
+                logger.warning("Token persist batch failed, retrying one by one", count=len(raw_ops), error=str(e))
+                await self._apply_each(client, raw_ops)
+
+            logger.debug("Token changes persisted", count=len(raw_ops))
+            return len(raw_ops)
+        finally:
+            await lock.release()
+
+    async def drain(self, timeout: float = 30.0):
+        """Flush until the queue is empty, waiting for other flushers"""
+        client = await get_redis()
+        deadline = time.monotonic() + timeout
+        while await client.llen(PERSIST_QUEUE_KEY) > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Token persist queue did not drain in time")
+            await self.flush(wait=remaining)
+
+    async def _apply_each(self, client, raw_ops: List[str]):
+        """Apply operations one transaction each, dead-lettering the ones Postgres rejects"""
+        for index, raw in enumerate(raw_ops):
+            try:
+                async with async_session_maker() as session:
+                    await self._apply(session, [json.loads(raw)])
+                    await session.commit()
+            except PERMANENT_PERSIST_ERRORS as e:
+                await client.rpush(PERSIST_DEAD_LETTER_KEY, raw)
+                TOKEN_PERSIST_DEAD_LETTERS.inc()
+                logger.error("Token persist operation dead-lettered", op=raw, error=str(e))
+            except Exception:
+                # Postgres unavailable: keep this and later operations, in order, for the next flush
+                await client.lpush(PERSIST_QUEUE_KEY, *reversed(raw_ops[index:]))
+                raise
+
+    async def _apply(self, session: AsyncSession, ops: List[Dict[str, Any]]):
+        """Apply operations in order, batching runs of inserts"""
+        pending_inserts: List[Dict[str, Any]] = []
+
+        async def flush_inserts():
+            if pending_inserts:
+                await session.execute(insert(AuthToken), pending_inserts)
+                pending_inserts.clear()
+
+        for op in ops:
+            kind = op["op"]
+            if kind == "insert":
+                pending_inserts.append({
+                    "token_type": "refresh",
+                    "token_hash": op["token_hash"],
+                    "user_id": op["user_id"],
+                    "expires_at": datetime.fromisoformat(op["expires_at"]),
+                    "ip_address": op.get("ip_address"),
+                    "user_agent": op.get("user_agent"),
+                    "created_at": datetime.fromisoformat(op["created_at"]),
+                    "is_revoked": False
+                })
+                continue
+
+            await flush_inserts()
+
+            if kind == "revoke":
+                await session.execute(
+                    update(AuthToken)
+                    .where(
+                        AuthToken.token_hash == op["token_hash"],
+                        AuthToken.user_id == op["user_id"]
+                    )
+                    .values(is_revoked=True)
+                )
+            elif kind == "revoke_all":
+                await session.execute(
+                    update(AuthToken)
+                    .where(
+                        AuthToken.user_id == op["user_id"],
+                        AuthToken.token_type == "refresh",
+                        AuthToken.is_revoked == False
+                    )
+                    .values(is_revoked=True)
+                )
+            else:
+                logger.warning("Unknown token persist operation", op=kind)
+
+        await flush_inserts()
+
+
+# Global token persister instance
+token_persister = TokenPersister(
+    interval=settings.TOKEN_PERSIST_INTERVAL,
+    batch_size=settings.TOKEN_PERSIST_BATCH_SIZE
+)
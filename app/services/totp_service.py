@@ -3,13 +3,17 @@ import qrcode
 from io import BytesIO
 import base64
 from typing import List, Optional, Tuple
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import secrets
 import json
 import structlog
 
+from app.core.cached import cached, invalidate_tags
+from app.core.database import async_session_maker
 from app.core.security import security, encryption
+from app.core.write_behind import touch_buffer
 from app.core.exceptions import ValidationError, NotFoundError
 from app.models.user import User
 from app.models.auth import TwoFactorAuth
@@ -108,6 +112,7 @@ class TOTPService:
             self.db.add(two_factor_auth)
         
         await self.db.commit()
+        await invalidate_tags(f"user:{user_id}")
         
         # Generate QR code
         qr_code_data = self.generate_qr_code(secret_key, user.email)
@@ -139,6 +144,7 @@ class TOTPService:
             # Enable 2FA
             two_factor_auth.is_enabled = True
             await self.db.commit()
+            await invalidate_tags(f"user:{user_id}")
             
             logger.info("2FA enabled", user_id=user_id)
             return True
@@ -168,6 +174,7 @@ class TOTPService:
             # Disable 2FA
             two_factor_auth.is_enabled = False
             await self.db.commit()
+            await invalidate_tags(f"user:{user_id}")
             
             logger.info("2FA disabled", user_id=user_id)
             return True
@@ -195,9 +202,7 @@ class TOTPService:
         # Verify TOTP code first
         if self.verify_totp_code(secret_key, code):
             # Update last used time
-            from datetime import datetime
-            two_factor_auth.last_used_at = datetime.utcnow()
-            await self.db.commit()
+            touch_buffer.touch(TwoFactorAuth.id, two_factor_auth.id, TwoFactorAuth.last_used_at)
             return True
         
         # Try backup code
@@ -241,12 +246,15 @@ class TOTPService:
         logger.info("Backup codes regenerated", user_id=user_id)
         return new_backup_codes
     
+    @cached(ttl=300, key="totp_enabled:{user_id}", tags=["user:{user_id}"])
     async def is_2fa_enabled(self, user_id: str) -> bool:
         """Check if 2FA is enabled for user"""
-        result = await self.db.execute(
-            select(TwoFactorAuth).where(
-                TwoFactorAuth.user_id == user_id,
-                TwoFactorAuth.is_enabled == True
+        # Shared by concurrent callers, so not run on any one request's session
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(TwoFactorAuth).where(
+                    TwoFactorAuth.user_id == user_id,
+                    TwoFactorAuth.is_enabled == True
+                )
             )
-        )
-        return result.scalar_one_or_none() is not None
\ No newline at end of file
+            return result.scalar_one_or_none() is not None
\ No newline at end of file
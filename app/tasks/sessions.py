@@ -0,0 +1,45 @@
+from typing import Optional
+import asyncio
+import structlog
+
+from app.core.celery_app import celery_app
+from app.core.database import async_session_maker, engine
+from app.core.redis import close_redis
+from app.schemas.auth import BulkRevokeRequest
+from app.services.session_admin_service import SessionAdminService
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(bind=True, name="app.tasks.sessions.bulk_revoke_tokens")
+def bulk_revoke_tokens(self, filters: dict, requested_by: Optional[dict] = None):
+    """Revoke matching refresh tokens, reporting progress through task state"""
+    request = BulkRevokeRequest(**filters)
+    # Kept in every state update so results identify who may read them
+    owner = {"requested_by": requested_by or {}}
+
+    async def run():
+        try:
+            async with async_session_maker() as session:
+                service = SessionAdminService(session)
+                total = await service.count_tokens(request)
+                self.update_state(state="PROGRESS", meta={**owner, "total": total, "revoked_count": 0})
+
+                async def report(progress: dict):
+                    self.update_state(state="PROGRESS", meta={**owner, "total": total, **progress})
+
+                result = await service.revoke_tokens(request, progress=report)
+                return {**owner, "total": total, **result}
+        finally:
+            # Connections are bound to this task's event loop
+            await engine.dispose()
+            await close_redis()
+
+    try:
+        result = asyncio.run(run())
+        logger.info("Bulk token revocation completed", **result)
+        return result
+
+    except Exception as e:
+        logger.error("Bulk token revocation failed", error=str(e))
+        raise
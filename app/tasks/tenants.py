@@ -0,0 +1,38 @@
+from typing import List
+import asyncio
+import structlog
+
+from app.core.celery_app import celery_app
+from app.core.database import engine
+from app.core.tenant_provisioning import tenant_provisioner
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(bind=True, name="app.tasks.tenants.provision_tenant_schemas")
+def provision_tenant_schemas(self, tenants: List[dict]):
+    """Provision schemas for [{"tenant_id", "schema_name"}] with per-tenant timings"""
+
+    async def run():
+        try:
+            async def report(progress: dict):
+                self.update_state(state="PROGRESS", meta=progress)
+
+            results = await tenant_provisioner.provision_many(
+                ((tenant["tenant_id"], tenant.get("schema_name")) for tenant in tenants),
+                progress=report
+            )
+            return [result.model_dump() for result in results]
+        finally:
+            # Connections are bound to this task's event loop
+            await engine.dispose()
+
+    try:
+        results = asyncio.run(run())
+        failed = [result for result in results if result["status"] == "failed"]
+        logger.info("Tenant schema provisioning completed", total=len(results), failed=len(failed))
+        return {"total": len(results), "failed": len(failed), "results": results}
+
+    except Exception as e:
+        logger.error("Tenant schema provisioning failed", error=str(e))
+        raise
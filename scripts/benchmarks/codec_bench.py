@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Microbenchmark: cache value codecs over the payloads we actually store
+
+Usage:
+    python scripts/benchmarks/codec_bench.py --iterations 50000
+
+Compares the legacy json.dumps/json.loads text path with the framed json,
+orjson and msgpack codecs for session data, magic-link records, principal
+snapshots and counters. Reports encode/decode throughput and stored size.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+
+from app.core.codecs import ValueSerializer, _AVAILABLE  # noqa: E402
+
+PAYLOADS = {
+    # AuthService.create_session
+    "session": {
+        "user_id": str(uuid.uuid4()),
+        "created_at": datetime.utcnow().isoformat(),
+        "ip_address": "203.0.113.42",
+        "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+        "tenant_id": str(uuid.uuid4()),
+        "two_factor_verified": True,
+    },
+    # PasswordlessService.request_magic_link
+    "magic_link": {
+        "user_id": str(uuid.uuid4()),
+        "email": "jane.doe@example.com",
+        "ip_address": "203.0.113.42",
+        "created_at": datetime.utcnow().isoformat(),
+    },
+    # PrincipalCache.set
+    "principal": {
+        "id": uuid.uuid4(),
+        "tenant_id": uuid.uuid4(),
+        "email": "jane.doe@example.com",
+        "is_active": True,
+        "is_superuser": False,
+        "is_tenant_admin": True,
+        "is_email_verified": True,
+    },
+    # magic_link_rate:* counters
+    "counter": 2,
+}
+
+
+def legacy_dumps(value) -> bytes:
+    """Pre-codec path: JSON text, then encoded again by the text connection"""
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+def legacy_loads(data: bytes):
+    return json.loads(data.decode("utf-8"))
+
+
+def measure(encode, decode, value, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        data = encode(value)
+    encoded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(data)
+    decoded = time.perf_counter() - started
+    return iterations / encoded, iterations / decoded, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    codecs = [("legacy", legacy_dumps, legacy_loads)]
+    for name in ("json", "orjson", "msgpack"):
+        if not _AVAILABLE[name]:
+            print(f"({name} not installed, skipped)")
+            continue
+        serializer = ValueSerializer(name)
+        codecs.append((name, serializer.dumps, serializer.loads))
+
+    for payload_name, value in PAYLOADS.items():
+        print(f"\n{payload_name}")
+        for name, encode, decode in codecs:
+            encode_rate, decode_rate, size = measure(encode, decode, value, args.iterations)
+            print(
+                f"  {name:<8} encode={encode_rate:>10.0f}/s  "
+                f"decode={decode_rate:>10.0f}/s  size={size:>4} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
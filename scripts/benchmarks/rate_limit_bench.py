@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Microbenchmark: legacy GET/INCR/EXPIRE rate limit check vs the atomic script
+
+Usage:
+    REDIS_URL=redis://localhost:6379 python scripts/benchmarks/rate_limit_bench.py --requests 20000 --concurrency 100
+
+Runs against a real Redis and reports throughput, latency percentiles and
+the number of over-admitted requests caused by the legacy race.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+
+from app.core.rate_limiter import FIXED_WINDOW_SCRIPT  # noqa: E402
+
+
+async def legacy_check(client, key: str, limit: int, window: int) -> bool:
+    """Pre-script implementation: three round trips, racy between callers"""
+    current = int(await client.get(key) or 0)
+    if current >= limit:
+        return False
+    await client.incrby(key, 1)
+    await client.expire(key, window)
+    return True
+
+
+async def script_check(script, key: str, limit: int, window: int) -> bool:
+    allowed, _, _ = await script(keys=[key], args=[limit, window])
+    return bool(allowed)
+
+
+async def run(name, check, requests: int, concurrency: int, limit: int):
+    latencies = []
+    allowed = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal allowed
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            if await check():
+                allowed += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{name:<8} {requests / elapsed:>10.0f} req/s  "
+        f"p50={statistics.median(latencies) * 1000:6.2f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f}ms  "
+        f"allowed={allowed} (limit {limit}, over-admitted {max(0, allowed - limit)})"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    client = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+    script = client.register_script(FIXED_WINDOW_SCRIPT)
+    legacy_key = f"bench:rate_limit:legacy:{time.time()}"
+    script_key = f"bench:rate_limit:script:{time.time()}"
+
+    try:
+        await run(
+            "legacy",
+            lambda: legacy_check(client, legacy_key, args.limit, args.window),
+            args.requests, args.concurrency, args.limit
+        )
+        await run(
+            "script",
+            lambda: script_check(script, script_key, args.limit, args.window),
+            args.requests, args.concurrency, args.limit
+        )
+    finally:
+        await client.delete(legacy_key, script_key)
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Microbenchmark: RedisCache single-key calls vs get_many and auto-batching
+
+Usage:
+    REDIS_URL=redis://localhost:6379 python scripts/benchmarks/redis_batch_bench.py --keys 1000 --concurrency 200
+
+Runs against a real Redis and reports throughput, latency percentiles and
+the number of round trips each mode needed for the same reads.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+
+from redis.asyncio.client import Pipeline  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+
+from app.core.redis import RedisCache  # noqa: E402
+
+round_trips = 0
+
+
+def count_round_trips():
+    """Count commands and pipelines sent, i.e. network round trips"""
+    execute_command = Redis.execute_command
+    execute = Pipeline.execute
+
+    async def counted_execute_command(self, *args, **kwargs):
+        global round_trips
+        round_trips += 1
+        return await execute_command(self, *args, **kwargs)
+
+    async def counted_execute(self, *args, **kwargs):
+        global round_trips
+        round_trips += 1
+        return await execute(self, *args, **kwargs)
+
+    Redis.execute_command = counted_execute_command
+    Pipeline.execute = counted_execute
+
+
+async def run(name, read, reads: int, concurrency: int):
+    global round_trips
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(reads):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            await read(i)
+            latencies.append(time.perf_counter() - start)
+
+    round_trips = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{name:<12} {reads / elapsed:>10.0f} ops/s  "
+        f"p50={statistics.median(latencies) * 1000:6.2f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f}ms  "
+        f"round trips={round_trips}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50, help="keys per get_many call")
+    args = parser.parse_args()
+
+    plain = RedisCache()
+    batched = RedisCache(auto_batch=True)
+    keys = [f"bench:cache:{i}" for i in range(args.keys)]
+    value = {"user_id": "00000000-0000-0000-0000-000000000000", "ip_address": "127.0.0.1", "data": "x" * 200}
+
+    await plain.set_many({key: value for key in keys}, expire=300)
+    count_round_trips()
+
+    try:
+        await run(
+            "single",
+            lambda i: plain.get(keys[i % args.keys]),
+            args.reads, args.concurrency
+        )
+        await run(
+            "auto-batch",
+            lambda i: batched.get(keys[i % args.keys]),
+            args.reads, args.concurrency
+        )
+        await run(
+            "get_many",
+            lambda i: plain.get_many(keys[(i * args.batch) % args.keys:][:args.batch]),
+            args.reads // args.batch, args.concurrency
+        )
+        print(f"(get_many reads {args.batch} keys per op)")
+    finally:
+        await plain.delete_many(keys)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
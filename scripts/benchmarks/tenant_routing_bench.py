@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Microbenchmark: tenant resolution through the in-memory routing table
+
+Usage:
+    python scripts/benchmarks/tenant_routing_bench.py --tenants 100000
+
+Builds a routing table of synthetic tenants (no database needed) and reports
+build time and memory, the cost of single lookups and of a full
+TenantMiddleware.resolve_tenant call per resolution method, and the cost of
+applying change notifications.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+
+from starlette.requests import Request  # noqa: E402
+
+from app.core.tenant_routing import TenantRoutingTable  # noqa: E402
+import app.middleware.tenant as tenant_middleware  # noqa: E402
+
+
+def make_rows(count: int):
+    rows = []
+    for i in range(count):
+        rows.append((
+            str(uuid.uuid4()),
+            f"tenant{i}",
+            f"app.customer{i}.com" if i % 10 == 0 else None,
+            random.choice(("basic", "premium", "enterprise")),
+            f"tenant_{i}"
+        ))
+    return rows
+
+
+def make_request(host: str, path: str = "/api/v1/auth/me", headers=()) -> Request:
+    raw_headers = [(b"host", host.encode())] + [(k.encode(), v.encode()) for k, v in headers]
+    return Request({"type": "http", "method": "GET", "path": path, "headers": raw_headers, "query_string": b""})
+
+
+def per_op(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+async def per_op_async(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.tenants)
+    table = TenantRoutingTable()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    table.replace(rows)
+    build = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"tenants={args.tenants}  build={build * 1000:.0f}ms  table memory={memory / 1e6:.1f}MB")
+
+    sample = random.sample(rows, 1000)
+    print("\nlookup")
+    print(f"  subdomain hit   {per_op(lambda: table.lookup('subdomain', random.choice(sample)[1]), args.iterations):8.0f} ns/op")
+    print(f"  id hit          {per_op(lambda: table.lookup('id', random.choice(sample)[0]), args.iterations):8.0f} ns/op")
+    print(f"  unknown host    {per_op(lambda: table.lookup('subdomain', 'no-such-tenant'), args.iterations):8.0f} ns/op")
+
+    # Route the middleware through this table
+    table.ready = True
+    tenant_middleware.tenant_routes = table
+    middleware = tenant_middleware.TenantMiddleware(app=None)
+    subdomain_request = make_request(f"{sample[0][1]}.finaiflow.com")
+    domain_request = make_request(next(row[2] for row in rows if row[2]))
+    header_request = make_request("api.finaiflow.com", headers=[("x-tenant-id", sample[0][0])])
+
+    iterations = args.iterations // 4
+    print("\nTenantMiddleware.resolve_tenant")
+    for name, request in (
+        ("subdomain", subdomain_request),
+        ("custom domain", domain_request),
+        ("X-Tenant-ID", header_request),
+    ):
+        cost = await per_op_async(lambda: middleware.resolve_tenant(request), iterations)
+        print(f"  {name:<15} {cost:8.0f} ns/op")
+
+    events = [
+        {"op": "UPDATE", "id": row[0], "subdomain": row[1], "domain": row[2],
+         "plan": "premium", "schema_name": row[4], "routable": True}
+        for row in sample
+    ]
+    cost = per_op(lambda: table.apply(random.choice(events)), args.iterations // 10)
+    print(f"\napply notification {cost:8.0f} ns/op")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
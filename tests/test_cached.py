@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.cached import cached, invalidate_tags
+from app.core.config import settings
+from app.core.near_cache import NearCache
+from app.services.passwordless_service import PasswordlessService
+from app.services.totp_service import TOTPService
+
+pytestmark = pytest.mark.asyncio
+
+NAME = f"{__name__}.slow_square"
+calls = []
+
+
+@cached(ttl=60, key="square:{value}", tags=["square"])
+async def slow_square(value: int) -> int:
+    calls.append(value)
+    await asyncio.sleep(0.1)
+    return value * value
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {"function": NAME, **labels}) or 0.0
+
+
+async def test_coalesced_callers_are_not_counted_as_hits(redis_client):
+    calls.clear()
+    before = {result: sample("cached_calls_total", result=result) for result in ("hit", "miss", "coalesced")}
+    saved = sample("cached_latency_saved_seconds_total")
+
+    assert await asyncio.gather(slow_square(3), slow_square(3)) == [9, 9]
+    assert calls == [3]
+    assert sample("cached_calls_total", result="miss") == before["miss"] + 1
+    assert sample("cached_calls_total", result="coalesced") == before["coalesced"] + 1
+    assert sample("cached_calls_total", result="hit") == before["hit"]
+    assert sample("cached_latency_saved_seconds_total") == saved
+
+    assert await slow_square(3) == 9
+    assert sample("cached_calls_total", result="hit") == before["hit"] + 1
+    assert sample("cached_latency_saved_seconds_total") > saved
+
+
+async def test_invalidated_tags_are_loaded_again(redis_client):
+    calls.clear()
+    assert await slow_square(4) == 16
+    assert await invalidate_tags("square") == 1
+    assert await slow_square(4) == 16
+    assert calls == [4, 4]
+
+
+async def test_method_loaders_do_not_use_the_callers_session(redis_client, database, tenant_user):
+    _, user = tenant_user
+    # No request session at all: the loads open their own
+    contact = await PasswordlessService(None).get_user_contact(user.email)
+    assert contact.id == str(user.id)
+    assert await TOTPService(None).is_2fa_enabled(str(user.id)) is False
+
+
+async def test_near_cache_covers_cached_lookups_by_default():
+    near = NearCache(None, settings.NEAR_CACHE_PREFIXES)
+    assert near.prefix_of("cached:tenant_by_subdomain:acme")
+    assert near.prefix_of("cached:tenant_by_id:1")
+    # Principals have their own per-worker tier; sessions slide their TTL in Redis
+    assert near.prefix_of("principal:1") is None
+    assert near.prefix_of("session:1") is None
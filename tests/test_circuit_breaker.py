@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+import redis.asyncio as redis
+from redis.asyncio import Redis
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+from app.core.redis import InstrumentedConnectionPool, PoolTimeoutError
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test",
+        failure_threshold=1,
+        recovery_timeout=60,
+        failure_exceptions=(redis.ConnectionError, redis.TimeoutError, OSError),
+        ignored_exceptions=(PoolTimeoutError,),
+        **kwargs
+    )
+
+
+async def test_timeouts_open_the_circuit():
+    breaker = make_breaker(call_timeout=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(asyncio.sleep, 1)
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(asyncio.sleep, 0)
+
+
+async def test_per_call_timeout_overrides_the_default():
+    breaker = make_breaker(call_timeout=0.01)
+    assert await breaker.call_with_timeout(1.0, asyncio.sleep, 0.05, "done") == "done"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_saturated_pool_does_not_open_the_circuit(redis_client):
+    pool = InstrumentedConnectionPool.from_url(
+        settings.REDIS_URL, name="saturated", max_connections=1, timeout=0.05
+    )
+    client = Redis(connection_pool=pool)
+    breaker = make_breaker(call_timeout=1.0)
+    held = await pool.get_connection("GET")
+    try:
+        with pytest.raises(PoolTimeoutError):
+            await breaker.call(client.get, "key")
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    finally:
+        await pool.release(held)
+        await client.aclose(close_connection_pool=True)
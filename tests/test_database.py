@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database import SEARCH_PATH_CHANGE, engine
+from app.core.tenant_provisioning import CLONE_SCHEMA_FUNCTION
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.parametrize("statement", [
+    "SET search_path TO tenant_acme",
+    "  set SESSION search_path = tenant_acme, public",
+    "SELECT 1; SET search_path TO tenant_acme",
+    "SELECT set_config('search_path', 'tenant_acme', false)",
+])
+async def test_session_search_path_changes_are_detected(statement):
+    assert SEARCH_PATH_CHANGE.search(statement)
+
+
+@pytest.mark.parametrize("statement", [
+    CLONE_SCHEMA_FUNCTION,
+    "SET LOCAL search_path TO tenant_acme",
+    "SHOW search_path",
+    "SELECT current_setting('search_path')",
+    "SET statement_timeout = 0",
+])
+async def test_other_statements_are_not(statement):
+    assert not SEARCH_PATH_CHANGE.search(statement)
+
+
+async def connection_ids(statement: str):
+    async with engine.connect() as conn:
+        before = await conn.scalar(text("SELECT pg_backend_pid()"))
+        await conn.execute(text(statement))
+    async with engine.connect() as conn:
+        return before, await conn.scalar(text("SELECT pg_backend_pid()")), await conn.scalar(text("SHOW search_path"))
+
+
+async def test_changed_connections_are_not_reused(database):
+    await engine.dispose()
+    before, after, search_path = await connection_ids("SET search_path TO pg_catalog")
+    assert before != after
+    assert search_path == '"$user", public'
+
+    # Creating the clone function keeps the connection
+    before, after, _ = await connection_ids(CLONE_SCHEMA_FUNCTION)
+    assert before == after
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+import time
+import uuid
+
+import pytest
+
+from app.api.v1.endpoints.auth import change_password
+from app.core.database import async_session_maker
+from app.core.exceptions import ServiceUnavailableError
+from app.core.hashing import password_hasher
+from app.core.redis import cache
+from app.core.token_epochs import token_epochs
+from app.services.passwordless_service import PasswordlessService
+from app.schemas.auth import ChangePasswordRequest
+from app.services.token_store import RedisTokenStore, RefreshTokenRecord
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_password_reset_revokes_refresh_tokens(redis_client, database, tenant_user):
+    _, user = tenant_user
+    record = RefreshTokenRecord(
+        token_hash=uuid.uuid4().hex,
+        user_id=str(user.id),
+        expires_at=datetime.utcnow() + timedelta(days=7)
+    )
+    async with async_session_maker() as session:
+        await RedisTokenStore(session).save(record)
+
+    issued_before_reset = time.time() - 1
+    await cache.set("password_reset:reset-token", {"user_id": str(user.id)}, 3600)
+
+    async with async_session_maker() as session:
+        assert await PasswordlessService(session).verify_password_reset("reset-token", "N3w-passw0rd!")
+
+    async with async_session_maker() as session:
+        # A stolen refresh token can no longer mint access tokens past the new epoch
+        assert (await RedisTokenStore(session).get(record.token_hash)).is_revoked
+    assert token_epochs.is_revoked(str(user.id), issued_before_reset)
+    assert await cache.get("password_reset:reset-token") is None
+
+
+async def test_saturated_hasher_is_not_reported_as_a_failed_change(redis_client, database, tenant_user, monkeypatch):
+    _, user = tenant_user
+    monkeypatch.setattr(password_hasher, "max_queue", 0)
+    await cache.set("password_reset:reset-token", {"user_id": str(user.id)}, 3600)
+
+    # Left to the app-wide 503 handler, with its Retry-After
+    async with async_session_maker() as session:
+        with pytest.raises(ServiceUnavailableError) as error:
+            await PasswordlessService(session).verify_password_reset("reset-token", "N3w-passw0rd!")
+    assert error.value.details["retry_after"] >= 1
+
+    async with async_session_maker() as session:
+        with pytest.raises(ServiceUnavailableError):
+            await change_password(
+                ChangePasswordRequest(current_password="x", new_password="N3w-passw0rd!"),
+                current_user=await session.get(type(user), user.id),
+                db=session
+            )
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.redis import cache
+from app.schemas.auth import UserPrincipal
+from app.services.principal_service import PrincipalCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def principal(user_id: str, is_active: bool = True) -> UserPrincipal:
+    return UserPrincipal(
+        id=user_id,
+        tenant_id=str(uuid.uuid4()),
+        email="jane@acme.test",
+        is_active=is_active
+    )
+
+
+class SlowLoad:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.loading, self.release = asyncio.Event(), asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, db, user_id: str):
+        self.calls += 1
+        self.loading.set()
+        await self.release.wait()
+        # Read before the user was deactivated
+        return principal(user_id)
+
+
+async def test_load_racing_an_invalidation_elsewhere_is_not_stored(redis_client):
+    user_id = str(uuid.uuid4())
+    cache_here, other_worker = PrincipalCache(), PrincipalCache()
+    cache_here.load = SlowLoad(user_id)
+
+    getting = asyncio.create_task(cache_here.get(None, user_id))
+    await cache_here.load.loading.wait()
+    await other_worker.invalidate(user_id)
+    cache_here.load.release.set()
+
+    assert (await getting).is_active
+    assert cache_here.local.get(user_id) is None
+    assert await cache.get(cache_here._key(user_id)) is None
+
+
+async def test_load_racing_a_local_invalidation_is_not_stored(redis_client):
+    user_id = str(uuid.uuid4())
+    principals = PrincipalCache()
+    principals.load = SlowLoad(user_id)
+
+    getting = asyncio.create_task(principals.get(None, user_id))
+    await principals.load.loading.wait()
+    await principals.invalidate(user_id)
+    principals.load.release.set()
+    await getting
+
+    assert principals.local.get(user_id) is None
+    await principals.get(None, user_id)
+    assert principals.load.calls == 2
+
+
+async def test_loads_without_an_invalidation_are_stored(redis_client):
+    user_id = str(uuid.uuid4())
+    principals = PrincipalCache()
+    await principals.invalidate(user_id)
+    principals.load = SlowLoad(user_id)
+    principals.load.release.set()
+
+    await principals.get(None, user_id)
+    await principals.get(None, user_id)
+    assert principals.load.calls == 1
+    assert (await cache.get(principals._key(user_id)))["id"] == user_id
@@ -0,0 +1,117 @@
+import pytest
+
+from app.core.config import Settings
+from app.core.rate_limiter import LeasedRateLimiter, RateLimitScope, RedisRateLimiter
+from app.core.redis import close_redis, get_redis
+
+pytestmark = pytest.mark.asyncio
+
+WINDOW = 3600
+
+
+async def window_count(client, key: str) -> int:
+    keys = await client.keys(f"{key}:*")
+    assert len(keys) == 1
+    return int(await client.get(keys[0]))
+
+
+async def test_algorithm_defaults_to_fixed_window_in_approximate_mode():
+    assert Settings(RATE_LIMIT_MODE="approximate").RATE_LIMIT_ALGORITHM == "fixed_window"
+    assert Settings(RATE_LIMIT_MODE="exact").RATE_LIMIT_ALGORITHM == "sliding_window"
+    assert Settings(RATE_LIMIT_MODE="approximate", RATE_LIMIT_ALGORITHM="gcra").RATE_LIMIT_ALGORITHM == "gcra"
+
+
+async def test_leased_hits_spend_local_slices(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    for _ in range(5):
+        assert (await limiter.hit("rate_limit:a", 20, WINDOW)).allowed
+
+    # Three slices of two leased for five requests
+    assert await window_count(redis_client, "rate_limit:a") == 6
+
+
+async def test_leases_never_exceed_the_global_limit(redis_client):
+    first, second = LeasedRateLimiter(error_bound=0.5), LeasedRateLimiter(error_bound=0.5)
+    assert (await first.hit("rate_limit:a", 4, WINDOW)).allowed
+
+    allowed = [(await second.hit("rate_limit:a", 4, WINDOW)).allowed for _ in range(3)]
+    # The first worker still holds one unused unit
+    assert allowed == [True, True, False]
+    assert await window_count(redis_client, "rate_limit:a") == 4
+
+
+async def test_idle_leftovers_are_returned(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    assert (await limiter.hit("rate_limit:a", 20, WINDOW)).allowed
+    assert await window_count(redis_client, "rate_limit:a") == 2
+
+    await limiter.return_leftovers(idle_for=0)
+    assert await window_count(redis_client, "rate_limit:a") == 1
+    assert limiter._leases == {}
+
+
+async def test_other_algorithms_are_not_leased(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    assert (await limiter.hit("rate_limit:a", 20, WINDOW, "sliding_window")).allowed
+    assert await window_count(redis_client, "rate_limit:a") == 1
+    assert limiter._leases == {}
+
+
+def scopes(client_limit: int, tenant_limit: int, tenant_algorithm: str = "sliding_window"):
+    return [
+        RateLimitScope("user", "rate_limit:user", client_limit, WINDOW, "fixed_window"),
+        RateLimitScope("tenant", "rate_limit:tenant", tenant_limit, WINDOW, tenant_algorithm),
+    ]
+
+
+async def test_multi_scope_denial_uses_no_quota(redis_client):
+    limiter = RedisRateLimiter()
+    assert (await limiter.hit_many(scopes(1, 5))).allowed
+
+    denied = await limiter.hit_many(scopes(1, 5))
+    assert not denied.allowed and denied.scope == "user"
+    assert await window_count(redis_client, "rate_limit:tenant") == 1
+
+
+async def test_leased_hit_many_spends_local_slices(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    for _ in range(5):
+        assert (await limiter.hit_many(scopes(20, 100, "fixed_window"))).allowed
+
+    assert await window_count(redis_client, "rate_limit:user") == 6
+    assert await window_count(redis_client, "rate_limit:tenant") == 10
+
+
+async def test_leased_hit_many_checks_exact_scopes_in_redis(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    results = [await limiter.hit_many(scopes(20, 2)) for _ in range(3)]
+
+    assert [result.allowed for result in results] == [True, True, False]
+    assert results[2].scope == "tenant"
+    # The denied request spent none of the leased units
+    assert limiter._leases["rate_limit:user"].tokens == 2
+    assert await window_count(redis_client, "rate_limit:tenant") == 2
+
+
+async def test_leased_denial_skips_exact_scopes(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    assert (await limiter.hit_many(scopes(1, 5))).allowed
+
+    denied = await limiter.hit_many(scopes(1, 5))
+    assert not denied.allowed and denied.scope == "user"
+    assert await window_count(redis_client, "rate_limit:tenant") == 1
+
+
+async def test_scripts_follow_the_client_after_close(redis_client):
+    limiter = LeasedRateLimiter(error_bound=0.1)
+    assert (await limiter.hit("rate_limit:a", 20, WINDOW)).allowed
+    lease_script, _ = await limiter._get_lease_scripts()
+    assert lease_script.registered_client is redis_client
+
+    # E.g. a Celery task closing the clients of its event loop
+    await close_redis()
+    client = await get_redis()
+    assert client is not redis_client
+    lease_script, _ = await limiter._get_lease_scripts()
+    assert lease_script.registered_client is client
+    assert (await limiter.hit("rate_limit:b", 20, WINDOW)).allowed
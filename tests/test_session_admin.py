@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, text
+
+from app.api.v1.endpoints.admin import BULK_REVOKE_OWNER_PREFIX, get_bulk_revoke_status
+from app.core.database import async_session_maker, engine
+from app.core.redis import cache
+from app.models.auth import AuthToken
+from app.schemas.auth import BulkRevokeRequest, UserPrincipal
+from app.services.session_admin_service import SessionAdminService
+from app.services.token_store import PERSIST_LOCK_KEY, RedisTokenStore, RefreshTokenRecord
+
+pytestmark = pytest.mark.asyncio
+
+
+async def add_tokens(user, count: int):
+    async with async_session_maker() as session:
+        tokens = [
+            AuthToken(
+                token_type="refresh",
+                token_hash=uuid.uuid4().hex,
+                expires_at=datetime.utcnow() + timedelta(days=7),
+                user_id=user.id
+            )
+            for _ in range(count)
+        ]
+        session.add_all(tokens)
+        await session.commit()
+        return [token.token_hash for token in tokens]
+
+
+async def live_tokens(user) -> int:
+    async with async_session_maker() as session:
+        return await SessionAdminService(session).count_tokens(BulkRevokeRequest(user_id=str(user.id)))
+
+
+async def test_bulk_revoke_waits_for_rows_locked_by_a_concurrent_transaction(redis_client, database, tenant_user):
+    _, user = tenant_user
+    hashes = await add_tokens(user, 5)
+
+    # A concurrent refresh holding one of the rows
+    async with engine.connect() as other:
+        await other.execute(
+            text("SELECT id FROM auth_tokens WHERE token_hash = :hash FOR UPDATE"),
+            {"hash": hashes[0]}
+        )
+
+        async def revoke():
+            async with async_session_maker() as session:
+                service = SessionAdminService(session, chunk_size=2)
+                return await service.revoke_tokens(BulkRevokeRequest(user_id=str(user.id)))
+
+        task = asyncio.create_task(revoke())
+        await asyncio.sleep(0.3)
+        assert not task.done()
+        await other.commit()
+
+    result = await asyncio.wait_for(task, 5)
+    assert result["revoked_count"] == 5
+    assert await live_tokens(user) == 0
+
+
+async def test_bulk_revoke_drains_tokens_queued_for_write_behind(redis_client, database, tenant_user):
+    _, user = tenant_user
+    record = RefreshTokenRecord(
+        token_hash=uuid.uuid4().hex,
+        user_id=str(user.id),
+        expires_at=datetime.utcnow() + timedelta(days=7)
+    )
+    async with async_session_maker() as session:
+        await RedisTokenStore(session).save(record)
+
+    # Another worker is flushing the queue
+    other = redis_client.lock(PERSIST_LOCK_KEY, timeout=5)
+    assert await other.acquire()
+
+    async def release_later():
+        await asyncio.sleep(0.3)
+        await other.release()
+
+    asyncio.create_task(release_later())
+    async with async_session_maker() as session:
+        result = await SessionAdminService(session).revoke_tokens(BulkRevokeRequest(user_id=str(user.id)))
+
+    assert result["revoked_count"] == 1
+    assert await redis_client.hget(f"refresh_token:{record.token_hash}", "is_revoked") == "1"
+    async with async_session_maker() as session:
+        assert await session.scalar(select(AuthToken.is_revoked).where(AuthToken.token_hash == record.token_hash))
+
+
+def principal(tenant_id: str, **flags) -> UserPrincipal:
+    return UserPrincipal(
+        id=str(uuid.uuid4()),
+        tenant_id=tenant_id,
+        email="admin@example.test",
+        is_active=True,
+        is_tenant_admin=True,
+        **flags
+    )
+
+
+async def test_revoke_status_is_limited_to_the_initiating_tenant(redis_client):
+    tenant_id = str(uuid.uuid4())
+    await cache.set(f"{BULK_REVOKE_OWNER_PREFIX}task-1", {"user_id": "u", "tenant_id": tenant_id}, 60)
+
+    status = await get_bulk_revoke_status("task-1", current_user=principal(tenant_id))
+    assert status["task_id"] == "task-1"
+
+    for task_id, user in (
+        ("task-1", principal(str(uuid.uuid4()))),
+        ("unknown", principal(tenant_id)),
+    ):
+        with pytest.raises(HTTPException) as error:
+            await get_bulk_revoke_status(task_id, current_user=user)
+        assert error.value.status_code == 404
+
+    superuser = principal(str(uuid.uuid4()), is_superuser=True)
+    assert (await get_bulk_revoke_status("task-1", current_user=superuser))["task_id"] == "task-1"
+
+
+async def test_bulk_revoke_covers_queued_tokens_whatever_the_session_time_zone(redis_client, database, tenant_user):
+    _, user = tenant_user
+    record = RefreshTokenRecord(
+        token_hash=uuid.uuid4().hex,
+        user_id=str(user.id),
+        expires_at=datetime.utcnow() + timedelta(days=7)
+    )
+    async with async_session_maker() as session:
+        await RedisTokenStore(session).save(record)
+
+    # Queued, not yet persisted, with Postgres' local time behind UTC
+    async with async_session_maker() as session:
+        await session.execute(text("SET TIME ZONE 'America/New_York'"))
+        try:
+            result = await SessionAdminService(session).revoke_tokens(BulkRevokeRequest(user_id=str(user.id)))
+        finally:
+            await session.execute(text("RESET TIME ZONE"))
+            await session.commit()
+
+    assert result["revoked_count"] == 1
+    assert await live_tokens(user) == 0
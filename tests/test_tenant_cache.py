@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.cached import cached
+from app.core.tenant_cache import TENANTS_CHANNEL, TenantCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def snapshot(tenant_id: str, subdomain: str) -> dict:
+    return {"id": tenant_id, "name": subdomain.title(), "subdomain": subdomain, "schema_name": f"tenant_{subdomain}"}
+
+
+class Loader:
+    def __init__(self, tenants: dict):
+        self.tenants = tenants
+        self.calls = []
+
+    async def __call__(self, identifier: str):
+        self.calls.append(identifier)
+        return self.tenants.get(identifier)
+
+
+async def test_invalidate_drops_the_tenant_and_unknown_identifiers(redis_client):
+    acme, globex = str(uuid.uuid4()), str(uuid.uuid4())
+    loader = Loader({"acme": snapshot(acme, "acme"), "globex": snapshot(globex, "globex")})
+    cache = TenantCache()
+    for subdomain in ("acme", "globex", "initech", "acme", "globex", "initech"):
+        await cache.resolve("subdomain", subdomain, loader)
+    assert loader.calls == ["acme", "globex", "initech"]
+
+    # initech signs up
+    loader.tenants["initech"] = snapshot(str(uuid.uuid4()), "initech")
+    await cache.invalidate(acme)
+    for subdomain in ("acme", "globex", "initech"):
+        assert (await cache.resolve("subdomain", subdomain, loader)).subdomain == subdomain
+    assert loader.calls[3:] == ["acme", "initech"]
+
+
+async def test_invalidate_drops_redis_cached_loads(redis_client):
+    tenant_id = str(uuid.uuid4())
+    loads = []
+
+    @cached(ttl=60, key="test_tenant:{subdomain}", tags=["tenant:{result[id]}"])
+    async def load(subdomain: str):
+        loads.append(subdomain)
+        return snapshot(tenant_id, subdomain)
+
+    await TenantCache().resolve("subdomain", "acme", load)
+    await TenantCache().resolve("subdomain", "acme", load)
+    assert loads == ["acme"]
+
+    await TenantCache().invalidate(tenant_id)
+    await TenantCache().resolve("subdomain", "acme", load)
+    assert loads == ["acme", "acme"]
+
+
+async def test_load_racing_an_invalidation_is_not_stored(redis_client):
+    tenant_id = str(uuid.uuid4())
+    cache = TenantCache()
+    loading, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_loader(identifier: str):
+        loading.set()
+        await release.wait()
+        # Read before the tenant was suspended
+        return snapshot(tenant_id, identifier)
+
+    resolving = asyncio.create_task(cache.resolve("subdomain", "acme", slow_loader))
+    await loading.wait()
+    await cache.invalidate(tenant_id)
+    release.set()
+
+    assert (await resolving).id == tenant_id
+    assert cache.entries.get(("subdomain", "acme")) is None
+
+
+async def test_invalidations_from_other_workers_are_applied(redis_client):
+    tenant_id = str(uuid.uuid4())
+    cache = TenantCache()
+    cache.start()
+    try:
+        for _ in range(100):
+            if (await redis_client.pubsub_numsub(TENANTS_CHANNEL))[0][1]:
+                break
+            await asyncio.sleep(0.01)
+        # Let the listener finish its resubscribe reset
+        await asyncio.sleep(0.05)
+        await cache.resolve("subdomain", "acme", Loader({"acme": snapshot(tenant_id, "acme")}))
+        await cache.resolve("subdomain", "nobody", Loader({}))
+
+        await redis_client.publish(TENANTS_CHANNEL, tenant_id)
+        for _ in range(100):
+            if ("subdomain", "acme") not in cache.entries:
+                break
+            await asyncio.sleep(0.01)
+        assert ("subdomain", "acme") not in cache.entries
+        assert ("subdomain", "nobody") not in cache.negative
+    finally:
+        await cache.stop()
@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import Base, engine, tenant_session_maker
+from app.core.tenant_provisioning import TenantProvisioner
+from app.models.user import User
+
+pytestmark = pytest.mark.asyncio
+
+TEMPLATE = "tenant_template_test"
+
+SCHEMA_DEFINITIONS = """
+SELECT 'table ' || relname FROM pg_class
+WHERE relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = :schema) AND relkind = 'r'
+UNION ALL
+SELECT 'constraint ' || t.relname || ' ' || c.conname || ' ' || pg_get_constraintdef(c.oid)
+FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid
+WHERE c.connamespace = (SELECT oid FROM pg_namespace WHERE nspname = :schema)
+UNION ALL
+SELECT 'index ' || indexdef FROM pg_indexes WHERE schemaname = :schema
+UNION ALL
+SELECT 'default ' || table_name || '.' || column_name || ' ' || column_default
+FROM information_schema.columns WHERE table_schema = :schema AND column_default IS NOT NULL
+"""
+
+
+@pytest_asyncio.fixture
+async def provisioner(database):
+    yield TenantProvisioner(TEMPLATE, concurrency=2)
+    async with engine.begin() as conn:
+        schemas = await conn.scalars(text(
+            "SELECT nspname FROM pg_namespace WHERE nspname = :template OR nspname LIKE 'tenant_test_%'"
+        ), {"template": TEMPLATE})
+        for schema in schemas.all():
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+
+
+async def definitions(schema: str) -> set:
+    async with engine.connect() as conn:
+        rows = (await conn.scalars(text(SCHEMA_DEFINITIONS), {"schema": schema})).all()
+    return {row.replace(f"{schema}.", "SCHEMA.") for row in rows}
+
+
+async def test_clone_matches_the_template(provisioner):
+    result = await provisioner.provision(uuid.uuid4(), "tenant_test_a")
+    assert result.status == "created"
+
+    template = await definitions(TEMPLATE)
+    assert {row for row in template if row.startswith("table ")} == {
+        f"table {table.name}" for table in Base.metadata.sorted_tables
+    }
+    assert any(row.startswith("index ") for row in template)
+    assert any(" FOREIGN KEY " in row for row in template)
+    assert await definitions("tenant_test_a") == template
+
+    again = await provisioner.provision(result.tenant_id, "tenant_test_a")
+    assert again.status == "exists"
+
+
+async def test_foreign_keys_point_into_the_tenant_schema(provisioner, tenant_user):
+    tenant, _ = tenant_user
+    await provisioner.provision(uuid.uuid4(), "tenant_test_a")
+
+    # The tenant row exists in public only
+    async with tenant_session_maker("tenant_test_a") as session:
+        session.add(User(
+            email="jane@acme.test",
+            first_name="Jane",
+            last_name="Doe",
+            hashed_password="x",
+            tenant_id=tenant.id
+        ))
+        with pytest.raises(IntegrityError):
+            await session.commit()
+
+
+async def test_batch_reports_failures_without_stopping(provisioner):
+    updates = []
+
+    async def progress(counts):
+        updates.append(counts)
+
+    results = await provisioner.provision_many(
+        [("1", "tenant_test_b"), ("2", "pg_reserved"), ("3", "tenant_test_c")],
+        progress
+    )
+    assert [result.status for result in results] == ["created", "failed", "created"]
+    assert "pg_reserved" in results[1].error
+    assert updates[-1] == {"total": 3, "created": 2, "exists": 0, "failed": 1}
+
+
+async def test_clones_wait_for_a_template_rebuild(provisioner):
+    await provisioner.ensure_template()
+
+    # Another worker is rebuilding the template
+    async with engine.connect() as rebuild:
+        await rebuild.execute(text("SELECT pg_advisory_xact_lock(hashtext('tenant_template'))"))
+        cloning = asyncio.create_task(provisioner.provision(uuid.uuid4(), "tenant_test_d"))
+        await asyncio.sleep(0.3)
+        assert not cloning.done()
+        await rebuild.commit()
+
+    assert (await asyncio.wait_for(cloning, 5)).status == "created"
+
+    # A clone still running elsewhere does not hold this one up
+    async with engine.connect() as clone:
+        await clone.execute(text("SELECT pg_advisory_xact_lock_shared(hashtext('tenant_template'))"))
+        result = await asyncio.wait_for(provisioner.provision(uuid.uuid4(), "tenant_test_e"), 5)
+        assert result.status == "created"
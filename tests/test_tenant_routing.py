@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+
+import asyncpg
+import pytest
+import pytest_asyncio
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.tenant_routing import ROUTABLE_TENANTS_CHECKSUM, TenantRoutingTable
+from app.models.tenant import Tenant
+
+pytestmark = pytest.mark.asyncio
+
+
+def event(op: str, tenant_id: str, subdomain: str, routable: bool = True, **fields) -> dict:
+    return {
+        "op": op,
+        "id": tenant_id,
+        "subdomain": subdomain,
+        "domain": fields.get("domain"),
+        "plan": fields.get("plan"),
+        "schema_name": f"tenant_{subdomain}",
+        "routable": routable
+    }
+
+
+async def test_apply_moves_names_with_the_tenant():
+    table = TenantRoutingTable()
+    table.apply(event("INSERT", "1", "acme", domain="acme.example"))
+    table.apply(event("INSERT", "2", "globex"))
+    assert table.lookup("subdomain", "ACME").id == "1"
+    assert table.lookup("domain", "acme.example").plan == "basic"
+
+    table.apply(event("UPDATE", "1", "acme-corp", plan="premium"))
+    assert table.lookup("subdomain", "acme") is None
+    assert table.lookup("domain", "acme.example") is None
+    assert table.lookup("subdomain", "acme-corp").plan == "premium"
+
+    # Suspended, then deleted
+    table.apply(event("UPDATE", "2", "globex", routable=False))
+    assert table.lookup("id", "2") is None
+    table.apply(event("DELETE", "1", "acme-corp", routable=False))
+    assert table.by_id == {} and table.by_subdomain == {} and table.by_domain == {}
+
+
+async def test_stale_table_is_not_used():
+    table = TenantRoutingTable(max_staleness=60)
+    assert not table.usable()
+    table.ready, table.synced_at = True, time.time()
+    assert table.usable()
+    table.synced_at = time.time() - 61
+    assert not table.usable()
+
+
+async def test_verify_runs_under_a_steady_stream_of_notifications():
+    table = TenantRoutingTable(verify_interval=0.1)
+    verified = []
+
+    async def verify(conn):
+        verified.append(time.monotonic())
+
+    table._verify = verify
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def notify():
+        for index in range(1000):
+            events.put_nowait(json.dumps(event("UPDATE", "1", f"acme{index}")))
+            await asyncio.sleep(0.01)
+
+    notifying = asyncio.create_task(notify())
+    listening = asyncio.create_task(table._listen(None, events))
+    await asyncio.sleep(0.35)
+    for task in (listening, notifying):
+        task.cancel()
+    await asyncio.gather(listening, notifying, return_exceptions=True)
+
+    assert len(verified) >= 2
+    assert table.lookup("id", "1").subdomain.startswith("acme")
+    # Events alone do not confirm the table is in sync
+    assert table.synced_at is None
+
+
+@pytest_asyncio.fixture
+async def connection(database):
+    dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    conn = await asyncpg.connect(dsn)
+    yield conn
+    await conn.close()
+
+
+async def add_tenant(subdomain: str, **fields) -> Tenant:
+    async with async_session_maker() as session:
+        tenant = Tenant(
+            name=subdomain.title(),
+            subdomain=subdomain,
+            contact_name="Jane",
+            contact_email=f"jane@{subdomain}.test",
+            schema_name=f"tenant_{subdomain}",
+            **fields
+        )
+        session.add(tenant)
+        await session.commit()
+        return tenant
+
+
+async def test_checksum_catches_changes_a_count_misses(connection):
+    for index in range(3):
+        await add_tenant(f"t{index}", domain=f"t{index}.example" if index else None)
+    await add_tenant("noplan", plan=None)
+    await add_tenant("gone", is_active=False)
+
+    table = TenantRoutingTable()
+    await table.load(connection, "startup")
+    assert len(table.by_id) == 4
+    assert table.lookup("subdomain", "noplan").plan == "basic"
+
+    async def no_reload(conn, reason):
+        raise AssertionError(f"Reloaded in sync ({reason})")
+
+    table.load = no_reload
+    await table._verify(connection)
+    del table.load
+
+    # Changes whose notifications were missed, with the row count unchanged
+    await connection.execute("UPDATE tenants SET plan = 'premium' WHERE subdomain = 't1'")
+    await table._verify(connection)
+    assert table.lookup("subdomain", "t1").plan == "premium"
+
+    await connection.execute("UPDATE tenants SET subdomain = 't9' WHERE subdomain = 't2'")
+    await table._verify(connection)
+    assert table.lookup("subdomain", "t2") is None
+    assert table.lookup("subdomain", "t9").domain == "t2.example"
+
+
+async def test_checksum_of_no_tenants(connection):
+    table = TenantRoutingTable()
+    count, checksum = await connection.fetchrow(ROUTABLE_TENANTS_CHECKSUM)
+    assert count == 0 and checksum == table.checksum()
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import async_session_maker
+from app.models.auth import AuthToken
+from app.services.token_store import (
+    PERSIST_DEAD_LETTER_KEY,
+    PERSIST_LOCK_KEY,
+    PERSIST_QUEUE_KEY,
+    RedisTokenStore,
+    RefreshTokenRecord,
+    TokenPersister
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_record(user_id, token_hash=None) -> RefreshTokenRecord:
+    return RefreshTokenRecord(
+        token_hash=token_hash or uuid.uuid4().hex,
+        user_id=str(user_id),
+        expires_at=datetime.utcnow() + timedelta(days=7),
+        ip_address="203.0.113.7"
+    )
+
+
+async def queued_ops(client):
+    return [json.loads(raw) for raw in await client.lrange(PERSIST_QUEUE_KEY, 0, -1)]
+
+
+async def test_revoke_checks_owner_and_queues_once(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        store = RedisTokenStore(session)
+        record = make_record(user.id)
+        await store.save(record)
+
+        # Not the owner: nothing is held for them in Redis, Postgres has no row yet
+        assert await store.revoke(record.token_hash, str(uuid.uuid4())) is False
+        assert await store.revoke(record.token_hash, str(user.id)) is True
+        assert await store.revoke(record.token_hash, str(user.id)) is False
+
+        assert (await store.get(record.token_hash)).is_revoked
+        assert [op["op"] for op in await queued_ops(redis_client)] == ["insert", "revoke"]
+
+
+async def test_revoke_all_covers_redis_and_legacy_postgres_tokens(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        # Issued before the Redis store: only in Postgres
+        legacy = AuthToken(
+            token_type="refresh",
+            token_hash="legacy",
+            expires_at=datetime.utcnow() + timedelta(days=7),
+            user_id=user.id
+        )
+        session.add(legacy)
+        await session.commit()
+
+        store = RedisTokenStore(session)
+        records = [make_record(user.id) for _ in range(3)]
+        for record in records:
+            await store.save(record)
+
+        assert await store.revoke_all(str(user.id)) == 3
+
+    # A later request
+    async with async_session_maker() as session:
+        store = RedisTokenStore(session)
+        for record in records:
+            assert (await store.get(record.token_hash)).is_revoked
+        # Rehydrated from Postgres as revoked, not as a live token
+        assert (await store.get("legacy")).is_revoked
+        assert await redis_client.hget("refresh_token:legacy", "is_revoked") == "1"
+        assert [op["op"] for op in await queued_ops(redis_client)][-1] == "revoke_all"
+
+
+async def test_persister_applies_ops_in_order(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        store = RedisTokenStore(session)
+        kept, revoked = make_record(user.id), make_record(user.id)
+        await store.save(kept)
+        await store.save(revoked)
+        await store.revoke(revoked.token_hash, str(user.id))
+
+    persister = TokenPersister(interval=1, batch_size=100)
+    assert await persister.flush() == 3
+
+    async with async_session_maker() as session:
+        rows = dict((await session.execute(select(AuthToken.token_hash, AuthToken.is_revoked))).all())
+    assert rows == {kept.token_hash: False, revoked.token_hash: True}
+
+
+async def test_persister_dead_letters_rejected_ops(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        store = RedisTokenStore(session)
+        good = make_record(user.id)
+        orphan = make_record(uuid.uuid4())  # Foreign key violation
+        await store.save(orphan)
+        await redis_client.rpush(PERSIST_QUEUE_KEY, "{not json")
+        await store.save(good)
+
+    persister = TokenPersister(interval=1, batch_size=100)
+    assert await persister.flush() == 3
+
+    async with async_session_maker() as session:
+        hashes = (await session.execute(select(AuthToken.token_hash))).scalars().all()
+    assert hashes == [good.token_hash]
+    assert await redis_client.llen(PERSIST_QUEUE_KEY) == 0
+    dead = await redis_client.lrange(PERSIST_DEAD_LETTER_KEY, 0, -1)
+    assert len(dead) == 2 and dead[1] == "{not json"
+    assert json.loads(dead[0])["token_hash"] == orphan.token_hash
+
+
+async def test_drain_waits_for_another_flusher(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        await RedisTokenStore(session).save(make_record(user.id))
+
+    persister = TokenPersister(interval=1, batch_size=100)
+    other = redis_client.lock(PERSIST_LOCK_KEY, timeout=5)
+    assert await other.acquire()
+    assert await persister.flush() == 0
+
+    async def release_later():
+        await asyncio.sleep(0.3)
+        await other.release()
+
+    asyncio.create_task(release_later())
+    await persister.drain(timeout=5)
+    assert await redis_client.llen(PERSIST_QUEUE_KEY) == 0
+
+
+async def test_drain_times_out_while_locked(redis_client, database, tenant_user):
+    _, user = tenant_user
+    async with async_session_maker() as session:
+        await RedisTokenStore(session).save(make_record(user.id))
+
+    other = redis_client.lock(PERSIST_LOCK_KEY, timeout=5)
+    assert await other.acquire()
+    with pytest.raises(TimeoutError):
+        await TokenPersister(interval=1, batch_size=100).drain(timeout=0.3)
+
+
+async def test_persister_requeues_in_order_while_postgres_is_down(redis_client, monkeypatch):
+    for index in range(3):
+        await redis_client.rpush(PERSIST_QUEUE_KEY, json.dumps({"op": "revoke_all", "user_id": str(index)}))
+    before = await redis_client.lrange(PERSIST_QUEUE_KEY, 0, -1)
+
+    def unavailable():
+        raise ConnectionRefusedError("Postgres is down")
+
+    monkeypatch.setattr("app.services.token_store.async_session_maker", unavailable)
+    with pytest.raises(ConnectionRefusedError):
+        await TokenPersister(interval=1, batch_size=100).flush()
+
+    assert await redis_client.lrange(PERSIST_QUEUE_KEY, 0, -1) == before
+    assert await redis_client.llen(PERSIST_DEAD_LETTER_KEY) == 0
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+
+from app.core import write_behind
+from app.core.database import async_session_maker
+from app.core.write_behind import TouchBuffer
+from app.models.auth import AuthToken
+
+pytestmark = pytest.mark.asyncio
+
+
+async def add_token(user, token_hash: str):
+    async with async_session_maker() as session:
+        session.add(AuthToken(
+            token_type="refresh",
+            token_hash=token_hash,
+            expires_at=datetime.utcnow() + timedelta(days=7),
+            user_id=user.id
+        ))
+        await session.commit()
+
+
+async def last_used(token_hash: str):
+    async with async_session_maker() as session:
+        return await session.scalar(select(AuthToken.last_used_at).where(AuthToken.token_hash == token_hash))
+
+
+async def test_flush_coalesces_to_latest_touch(database, tenant_user):
+    _, user = tenant_user
+    await add_token(user, "a")
+    buffer = TouchBuffer(interval=60, batch_size=100, max_pending=1000)
+    first = datetime(2026, 1, 1, 12, 0)
+    buffer.touch(AuthToken.token_hash, "a", AuthToken.last_used_at, first + timedelta(minutes=5))
+    buffer.touch(AuthToken.token_hash, "a", AuthToken.last_used_at, first)
+
+    assert await buffer.flush() == 1
+    assert await last_used("a") == first + timedelta(minutes=5)
+    assert buffer.pending_count() == 0
+
+
+async def test_touch_of_unpersisted_row_waits_for_the_row(database, tenant_user):
+    _, user = tenant_user
+    buffer = TouchBuffer(interval=60, batch_size=100, max_pending=1000, unmatched_max_age=60)
+    at = datetime(2026, 1, 1, 12, 0)
+    buffer.touch(AuthToken.token_hash, "queued", AuthToken.last_used_at, at)
+
+    # The token is still in the Redis persist queue
+    assert await buffer.flush() == 0
+    assert buffer.pending_count() == 1
+
+    await add_token(user, "queued")
+    assert await buffer.flush() == 1
+    assert await last_used("queued") == at
+    assert buffer.pending_count() == 0
+    assert buffer._unmatched_since == {}
+
+
+async def test_unmatched_touch_is_dropped_after_max_age(database, tenant_user):
+    buffer = TouchBuffer(interval=60, batch_size=100, max_pending=1000, unmatched_max_age=0)
+    buffer.touch(AuthToken.token_hash, "deleted", AuthToken.last_used_at)
+
+    assert await buffer.flush() == 0
+    assert buffer.pending_count() == 0
+    assert buffer._unmatched_since == {}
+
+
+def broken_session():
+    raise ConnectionRefusedError("database is down")
+
+
+async def test_failed_flush_requeues_without_waking_the_loop(monkeypatch):
+    monkeypatch.setattr(write_behind, "async_session_maker", broken_session)
+    buffer = TouchBuffer(interval=60, batch_size=100, max_pending=2)
+    buffer.touch(AuthToken.token_hash, "a", AuthToken.last_used_at)
+    buffer.touch(AuthToken.token_hash, "b", AuthToken.last_used_at)
+    buffer._wakeup.clear()
+
+    with pytest.raises(ConnectionRefusedError):
+        await buffer.flush()
+    assert buffer.pending_count() == 2
+    assert not buffer._wakeup.is_set()
+
+
+async def test_failing_flushes_back_off():
+    buffer = TouchBuffer(interval=0.05, batch_size=100, max_pending=1, max_backoff=0.2)
+    attempts = []
+
+    async def failing_flush():
+        attempts.append(asyncio.get_running_loop().time())
+        # A full buffer keeps asking for a flush
+        buffer._wakeup.set()
+        raise ConnectionRefusedError("database is down")
+
+    buffer.flush = failing_flush
+    buffer.start()
+    await asyncio.sleep(0.6)
+    buffer._task.cancel()
+
+    # 0.05 to the first attempt, then 0.05, 0.1, 0.2, 0.2
+    assert 3 <= len(attempts) <= 5
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    assert gaps[1] > gaps[0] * 1.5
+
+
+async def test_hard_cap_drops_the_oldest_touches():
+    dropped = REGISTRY.get_sample_value("touch_buffer_dropped_rows_total", {"table": "auth_tokens"}) or 0.0
+    buffer = TouchBuffer(interval=60, batch_size=100, max_pending=5, max_buffered=10)
+    first = datetime(2026, 1, 1, 12, 0)
+    for minute in range(11):
+        buffer.touch(AuthToken.token_hash, f"t{minute}", AuthToken.last_used_at, first + timedelta(minutes=minute))
+
+    # Trimmed to 9, keeping the latest touches
+    assert buffer.pending_count() == 9
+    assert set(buffer._pending[("auth_tokens", "token_hash", "last_used_at")]) == {f"t{minute}" for minute in range(2, 11)}
+    assert REGISTRY.get_sample_value("touch_buffer_dropped_rows_total", {"table": "auth_tokens"}) == dropped + 2